@@ -0,0 +1,73 @@
+"""Academic calendar: programs, teaching days and periods.
+
+The definitions live in the Calendar_Program, Calendar_Day and
+Calendar_Period tables (seeded from models.Constants). DatabaseManager loads
+them into one frozen AcademicCalendar and hands the same object to every
+formatter, validator and solver until the tables change.
+"""
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+from models import Constants
+
+@dataclass(frozen=True)
+class AcademicCalendar:
+    programs: Tuple[str, ...]
+    days: Tuple[str, ...]
+    periods: Mapping[int, str]                       # period number -> time label, in teaching order
+    program_semesters: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    shifts: Mapping[int, str] = field(default_factory=lambda: MappingProxyType({}))
+    # Derived lookups, computed once in __post_init__
+    semesters: Tuple[int, ...] = field(init=False)
+    period_numbers: Tuple[int, ...] = field(init=False)
+    max_period: int = field(init=False)
+    day_index: Mapping[str, int] = field(init=False)
+    
+    def __post_init__(self):
+        periods = MappingProxyType(dict(sorted(self.periods.items())))
+        max_semester = max(self.program_semesters.values(), default=max(Constants.SEMESTERS))
+        object.__setattr__(self, 'periods', periods)
+        object.__setattr__(self, 'program_semesters', MappingProxyType(dict(self.program_semesters)))
+        object.__setattr__(self, 'shifts', MappingProxyType(dict(self.shifts)))
+        object.__setattr__(self, 'semesters', tuple(range(1, max_semester + 1)))
+        object.__setattr__(self, 'period_numbers', tuple(periods))
+        object.__setattr__(self, 'max_period', max(periods, default=0))
+        object.__setattr__(self, 'day_index', MappingProxyType({day: i for i, day in enumerate(self.days)}))
+    
+    @classmethod
+    def from_rows(cls, programs: Iterable[Tuple[str, int]], days: Iterable[str],
+                  periods: Iterable[Tuple[int, str, Optional[str]]]) -> "AcademicCalendar":
+        """Build from (program, semesters), day and (period, time label, shift) rows in order"""
+        programs = list(programs)
+        periods = list(periods)
+        return cls(
+            programs=tuple(program for program, _ in programs),
+            days=tuple(days),
+            periods={int(period): label for period, label, _ in periods},
+            program_semesters={program: int(semesters) for program, semesters in programs},
+            shifts={int(period): shift for period, _, shift in periods if shift}
+        )
+    
+    def period_time(self, period: int) -> str:
+        """Time label of a period"""
+        return self.periods.get(period, "Unknown")
+    
+    def period_display(self, period: int) -> str:
+        """'Period n: time' label used by selectors"""
+        return f"Period {period}: {self.period_time(period)}"
+    
+    def semesters_for(self, program: str) -> Tuple[int, ...]:
+        """Semesters offered by a program"""
+        count = self.program_semesters.get(program)
+        return self.semesters if count is None else tuple(range(1, count + 1))
+    
+    def slots(self) -> List[Tuple[str, int]]:
+        """Every teaching (day, period) in calendar order"""
+        return [(day, period) for day in self.days for period in self.period_numbers]
+
+DEFAULT_CALENDAR = AcademicCalendar.from_rows(
+    [(program, max(Constants.SEMESTERS)) for program in Constants.PROGRAMS],
+    Constants.DAYS,
+    [(period, label, "Morning") for period, label in Constants.PERIODS.items()]
+)
@@ -0,0 +1,132 @@
+"""Recent-activity feed built from the Created_At/Updated_At columns.
+
+Courses, teachers and assignments are merged newest first, ordered by
+(Updated_At, kind, key) descending. Pages are keyset-paginated: the cursor
+carries the sort key of the last item returned, and each table is read with
+``Updated_At <= ?`` from its Updated_At index, so a page costs at most
+limit + 1 rows per table however long the history grows. Each row appears
+once, at its latest change; rows written before the columns existed have
+NULL timestamps and are left out.
+"""
+import base64
+import heapq
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Largest page a client may ask for
+MAX_ACTIVITY_PAGE = 100
+
+# kind -> (SELECT ... FROM of the table aliased as t, key columns in sort order)
+_SOURCES = {
+    'assignment': ("""
+        SELECT t.Updated_At, t.Created_At, t.Teacher_Code, t.Course_Code, t.Program, t.Semester, t.Day, t.Period,
+               tr.Teacher_Name, c.Course_Name
+        FROM Course_Teacher t
+        LEFT JOIN Teacher tr ON t.Teacher_Code = tr.Teacher_Code
+        LEFT JOIN Course c ON t.Course_Code = c.Course_Code
+    """, ('Teacher_Code', 'Course_Code', 'Program', 'Semester', 'Day', 'Period')),
+    'course': ("""
+        SELECT t.Updated_At, t.Created_At, t.Course_Code, t.Course_Name, t.Credit_hrs
+        FROM Course t
+    """, ('Course_Code',)),
+    'teacher': ("""
+        SELECT t.Updated_At, t.Created_At, t.Teacher_Code, t.Teacher_Name, t.Teacher_Designation
+        FROM Teacher t
+    """, ('Teacher_Code',))
+}
+
+def encode_cursor(at: str, kind: str, key: Sequence[Any]) -> str:
+    """Opaque cursor pointing just past the item with this sort key"""
+    raw = json.dumps([at, kind, list(key)], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[str, str, List[Any]]:
+    """Sort key carried by a cursor; raises ValueError when it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        at, kind, key = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid activity cursor') from e
+    if not isinstance(at, str) or kind not in _SOURCES or not isinstance(key, list) or len(key) != len(_SOURCES[kind][1]):
+        raise ValueError('Invalid activity cursor')
+    return at, kind, key
+
+def _after(kind: str, cursor: Optional[Tuple[str, str, List[Any]]]) -> Tuple[str, list]:
+    """WHERE clause selecting the rows of kind that sort after the cursor"""
+    if cursor is None:
+        return "t.Updated_At IS NOT NULL", []
+    at, cursor_kind, key = cursor
+    # Within one timestamp kinds sort descending too, so later kinds keep the cursor's own second
+    if kind < cursor_kind:
+        return "t.Updated_At <= ?", [at]
+    if kind > cursor_kind:
+        return "t.Updated_At < ?", [at]
+    columns = ", ".join(f"t.{column}" for column in _SOURCES[kind][1])
+    placeholders = ", ".join("?" for _ in key)
+    return f"t.Updated_At <= ? AND (t.Updated_At < ? OR ({columns}) < ({placeholders}))", [at, at, *key]
+
+def _item(kind: str, row: Sequence[Any]) -> Dict[str, Any]:
+    updated_at, created_at, *values = row
+    item = {'kind': kind, 'action': 'created' if created_at == updated_at else 'updated', 'at': updated_at}
+    if kind == 'assignment':
+        teacher_code, course_code, program, semester, day, period, teacher_name, course_name = values
+        item.update({
+            'teacher_code': teacher_code,
+            'teacher_name': teacher_name,
+            'course_code': course_code,
+            'course_name': course_name,
+            'program': program,
+            'semester': int(semester),
+            'day': day,
+            'period': int(period),
+            'summary': f"{course_name or course_code} with {teacher_name or teacher_code}, "
+                       f"{program} Sem {semester}, {day} P{period}"
+        })
+    elif kind == 'course':
+        course_code, course_name, credit_hrs = values
+        item.update({
+            'course_code': course_code,
+            'course_name': course_name,
+            'credit_hrs': int(credit_hrs),
+            'summary': f"Course {course_code} - {course_name}"
+        })
+    else:
+        teacher_code, teacher_name, teacher_designation = values
+        item.update({
+            'teacher_code': teacher_code,
+            'teacher_name': teacher_name,
+            'teacher_designation': teacher_designation,
+            'summary': f"Teacher {teacher_code} - {teacher_name}"
+        })
+    return item
+
+def activity_page(db, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """One page of the activity feed, newest first.
+    
+    Pass the returned next_cursor back to get the following page; it is None
+    on the last page. Raises ValueError for a malformed cursor.
+    """
+    limit = max(1, min(int(limit), MAX_ACTIVITY_PAGE))
+    position = decode_cursor(cursor) if cursor else None
+    conn = db.get_read_connection()
+    try:
+        db_cursor = conn.cursor()
+        streams = []
+        for kind, (select, key_columns) in _SOURCES.items():
+            where, params = _after(kind, position)
+            order = ", ".join(f"t.{column} DESC" for column in key_columns)
+            db_cursor.execute(f"{select} WHERE {where} ORDER BY t.Updated_At DESC, {order} LIMIT ?",
+                              (*params, limit + 1))
+            key_count = len(key_columns)
+            streams.append([(row[0], kind, tuple(row[2:2 + key_count]), row) for row in db_cursor.fetchall()])
+    finally:
+        conn.close()
+    
+    # Each stream is already in its table's key order, which merge keeps for equal (time, kind)
+    merged = list(heapq.merge(*streams, key=lambda entry: (entry[0], entry[1]), reverse=True))
+    page = merged[:limit]
+    next_cursor = None
+    if len(merged) > limit:
+        at, kind, key, _ = page[-1]
+        next_cursor = encode_cursor(at, kind, key)
+    return {'items': [_item(kind, row) for _, kind, _, row in page], 'next_cursor': next_cursor}
@@ -0,0 +1,137 @@
+"""Teacher workload and timetable analytics from SQL aggregates.
+
+Nothing here reads individual assignments: three GROUP BY queries return
+one row per teacher-day, per day/period slot and per program/semester
+course, and everything else (weekly loads, idle gaps, coverage totals) is
+derived from those small results. WorkloadAnalytics keeps the result until
+DatabaseManager.get_data_version() changes.
+"""
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from response_cache import VersionedCache
+
+def _teacher_load(cursor, calendar) -> List[Dict[str, Any]]:
+    """Periods per day and per week, and idle gaps, of every teacher"""
+    cursor.execute("SELECT Teacher_Code, Teacher_Name FROM Teacher ORDER BY Teacher_Code")
+    teachers = cursor.fetchall()
+    # Distinct periods span MAX - MIN + 1 slots; the ones not taught are idle gaps
+    cursor.execute("""
+        SELECT Teacher_Code, Day, COUNT(*), COUNT(DISTINCT Period), MIN(Period), MAX(Period)
+        FROM Course_Teacher
+        GROUP BY Teacher_Code, Day
+    """)
+    by_teacher = defaultdict(dict)
+    for teacher_code, day, periods, distinct, first, last in cursor.fetchall():
+        by_teacher[teacher_code][day] = (int(periods), int(last) - int(first) + 1 - int(distinct))
+    
+    load = []
+    for teacher_code, teacher_name in teachers:
+        days = by_teacher.get(teacher_code, {})
+        per_day = {day: days[day][0] if day in days else 0 for day in calendar.days}
+        load.append({
+            'teacher_code': teacher_code,
+            'teacher_name': teacher_name,
+            'per_day': per_day,
+            'week': sum(periods for periods, _ in days.values()),
+            'max_day': max(per_day.values(), default=0),
+            'teaching_days': len(days),
+            'gaps': sum(gaps for _, gaps in days.values())
+        })
+    return load
+
+def _slot_utilization(cursor, calendar) -> Dict[str, Any]:
+    """Classes booked into each day/period against the number of program/semesters"""
+    cursor.execute("SELECT Day, Period, COUNT(*) FROM Course_Teacher GROUP BY Day, Period")
+    period_pos = {period: i for i, period in enumerate(calendar.period_numbers)}
+    counts = [[0] * len(period_pos) for _ in calendar.days]
+    for day, period, booked in cursor.fetchall():
+        d, p = calendar.day_index.get(day), period_pos.get(int(period))
+        if d is not None and p is not None:
+            counts[d][p] = int(booked)
+    classes = sum(calendar.program_semesters.values())
+    return {
+        'days': list(calendar.days),
+        'periods': list(calendar.period_numbers),
+        'counts': counts,
+        'classes': classes,
+        'utilization': [[round(booked / classes, 4) if classes else 0.0 for booked in row] for row in counts]
+    }
+
+def _coverage(cursor, calendar) -> List[Dict[str, Any]]:
+    """Scheduled periods of each program/semester against the credit hours of its courses"""
+    cursor.execute("""
+        SELECT Program, Semester, COUNT(*), SUM(Scheduled), SUM(Credit_hrs),
+               SUM(CASE WHEN Scheduled >= Credit_hrs THEN 1 ELSE 0 END),
+               SUM(CASE WHEN Scheduled < Credit_hrs THEN Scheduled ELSE Credit_hrs END)
+        FROM (
+            SELECT ct.Program, ct.Semester, ct.Course_Code, COUNT(*) AS Scheduled, MAX(c.Credit_hrs) AS Credit_hrs
+            FROM Course_Teacher ct
+            JOIN Course c ON ct.Course_Code = c.Course_Code
+            GROUP BY ct.Program, ct.Semester, ct.Course_Code
+        ) per_course
+        GROUP BY Program, Semester
+    """)
+    rows = {(program, int(semester)): tuple(int(value) for value in values)
+            for program, semester, *values in cursor.fetchall()}
+    
+    coverage = []
+    for program in calendar.programs:
+        for semester in calendar.semesters_for(program):
+            courses, scheduled, credit_hours, covered, covered_periods = rows.get((program, semester), (0,) * 5)
+            coverage.append({
+                'program': program,
+                'semester': semester,
+                'courses': courses,
+                'scheduled_periods': scheduled,
+                'credit_hours': credit_hours,
+                'covered_courses': covered,
+                # Periods beyond a course's credit hours do not make up for another course's shortfall
+                'coverage': round(covered_periods / credit_hours, 4) if credit_hours else 0.0
+            })
+    return coverage
+
+def compute_analytics(db) -> Dict[str, Any]:
+    """Workload, gap, utilization and coverage figures of the whole timetable"""
+    start = time.perf_counter()
+    calendar = db.get_calendar()
+    conn = db.get_read_connection()
+    try:
+        cursor = conn.cursor()
+        teacher_load = _teacher_load(cursor, calendar)
+        utilization = _slot_utilization(cursor, calendar)
+        coverage = _coverage(cursor, calendar)
+    finally:
+        conn.close()
+    
+    teaching_days = sum(teacher['teaching_days'] for teacher in teacher_load)
+    total_gaps = sum(teacher['gaps'] for teacher in teacher_load)
+    weekly = [teacher['week'] for teacher in teacher_load]
+    return {
+        'teacher_load': teacher_load,
+        'gaps': {
+            'total': total_gaps,
+            'teachers_with_gaps': sum(1 for teacher in teacher_load if teacher['gaps']),
+            'per_teaching_day': round(total_gaps / teaching_days, 4) if teaching_days else 0.0,
+            'max_teacher': max((teacher['gaps'] for teacher in teacher_load), default=0)
+        },
+        'weekly_load': {
+            'max': max(weekly, default=0),
+            'average': round(sum(weekly) / len(weekly), 2) if weekly else 0.0,
+            'idle_teachers': sum(1 for periods in weekly if periods == 0)
+        },
+        'utilization': utilization,
+        'coverage': coverage,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+    }
+
+class WorkloadAnalytics:
+    """Analytics of one database, recomputed only after its data changes"""
+    
+    def __init__(self, db):
+        self.db = db
+        self._cache = VersionedCache(max_entries=1)
+    
+    def get(self) -> Dict[str, Any]:
+        return self._cache.get(self.db, 'analytics', lambda: compute_analytics(self.db))
@@ -6,9 +6,15 @@ from ui_components import (
     render_teacher_management, 
     render_assignment_management,
     render_routine_display,
-    render_teacher_routine_display
+    render_teacher_routine_display,
+    render_room_management,
+    render_calendar_settings,
+    render_version_management,
+    render_undo_controls
 )
 from utils import get_time_slot_info
+from analytics import WorkloadAnalytics
+from activity import activity_page
 
 # Page configuration
 st.set_page_config(
@@ -23,6 +29,61 @@ st.set_page_config(
 def init_database():
     return DatabaseManager()
 
+@st.cache_resource
+def init_analytics():
+    return WorkloadAnalytics(init_database())
+
+def render_workload_analytics(analytics):
+    """Render the aggregate workload, utilization and coverage figures"""
+    st.markdown("---")
+    st.subheader("📈 Workload Analytics")
+    
+    weekly_load = analytics['weekly_load']
+    gaps = analytics['gaps']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Max Weekly Load", f"{weekly_load['max']} periods")
+    with col2:
+        st.metric("Average Weekly Load", f"{weekly_load['average']} periods")
+    with col3:
+        st.metric("Idle Gaps", gaps['total'], help=f"{gaps['per_teaching_day']} per teaching day")
+    with col4:
+        st.metric("Teachers Without Classes", weekly_load['idle_teachers'])
+    
+    teacher_load = analytics['teacher_load']
+    if teacher_load:
+        st.write("**Periods per Teacher per Day**")
+        load_frame = pd.DataFrame([
+            {"Teacher": f"{teacher['teacher_code']} - {teacher['teacher_name']}", **teacher['per_day'],
+             "Week": teacher['week'], "Gaps": teacher['gaps']}
+            for teacher in teacher_load
+        ])
+        st.dataframe(load_frame, use_container_width=True, hide_index=True)
+    
+    utilization = analytics['utilization']
+    st.write(f"**Slot Utilization** (share of the {utilization['classes']} program/semesters with a class)")
+    heatmap = pd.DataFrame(utilization['utilization'], index=utilization['days'],
+                           columns=[f"P{period}" for period in utilization['periods']]) * 100
+    st.dataframe(heatmap, use_container_width=True, column_config={
+        column: st.column_config.ProgressColumn(column, min_value=0, max_value=100, format="%.0f%%")
+        for column in heatmap.columns
+    })
+    
+    coverage = [row for row in analytics['coverage'] if row['courses']]
+    if coverage:
+        st.write("**Credit-Hour Coverage**")
+        st.dataframe(pd.DataFrame([{
+            "Program": row['program'],
+            "Semester": f"Sem {row['semester']}",
+            "Courses": row['courses'],
+            "Scheduled Periods": row['scheduled_periods'],
+            "Credit Hours": row['credit_hours'],
+            "Fully Covered": row['covered_courses'],
+            "Coverage": row['coverage'] * 100
+        } for row in coverage]), use_container_width=True, hide_index=True, column_config={
+            "Coverage": st.column_config.ProgressColumn("Coverage", min_value=0, max_value=100, format="%.0f%%")
+        })
+
 def main():
     # Initialize database
     db = init_database()
@@ -33,12 +94,13 @@ def main():
     
     # Sidebar navigation
     st.sidebar.title("Navigation")
-    st.sidebar.markdown(get_time_slot_info())
+    st.sidebar.markdown(get_time_slot_info(db.get_calendar()))
+    render_undo_controls(db)
     
     # Navigation options
     page = st.sidebar.selectbox(
         "Choose a section:",
-        ["Dashboard", "Course Management", "Teacher Management", "Course Assignments", "View Routines", "Teacher Routines"]
+        ["Dashboard", "Course Management", "Teacher Management", "Course Assignments", "View Routines", "Teacher Routines", "Room Management", "Timetable Versions", "Calendar Settings"]
     )
     
     # Dashboard
@@ -46,32 +108,29 @@ def main():
         st.header("📊 Dashboard")
         
         # Get summary statistics
-        courses = db.get_courses()
-        teachers = db.get_teachers()
-        assignments = db.get_course_assignments()
+        stats = db.get_dashboard_stats()
         
         # Display metrics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total Courses", len(courses))
+            st.metric("Total Courses", stats['courses'])
         
         with col2:
-            st.metric("Total Teachers", len(teachers))
+            st.metric("Total Teachers", stats['teachers'])
         
         with col3:
-            st.metric("Total Assignments", len(assignments))
+            st.metric("Total Assignments", stats['assignments'])
         
         with col4:
-            programs_with_assignments = int(assignments['Program'].nunique()) if len(assignments) > 0 else 0
-            st.metric("Programs with Routines", programs_with_assignments)
+            st.metric("Programs with Routines", stats['programs'])
         
         st.markdown("---")
         
         # Recent assignments
-        if len(assignments) > 0:
+        if stats['assignments'] > 0:
             st.subheader("📋 Recent Assignments")
-            recent_assignments = assignments.tail(10)
+            recent_assignments = db.get_recent_assignments(10)
             
             display_data = []
             for idx, assignment in recent_assignments.iterrows():
@@ -81,31 +140,45 @@ def main():
                     "Day": assignment['Day'],
                     "Period": f"P{assignment['Period']}",
                     "Course": assignment['Course_Name'],
-                    "Teacher": assignment['Teacher_Name']
+                    "Teacher": assignment['Teacher_Name'],
+                    "Added": assignment['Created_At'] if pd.notna(assignment['Created_At']) else "—"
                 })
             
             st.dataframe(pd.DataFrame(display_data), use_container_width=True)
         else:
             st.info("No assignments found. Start by adding courses and teachers, then create assignments.")
         
+        # Recent activity
+        activity = activity_page(db, 10)['items']
+        if activity:
+            st.subheader("🕒 Recent Activity")
+            st.dataframe(pd.DataFrame([{
+                "When": item['at'],
+                "What": item['kind'].capitalize(),
+                "Change": item['action'].capitalize(),
+                "Details": item['summary']
+            } for item in activity]), use_container_width=True, hide_index=True)
+        
+        render_workload_analytics(init_analytics().get())
+        
         # System status
         st.markdown("---")
         st.subheader("🔧 System Status")
         
-        if courses.empty:
+        if stats['courses'] == 0:
             st.warning("⚠️ No courses added yet")
         else:
-            st.success(f"✅ {len(courses)} courses configured")
+            st.success(f"✅ {stats['courses']} courses configured")
         
-        if teachers.empty:
+        if stats['teachers'] == 0:
             st.warning("⚠️ No teachers added yet")
         else:
-            st.success(f"✅ {len(teachers)} teachers configured")
+            st.success(f"✅ {stats['teachers']} teachers configured")
         
-        if assignments.empty:
+        if stats['assignments'] == 0:
             st.warning("⚠️ No course assignments made yet")
         else:
-            st.success(f"✅ {len(assignments)} assignments configured")
+            st.success(f"✅ {stats['assignments']} assignments configured")
     
     # Course Management
     elif page == "Course Management":
@@ -127,6 +200,18 @@ def main():
     elif page == "Teacher Routines":
         render_teacher_routine_display(db)
     
+    # Room Management
+    elif page == "Room Management":
+        render_room_management(db)
+    
+    # Timetable Versions
+    elif page == "Timetable Versions":
+        render_version_management(db)
+    
+    # Calendar Settings
+    elif page == "Calendar Settings":
+        render_calendar_settings(db)
+    
     # Footer
     st.markdown("---")
     st.markdown(
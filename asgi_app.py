@@ -0,0 +1,458 @@
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote
+
+from activity import activity_page
+from change_bus import ChangeBus, Subscription
+from database import DatabaseManager
+from routine_grid import (
+    GRID_JSON,
+    build_routine_grid,
+    build_routine_grids,
+    build_teacher_routine_grid,
+    negotiate_routine_format,
+    encode_routine
+)
+from search import SEARCH_LIMIT, TYPEAHEAD_LIMIT, search_entities, parse_kinds, typeahead
+from singleflight import AsyncSingleFlight
+from utils import (
+    validate_course_data,
+    validate_teacher_data,
+    validate_assignment_slot,
+    parse_semester_list,
+    build_routine_payload,
+    build_teacher_routine_payload
+)
+
+# Upper bound on threads touching SQLite at once; extra requests queue on the event loop
+MAX_DB_WORKERS = 8
+# Reads may lag the primary by this many seconds (local writes refresh immediately)
+READ_SNAPSHOT_STALENESS = 5.0
+# Idle event streams send a comment this often so proxies keep them open
+EVENT_KEEPALIVE_INTERVAL = 15.0
+
+class AsyncDatabase:
+    """Non-blocking facade over DatabaseManager backed by a bounded thread pool"""
+    
+    def __init__(self, db: DatabaseManager, max_workers: int = MAX_DB_WORKERS):
+        self.db = db
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self.flights = AsyncSingleFlight()
+    
+    async def run(self, func: Callable, *args) -> Any:
+        """Run a blocking call on the database thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    async def coalesced(self, key: Tuple, func: Callable, *args) -> Any:
+        """Run a read once for all concurrent callers sharing the same key"""
+        return await self.flights.do(key, self.run, func, *args)
+    
+    def shutdown(self):
+        """Stop the database thread pool"""
+        self._executor.shutdown(wait=False)
+
+def _json_default(value):
+    """Serialize numpy scalars coming out of pandas frames"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+def _records(df) -> List[Dict[str, Any]]:
+    """Convert a dataframe to JSON-ready records"""
+    return df.to_dict('records')
+
+class BadRequest(ValueError):
+    """Request the endpoints cannot read; dispatch answers it with a 400"""
+
+class Request:
+    """Minimal view over an ASGI HTTP scope and its body"""
+    
+    def __init__(self, scope: Dict[str, Any], body: bytes):
+        """Raises BadRequest when the query string is not UTF-8"""
+        self.method = scope['method']
+        self.path = scope['path']
+        try:
+            self.query = {k: v[-1] for k, v in parse_qs(scope.get('query_string', b'').decode()).items()}
+        except UnicodeDecodeError as e:
+            raise BadRequest('Malformed query string') from e
+        # Header values are latin-1 on the wire, so decoding them cannot fail
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        self.body = body
+    
+    def form(self) -> Dict[str, str]:
+        """Parse a JSON or urlencoded request body; raises BadRequest when it is malformed"""
+        if not self.body:
+            return {}
+        try:
+            if not self.headers.get('content-type', '').startswith('application/json'):
+                return {k: v[-1] for k, v in parse_qs(self.body.decode()).items()}
+            data = json.loads(self.body)
+        except ValueError as e:
+            raise BadRequest('Malformed request body') from e
+        if not isinstance(data, dict):
+            raise BadRequest('Request body must be a JSON object')
+        return {k: str(v) for k, v in data.items()}
+
+class Encoded:
+    """Pre-serialized response body that varies with the Accept header"""
+    
+    def __init__(self, data: bytes, media_type: str):
+        self.data = data
+        self.media_type = media_type
+
+class EventStream:
+    """Server-Sent Events response announcing changes to one routine"""
+    
+    def __init__(self, bus: ChangeBus, subscription: Subscription):
+        self.bus = bus
+        self.subscription = subscription
+    
+    async def stream(self, receive, send):
+        """Send an 'invalidate' event whenever the routine changes until the client goes away"""
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                # Pages are served by the Flask app on another origin
+                (b'access-control-allow-origin', b'*')
+            ]
+        })
+        key = self.subscription.key
+        if key[0] == 'routine':
+            data = json.dumps({'program': key[1], 'semester': key[2]})
+        else:
+            data = json.dumps({'teacher_code': key[1]})
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        try:
+            await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+            while not disconnected.done():
+                changed = asyncio.ensure_future(self.subscription.changed.wait())
+                await asyncio.wait({changed, disconnected}, timeout=EVENT_KEEPALIVE_INTERVAL,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                changed.cancel()
+                if disconnected.done():
+                    break
+                if self.subscription.changed.is_set():
+                    self.subscription.changed.clear()
+                    message = f'event: invalidate\ndata: {data}\n\n'
+                else:
+                    message = ': keepalive\n\n'
+                await send({'type': 'http.response.body', 'body': message.encode(), 'more_body': True})
+        finally:
+            disconnected.cancel()
+            self.bus.unsubscribe(self.subscription)
+    
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+Response = Tuple[int, Any]
+Handler = Callable[..., Awaitable[Response]]
+
+class RoutineASGIApp:
+    """ASGI variant of the routine, teacher, course and assignment endpoints"""
+    
+    def __init__(self, db: Optional[DatabaseManager] = None, max_workers: int = MAX_DB_WORKERS):
+        self.adb = AsyncDatabase(db or DatabaseManager(read_snapshot_staleness=READ_SNAPSHOT_STALENESS),
+                                max_workers=max_workers)
+        # Journal polls share the bounded pool, so MAX_DB_WORKERS covers every database call
+        self.bus = ChangeBus(self.adb.db, run=self.adb.run)
+        self.routes: List[Tuple[str, re.Pattern, Handler]] = []
+        self._register_routes()
+    
+    def route(self, method: str, pattern: str, handler: Handler):
+        """Register a handler for a method and path regex"""
+        self.routes.append((method, re.compile(f"^{pattern}$"), handler))
+    
+    def _register_routes(self):
+        self.route('GET', r'/get_routine/(?P<program>[^/]+)/(?P<semester>\d+)', self.get_routine)
+        self.route('GET', r'/get_routines', self.get_routines)
+        self.route('GET', r'/get_teacher_routine/(?P<teacher_code>[^/]+)', self.get_teacher_routine)
+        self.route('GET', r'/events/routine/(?P<program>[^/]+)/(?P<semester>\d+)', self.routine_events)
+        self.route('GET', r'/events/teacher/(?P<teacher_code>[^/]+)', self.teacher_events)
+        self.route('GET', r'/metrics/singleflight', self.singleflight_metrics)
+        self.route('GET', r'/metrics/events', self.event_metrics)
+        self.route('GET', r'/api/courses', self.list_courses)
+        self.route('POST', r'/api/courses', self.add_course)
+        self.route('GET', r'/api/teachers', self.list_teachers)
+        self.route('POST', r'/api/teachers', self.add_teacher)
+        self.route('GET', r'/api/assignments', self.list_assignments)
+        self.route('POST', r'/api/assignments', self.add_assignment)
+        self.route('POST', r'/api/assignments/delete', self.delete_assignment)
+        self.route('GET', r'/api/free_slots', self.free_slots)
+        self.route('GET', r'/api/activity', self.activity)
+        self.route('GET', r'/api/search', self.search)
+        self.route('GET', r'/api/typeahead/(?P<kind>[^/]+)', self.typeahead)
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+        
+        try:
+            request = Request(scope, body)
+        except BadRequest as e:
+            status, payload = 400, {'error': str(e)}
+        else:
+            status, payload = await self.dispatch(request)
+        if isinstance(payload, EventStream):
+            await payload.stream(receive, send)
+            return
+        headers = []
+        if isinstance(payload, Encoded):
+            data, media_type = payload.data, payload.media_type
+            headers.append((b'vary', b'Accept'))
+        else:
+            data, media_type = json.dumps(payload, default=_json_default).encode(), 'application/json'
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', media_type.encode()),
+                (b'content-length', str(len(data)).encode()),
+                *headers
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': data})
+    
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.bus.close()
+                self.adb.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    async def dispatch(self, request: Request) -> Response:
+        """Find the matching route and run its handler"""
+        path_matched = False
+        for method, pattern, handler in self.routes:
+            match = pattern.match(request.path)
+            if not match:
+                continue
+            path_matched = True
+            if method == request.method:
+                params = {k: unquote(v) for k, v in match.groupdict().items()}
+                try:
+                    return await handler(request, **params)
+                except BadRequest as e:
+                    return 400, {'error': str(e)}
+        if path_matched:
+            return 405, {'error': 'Method not allowed'}
+        return 404, {'error': 'Not found'}
+    
+    async def _routine(self, request: Request, key: Tuple, build_payload: Callable, build_grid: Callable,
+                       *args) -> Response:
+        """Serve a routine as the default JSON or, when the client asks for it, the compact grid"""
+        media_type = negotiate_routine_format(request.headers.get('accept'), request.query.get('format'))
+        if media_type is None:
+            payload = await self.adb.coalesced(key, build_payload, self.adb.db, *args)
+            return 200, Encoded(json.dumps(payload, default=_json_default).encode(), 'application/json')
+        payload = await self.adb.coalesced(key + ('grid',), build_grid, self.adb.db, *args)
+        return 200, Encoded(encode_routine(payload, media_type), media_type)
+    
+    async def get_routine(self, request: Request, program: str, semester: str) -> Response:
+        """Get routine data for program and semester"""
+        semester_num = int(semester)
+        return await self._routine(request, ('routine', program, semester_num),
+                                   build_routine_payload, build_routine_grid, program, semester_num)
+    
+    async def get_routines(self, request: Request) -> Response:
+        """Get the routines of several semesters of a program (?program=BCA&semesters=1-8) as grids"""
+        program = request.query.get('program', '').strip()
+        calendar = await self.adb.run(self.adb.db.get_calendar)
+        errors, semesters = parse_semester_list(calendar, program, request.query.get('semesters', ''))
+        if errors:
+            return 400, {'errors': errors}
+        media_type = negotiate_routine_format(request.headers.get('accept'), request.query.get('format')) or GRID_JSON
+        payload = await self.adb.coalesced(('routines', program, tuple(semesters)),
+                                           build_routine_grids, self.adb.db, program, semesters)
+        return 200, Encoded(encode_routine(payload, media_type), media_type)
+    
+    async def get_teacher_routine(self, request: Request, teacher_code: str) -> Response:
+        """Get routine for specific teacher"""
+        return await self._routine(request, ('teacher_routine', teacher_code),
+                                   build_teacher_routine_payload, build_teacher_routine_grid, teacher_code)
+    
+    async def routine_events(self, request: Request, program: str, semester: str) -> Response:
+        """Stream invalidations of a program/semester routine"""
+        return 200, EventStream(self.bus, self.bus.subscribe(('routine', program, int(semester))))
+    
+    async def teacher_events(self, request: Request, teacher_code: str) -> Response:
+        """Stream invalidations of a teacher's routine"""
+        return 200, EventStream(self.bus, self.bus.subscribe(('teacher', teacher_code)))
+    
+    async def event_metrics(self, request: Request) -> Response:
+        """Report open event streams and how many invalidations were pushed"""
+        return 200, {
+            'subscribers': self.bus.subscriber_count(),
+            'published': self.bus.published,
+            'notified': self.bus.notified
+        }
+    
+    async def singleflight_metrics(self, request: Request) -> Response:
+        """Report how many reads were served by joining an in-flight computation"""
+        return 200, self.adb.flights.stats.snapshot()
+    
+    async def list_courses(self, request: Request) -> Response:
+        """List all courses"""
+        courses = await self.adb.coalesced(('courses',), self.adb.db.get_courses)
+        return 200, {'courses': _records(courses)}
+    
+    async def add_course(self, request: Request) -> Response:
+        """Add new course"""
+        form = request.form()
+        course_code = form.get('course_code', '').strip()
+        course_name = form.get('course_name', '').strip()
+        credit_hrs = form.get('credit_hours', '').strip()
+        
+        errors, credit_hours = validate_course_data(course_code, course_name, credit_hrs)
+        if errors:
+            return 400, {'errors': errors}
+        
+        if await self.adb.run(self.adb.db.add_course, course_code, course_name, credit_hours):
+            return 201, {'message': f'Course "{course_name}" added successfully!'}
+        return 409, {'error': f'Failed to add course. Course code "{course_code}" may already exist.'}
+    
+    async def list_teachers(self, request: Request) -> Response:
+        """List all teachers"""
+        teachers = await self.adb.coalesced(('teachers',), self.adb.db.get_teachers)
+        return 200, {'teachers': _records(teachers)}
+    
+    async def add_teacher(self, request: Request) -> Response:
+        """Add new teacher"""
+        form = request.form()
+        teacher_code = form.get('teacher_code', '').strip()
+        teacher_name = form.get('teacher_name', '').strip()
+        teacher_designation = form.get('teacher_designation', '').strip()
+        
+        errors = validate_teacher_data(teacher_code, teacher_name, teacher_designation)
+        if errors:
+            return 400, {'errors': errors}
+        
+        if await self.adb.run(self.adb.db.add_teacher, teacher_code, teacher_name, teacher_designation):
+            return 201, {'message': f'Teacher "{teacher_name}" added successfully!'}
+        return 409, {'error': f'Failed to add teacher. Teacher code "{teacher_code}" may already exist.'}
+    
+    async def list_assignments(self, request: Request) -> Response:
+        """List all course assignments"""
+        assignments = await self.adb.coalesced(('assignments',), self.adb.db.get_course_assignments)
+        return 200, {'assignments': _records(assignments)}
+    
+    def _assignment_fields(self, request: Request) -> Tuple[Optional[tuple], Optional[str]]:
+        """Read and validate assignment key fields from the request body"""
+        form = request.form()
+        fields = [form.get(name, '').strip() for name in
+                  ('teacher_code', 'course_code', 'program', 'semester', 'day', 'period')]
+        if not all(fields):
+            return None, 'All fields are required.'
+        teacher_code, course_code, program, semester_str, day, period_str = fields
+        try:
+            return (teacher_code, course_code, program, int(semester_str), day, int(period_str)), None
+        except ValueError:
+            return None, 'Invalid semester or period value.'
+    
+    async def add_assignment(self, request: Request) -> Response:
+        """Add course assignment"""
+        fields, error = self._assignment_fields(request)
+        if error:
+            return 400, {'error': error}
+        teacher_code, course_code, program, semester, day, period = fields
+        
+        calendar = await self.adb.run(self.adb.db.get_calendar)
+        errors = validate_assignment_slot(calendar, program, semester, day, period)
+        if errors:
+            return 400, {'errors': errors}
+        
+        if await self.adb.run(self.adb.db.assign_course_teacher,
+                              teacher_code, course_code, period, program, semester, day):
+            return 201, {'message': 'Assignment added successfully!'}
+        suggestions = await self.adb.run(self.adb.db.find_free_slots, teacher_code, program, semester,
+                                         course_code, 3)
+        return 409, {'error': 'Failed to add assignment. There might be a conflict or invalid data.',
+                     'free_slots': suggestions}
+    
+    async def delete_assignment(self, request: Request) -> Response:
+        """Delete course assignment"""
+        fields, error = self._assignment_fields(request)
+        if error:
+            return 400, {'error': error}
+        teacher_code, course_code, program, semester, day, period = fields
+        
+        if await self.adb.run(self.adb.db.remove_course_assignment,
+                              teacher_code, course_code, program, semester, day, period):
+            return 200, {'message': 'Assignment deleted successfully!'}
+        return 404, {'error': 'Failed to delete assignment.'}
+    
+    async def free_slots(self, request: Request) -> Response:
+        """Slots where a teacher and a program/semester are both free, best first"""
+        teacher_code = request.query.get('teacher_code', '').strip()
+        program = request.query.get('program', '').strip()
+        try:
+            semester = int(request.query.get('semester', ''))
+            limit = int(request.query['limit']) if request.query.get('limit') else None
+        except ValueError:
+            return 400, {'error': 'Invalid semester or limit value.'}
+        if not teacher_code or not program:
+            return 400, {'error': 'teacher_code, program and semester are required'}
+        course_code = request.query.get('course_code', '').strip() or None
+        slots = await self.adb.run(self.adb.db.find_free_slots, teacher_code, program, semester, course_code, limit)
+        return 200, {'slots': slots}
+    
+    async def activity(self, request: Request) -> Response:
+        """Recently created or updated courses, teachers and assignments, one keyset page at a time"""
+        try:
+            limit = int(request.query.get('limit') or 20)
+        except ValueError:
+            return 400, {'error': 'Invalid limit value.'}
+        try:
+            return 200, await self.adb.run(activity_page, self.adb.db, limit, request.query.get('cursor') or None)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+    
+    async def search(self, request: Request) -> Response:
+        """Courses and teachers whose codes, names or designations start with the words of q"""
+        try:
+            limit = int(request.query.get('limit') or SEARCH_LIMIT)
+        except ValueError:
+            return 400, {'error': 'Invalid limit value.'}
+        try:
+            hits = await self.adb.run(search_entities, self.adb.db, request.query.get('q', ''),
+                                      parse_kinds(request.query.get('kind')), limit)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        return 200, {'results': hits}
+    
+    async def typeahead(self, request: Request, kind: str) -> Response:
+        """Best matching teachers or courses for a typeahead box"""
+        try:
+            limit = int(request.query.get('limit') or TYPEAHEAD_LIMIT)
+        except ValueError:
+            return 400, {'error': 'Invalid limit value.'}
+        try:
+            options = await self.adb.run(typeahead, self.adb.db, kind, request.query.get('q', ''), limit)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        return 200, {'options': options}
+
+app = RoutineASGIApp()
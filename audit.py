@@ -0,0 +1,229 @@
+"""Whole-timetable conflict audit.
+
+Run with ``python audit.py [database]`` or fetch ``/audit`` from the Flask app.
+"""
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+from academic_calendar import AcademicCalendar
+from availability import AvailabilityIndex
+from timetable import CompactTimetable
+
+def _duplicate_groups(keys: np.ndarray) -> List[np.ndarray]:
+    """Row indices of every key that occurs more than once, one array per key"""
+    if len(keys) == 0:
+        return []
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    flagged = np.nonzero(counts[inverse] > 1)[0]
+    if len(flagged) == 0:
+        return []
+    order = flagged[np.argsort(keys[flagged], kind='stable')]
+    boundaries = np.nonzero(np.diff(keys[order]))[0] + 1
+    return np.split(order, boundaries)
+
+class _RowDecoder:
+    """Decodes many assignment rows at once by indexing arrays of the interned codes"""
+    
+    def __init__(self, timetable: CompactTimetable, cols: Mapping[str, np.ndarray]):
+        self.cols = cols
+        self.teachers = np.array(timetable.teachers.values, dtype=object)
+        self.courses = np.array(timetable.courses.values, dtype=object)
+        self.programs = np.array(timetable.programs.values, dtype=object)
+        self.days = np.array(timetable.days.values, dtype=object)
+    
+    def groups(self, groups: List[np.ndarray]) -> List[List[Dict[str, Any]]]:
+        """Report entries of each group of row indices, decoded in one pass"""
+        if not groups:
+            return []
+        entries = self(np.concatenate(groups))
+        ends = np.cumsum([len(group) for group in groups]).tolist()
+        return [entries[end - len(group):end] for group, end in zip(groups, ends)]
+    
+    def __call__(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """Report entries of the given row indices"""
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = self.cols
+        return [
+            {'teacher_code': teacher, 'course_code': course, 'program': program,
+             'semester': semester, 'day': day, 'period': period}
+            for teacher, course, program, semester, day, period in zip(
+                self.teachers[cols['teacher'][rows]].tolist(), self.courses[cols['course'][rows]].tolist(),
+                self.programs[cols['program'][rows]].tolist(), cols['semester'][rows].tolist(),
+                self.days[cols['day'][rows]].tolist(), cols['period'][rows].tolist())
+        ]
+
+def audit_timetable(timetable: CompactTimetable, credit_hours: Mapping[str, int],
+                    teacher_codes: Iterable[str],
+                    availability: Optional[AvailabilityIndex] = None,
+                    calendar: Optional[AcademicCalendar] = None) -> Dict[str, Any]:
+    """Find every hard-constraint violation with grouped array operations.
+    
+    credit_hours maps Course_Code to Credit_hrs (the weekly period count a
+    course should get in each program/semester); teacher_codes lists the
+    teachers that exist in the Teacher table. With an availability index,
+    bookings in blocked slots and over workload limits are reported too;
+    with a calendar, assignments in programs, semesters, days or periods it
+    does not offer.
+    """
+    start = time.perf_counter()
+    cols = {name: col.astype(np.int64) for name, col in timetable.columns().items()}
+    n_days = max(len(timetable.days), 1)
+    n_periods = int(cols['period'].max()) + 1 if len(timetable) else 1
+    n_semesters = int(cols['semester'].max()) + 1 if len(timetable) else 1
+    slot = cols['day'] * n_periods + cols['period']
+    
+    # A teacher teaching two classes in the same day/period
+    teacher_keys = cols['teacher'] * (n_days * n_periods) + slot
+    teacher_groups = _duplicate_groups(teacher_keys)
+    
+    # Two courses scheduled into one program/semester slot
+    class_keys = (cols['program'] * n_semesters + cols['semester']) * (n_days * n_periods) + slot
+    class_groups = _duplicate_groups(class_keys)
+    
+    # Assignments pointing at teachers or courses that no longer exist
+    known_teachers = set(teacher_codes)
+    teacher_known = np.array([code in known_teachers for code in timetable.teachers.values], dtype=bool)
+    credit_by_course = np.array([credit_hours.get(code, -1) for code in timetable.courses.values], dtype=np.int64)
+    orphan_teacher = ~teacher_known[cols['teacher']] if len(timetable) else np.zeros(0, dtype=bool)
+    orphan_course = credit_by_course[cols['course']] < 0 if len(timetable) else np.zeros(0, dtype=bool)
+    orphan_rows = np.nonzero(orphan_teacher | orphan_course)[0]
+    
+    # Weekly periods per course in each program/semester compared with its credit hours
+    mismatch_keys = mismatch_counts = mismatch_expected = np.zeros(0, dtype=np.int64)
+    n_courses = max(len(timetable.courses), 1)
+    if len(timetable):
+        course_keys = (cols['program'] * n_semesters + cols['semester']) * n_courses + cols['course']
+        unique_keys, counts = np.unique(course_keys, return_counts=True)
+        expected = credit_by_course[unique_keys % n_courses]
+        bad = np.nonzero((expected >= 0) & (expected != counts))[0]
+        mismatch_keys, mismatch_counts, mismatch_expected = unique_keys[bad], counts[bad], expected[bad]
+    
+    # Bookings in slots a teacher blocked, and days/weeks over a teacher's limits
+    blocked_rows = np.zeros(0, dtype=np.int64)
+    workload_violations = []
+    if availability is not None and len(timetable):
+        n_teachers = len(timetable.teachers)
+        blocked_grid = np.zeros((n_teachers, n_days, n_periods), dtype=bool)
+        max_per_day = np.full(n_teachers, -1, dtype=np.int64)
+        max_per_week = np.full(n_teachers, -1, dtype=np.int64)
+        for teacher_id, code in enumerate(timetable.teachers.values):
+            mask = availability.blocked_mask(code)
+            if mask:
+                for day_id, day in enumerate(timetable.days.values):
+                    for period in range(n_periods):
+                        bit = availability.slot_bit(day, period)
+                        if bit is not None and mask >> bit & 1:
+                            blocked_grid[teacher_id, day_id, period] = True
+            day_limit, week_limit = availability.get_limits(code)
+            max_per_day[teacher_id] = -1 if day_limit is None else day_limit
+            max_per_week[teacher_id] = -1 if week_limit is None else week_limit
+        blocked_rows = np.nonzero(blocked_grid[cols['teacher'], cols['day'], cols['period']])[0]
+        
+        teacher_day_keys, day_counts = np.unique(cols['teacher'] * n_days + cols['day'], return_counts=True)
+        day_teachers = teacher_day_keys // n_days
+        day_limits = max_per_day[day_teachers]
+        over_day = np.nonzero((day_limits >= 0) & (day_counts > day_limits))[0]
+        over_day_teachers, over_day_days = day_teachers[over_day], teacher_day_keys[over_day] % n_days
+        over_day_counts, over_day_limits = day_counts[over_day], day_limits[over_day]
+        week_counts = np.bincount(cols['teacher'], minlength=n_teachers)
+        over_week = np.nonzero((max_per_week >= 0) & (week_counts > max_per_week))[0]
+    
+    # Assignments left in slots or classes the calendar no longer offers
+    outside_rows = np.zeros(0, dtype=np.int64)
+    if calendar is not None and len(timetable):
+        semester_limit = np.array([len(calendar.semesters_for(program)) if program in calendar.programs else 0
+                                   for program in timetable.programs.values], dtype=np.int64)
+        day_known = np.array([day in calendar.day_index for day in timetable.days.values], dtype=bool)
+        period_known = np.zeros(n_periods, dtype=bool)
+        period_known[np.array([p for p in calendar.period_numbers if p < n_periods], dtype=np.int64)] = True
+        inside = ((cols['semester'] >= 1) & (cols['semester'] <= semester_limit[cols['program']])
+                  & day_known[cols['day']] & period_known[cols['period']])
+        outside_rows = np.nonzero(~inside)[0]
+    detect_ms = (time.perf_counter() - start) * 1000
+    
+    # Report building decodes ids through arrays of codes rather than row by row
+    describe = _RowDecoder(timetable, cols)
+    programs = np.array(timetable.programs.values, dtype=object)
+    courses = np.array(timetable.courses.values, dtype=object)
+    class_ids, course_ids = np.divmod(mismatch_keys, n_courses)
+    program_ids, semesters = np.divmod(class_ids, n_semesters)
+    mismatches = [
+        {'program': program, 'semester': semester, 'course_code': course,
+         'scheduled_periods': scheduled, 'credit_hours': credit}
+        for program, semester, course, scheduled, credit in zip(
+            programs[program_ids].tolist(), semesters.tolist(), courses[course_ids].tolist(),
+            mismatch_counts.tolist(), mismatch_expected.tolist())
+    ]
+    if availability is not None and len(timetable):
+        teachers = np.array(timetable.teachers.values, dtype=object)
+        days = np.array(timetable.days.values, dtype=object)
+        workload_violations = [
+            {'teacher_code': teacher, 'day': day, 'periods': periods, 'limit': limit}
+            for teacher, day, periods, limit in zip(
+                teachers[over_day_teachers].tolist(), days[over_day_days].tolist(),
+                over_day_counts.tolist(), over_day_limits.tolist())
+        ] + [
+            {'teacher_code': teacher, 'day': None, 'periods': periods, 'limit': limit}
+            for teacher, periods, limit in zip(
+                teachers[over_week].tolist(), week_counts[over_week].tolist(), max_per_week[over_week].tolist())
+        ]
+    orphaned = [
+        dict(entry, missing_teacher=missing_teacher, missing_course=missing_course)
+        for entry, missing_teacher, missing_course in zip(
+            describe(orphan_rows), orphan_teacher[orphan_rows].tolist(), orphan_course[orphan_rows].tolist())
+    ]
+    report = {
+        'teacher_double_bookings': describe.groups(teacher_groups),
+        'class_slot_collisions': describe.groups(class_groups),
+        'orphaned_assignments': orphaned,
+        'credit_hour_mismatches': mismatches,
+        'blocked_slot_bookings': describe(blocked_rows),
+        'workload_violations': workload_violations,
+        'outside_calendar': describe(outside_rows)
+    }
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    return {
+        'summary': {
+            'assignments': len(timetable),
+            'teacher_double_bookings': len(teacher_groups),
+            'class_slot_collisions': len(class_groups),
+            'orphaned_assignments': len(orphan_rows),
+            'credit_hour_mismatches': len(mismatches),
+            'blocked_slot_bookings': len(blocked_rows),
+            'workload_violations': len(workload_violations),
+            'outside_calendar': len(outside_rows),
+            # Finding the violations, and finding them plus building this report
+            'detect_ms': round(detect_ms, 2),
+            'elapsed_ms': round(elapsed_ms, 2)
+        },
+        **report
+    }
+
+def run_audit(db) -> Dict[str, Any]:
+    """Load the whole timetable once and audit it; load_ms and total_ms add the time spent loading"""
+    start = time.perf_counter()
+    timetable = CompactTimetable.load(db)
+    courses = db.get_courses()
+    teachers = db.get_teachers()
+    credit_hours = dict(zip(courses['Course_Code'], courses['Credit_hrs'].astype(int)))
+    availability = db.get_availability_index()
+    load_ms = (time.perf_counter() - start) * 1000
+    report = audit_timetable(timetable, credit_hours, teachers['Teacher_Code'], availability, db.get_calendar())
+    report['summary']['load_ms'] = round(load_ms, 2)
+    report['summary']['total_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return report
+
+if __name__ == '__main__':
+    from database import DatabaseManager
+    
+    db_name = sys.argv[1] if len(sys.argv) > 1 else "Class_routine.db"
+    report = run_audit(DatabaseManager(db_name))
+    print(json.dumps(report, indent=2))
+    summary = report['summary']
+    problems = sum(v for k, v in summary.items() if k != 'assignments' and not k.endswith('_ms'))
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,61 @@
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from academic_calendar import DEFAULT_CALENDAR
+
+class AvailabilityIndex:
+    """Precomputed per-teacher blocked-slot bitmasks and workload limits.
+    
+    Slot bits are numbered day_index * stride + period, so checking whether a
+    teacher may take a slot is a dictionary lookup and a bit test.
+    """
+    
+    def __init__(self, blocked: Iterable[Tuple[str, str, int]] = (),
+                 workloads: Iterable[Tuple[str, Optional[int], Optional[int]]] = (),
+                 days: Sequence[str] = DEFAULT_CALENDAR.days, max_period: int = DEFAULT_CALENDAR.max_period):
+        self.day_index = {day: i for i, day in enumerate(days)}
+        self.stride = max_period + 1
+        self.blocked: Dict[str, int] = {}
+        self.limits: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+        for teacher_code, day, period in blocked:
+            bit = self.slot_bit(day, int(period))
+            if bit is not None:
+                self.blocked[teacher_code] = self.blocked.get(teacher_code, 0) | (1 << bit)
+        for teacher_code, max_per_day, max_per_week in workloads:
+            self.limits[teacher_code] = (
+                int(max_per_day) if max_per_day is not None else None,
+                int(max_per_week) if max_per_week is not None else None
+            )
+    
+    def slot_bit(self, day: str, period: int) -> Optional[int]:
+        """Bit position of a day/period, or None for an unknown day or period"""
+        day_idx = self.day_index.get(day)
+        if day_idx is None or not 0 <= period < self.stride:
+            return None
+        return day_idx * self.stride + period
+    
+    def blocked_mask(self, teacher_code: str) -> int:
+        """Bitmask of slots the teacher cannot be booked in"""
+        return self.blocked.get(teacher_code, 0)
+    
+    def is_blocked(self, teacher_code: str, day: str, period: int) -> bool:
+        """Whether the teacher marked this slot unavailable"""
+        bit = self.slot_bit(day, period)
+        return bit is not None and bool(self.blocked.get(teacher_code, 0) >> bit & 1)
+    
+    def get_limits(self, teacher_code: str) -> Tuple[Optional[int], Optional[int]]:
+        """(max periods per day, max periods per week); None means unlimited"""
+        return self.limits.get(teacher_code, (None, None))
+    
+    def within_limits(self, teacher_code: str, day_count: int, week_count: int) -> bool:
+        """Whether one more period fits under the teacher's daily and weekly limits"""
+        max_per_day, max_per_week = self.get_limits(teacher_code)
+        if max_per_day is not None and day_count >= max_per_day:
+            return False
+        if max_per_week is not None and week_count >= max_per_week:
+            return False
+        return True
+    
+    def allows(self, teacher_code: str, day: str, period: int, day_count: int, week_count: int) -> bool:
+        """Whether the teacher may take this slot given their current load"""
+        return (not self.is_blocked(teacher_code, day, period)
+                and self.within_limits(teacher_code, day_count, week_count))
@@ -0,0 +1,150 @@
+"""Micro-benchmarks for the in-memory and wire representations of the timetable, and the audit.
+
+Run with ``python benchmarks.py``.
+"""
+import random
+import sys
+import time
+
+from academic_calendar import DEFAULT_CALENDAR
+from models import CourseAssignment
+from timetable import CompactTimetable
+
+def synthetic_rows(count: int, teachers: int = 2000, courses: int = 5000, seed: int = 7):
+    """Generate (teacher, course, period, program, semester, day) rows"""
+    rng = random.Random(seed)
+    teacher_codes = [f"T{i:05d}" for i in range(teachers)]
+    course_codes = [f"C{i:05d}" for i in range(courses)]
+    calendar = DEFAULT_CALENDAR
+    for _ in range(count):
+        yield (rng.choice(teacher_codes), rng.choice(course_codes), rng.choice(calendar.period_numbers),
+               rng.choice(calendar.programs), rng.choice(calendar.semesters), rng.choice(calendar.days))
+
+def bench_timetable_memory(count: int = 1_000_000):
+    """Compare memory of CompactTimetable with dataclasses and a pandas frame"""
+    import pandas as pd
+    
+    rows = list(synthetic_rows(count))
+    start = time.perf_counter()
+    timetable = CompactTimetable()
+    timetable.extend(rows)
+    build_seconds = time.perf_counter() - start
+    report = timetable.memory_report()
+    print(f"CompactTimetable: {report['mb_per_million_assignments']:.1f} MB per million assignments "
+          f"(+{report['interner_bytes'] / 1e6:.1f} MB interners), built in {build_seconds:.2f}s")
+    
+    sample = min(count, 100_000)
+    dataclasses = [CourseAssignment(*row) for row in synthetic_rows(sample)]
+    per_object = (sys.getsizeof(dataclasses[0]) + sys.getsizeof(dataclasses[0].__dict__))
+    print(f"CourseAssignment list: ~{per_object * 1_000_000 / 2**20:.1f} MB per million assignments "
+          "(objects only, excluding shared strings)")
+    
+    frame = pd.DataFrame(list(synthetic_rows(sample)),
+                         columns=['Teacher_Code', 'Course_Code', 'Period', 'Program', 'Semester', 'Day'])
+    frame_bytes = frame.memory_usage(deep=True).sum()
+    print(f"pandas DataFrame: {frame_bytes / sample * 1_000_000 / 2**20:.1f} MB per million assignments")
+
+def synthetic_week(seed: int = 7):
+    """A routine frame with every slot of the default calendar booked"""
+    import pandas as pd
+    
+    rng = random.Random(seed)
+    calendar = DEFAULT_CALENDAR
+    return pd.DataFrame([
+        (day, period, f"C{rng.randrange(8):03d}", f"Course {rng.randrange(8)} of the programme",
+         f"T{rng.randrange(6):03d}", f"Prof. Teacher Number {rng.randrange(6)}")
+        for day in calendar.days for period in calendar.period_numbers
+    ], columns=['Day', 'Period', 'Course_Code', 'Course_Name', 'Teacher_Code', 'Teacher_Name'])
+
+class _FixedRoutineSource:
+    """Serves one routine frame in place of DatabaseManager"""
+    
+    def __init__(self, frame):
+        self.frame = frame
+    
+    def get_routine_for_program_semester(self, program: str, semester: int):
+        return self.frame
+    
+    def get_calendar(self):
+        return DEFAULT_CALENDAR
+
+def bench_routine_formats(repeat: int = 200):
+    """Compare size and build+serialize time of the default and compact routine payloads"""
+    import json
+    from routine_grid import GRID_JSON, MSGPACK, build_routine_grid, encode_routine, msgpack
+    from utils import build_routine_payload
+    
+    source = _FixedRoutineSource(synthetic_week())
+    
+    formats = [('default JSON', lambda: json.dumps(build_routine_payload(source, 'BCA', 1)).encode()),
+               ('grid JSON', lambda: encode_routine(build_routine_grid(source, 'BCA', 1), GRID_JSON))]
+    if msgpack is not None:
+        formats.append(('grid msgpack', lambda: encode_routine(build_routine_grid(source, 'BCA', 1), MSGPACK)))
+    for name, render in formats:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            body = render()
+        elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+        print(f"{name}: {len(body)} bytes, {elapsed_ms:.2f} ms to build and serialize a full week")
+
+def bench_compression(repeat: int = 200):
+    """CPU cost against bytes saved for each encoding, and the cost of reusing a cached variant"""
+    import gzip
+    import hashlib
+    import json
+    from response_cache import brotli
+    from utils import build_routine_payload
+    
+    payload = build_routine_payload(_FixedRoutineSource(synthetic_week()), 'BCA', 1)
+    bodies = {'routine JSON': json.dumps(payload).encode(), 'routine table': payload['html_table'].encode()}
+    
+    encoders = [(f'gzip-{level}', lambda data, level=level: gzip.compress(data, compresslevel=level, mtime=0))
+                for level in (1, 6, 9)]
+    if brotli is not None:
+        encoders += [(f'br-{quality}', lambda data, quality=quality: brotli.compress(data, quality=quality))
+                     for quality in (4, 5, 11)]
+    for body_name, data in bodies.items():
+        print(f"{body_name}: {len(data)} bytes uncompressed")
+        for encoder_name, encode in encoders:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                compressed = encode(data)
+            elapsed_us = (time.perf_counter() - start) / repeat * 1e6
+            saved = 1 - len(compressed) / len(data)
+            print(f"  {encoder_name}: {len(compressed)} bytes ({saved:.0%} saved), {elapsed_us:.0f} us")
+        start = time.perf_counter()
+        for _ in range(repeat):
+            hashlib.sha1(data).digest()
+        print(f"  cached variant lookup: {(time.perf_counter() - start) / repeat * 1e6:.1f} us")
+
+def bench_audit(count: int = 1_000_000):
+    """Whole-timetable audit of count synthetic assignments stored in a temporary SQLite file"""
+    import os
+    import sqlite3
+    import tempfile
+    from audit import run_audit
+    from database import DatabaseManager
+    
+    with tempfile.TemporaryDirectory() as directory:
+        db_name = os.path.join(directory, "audit_bench.db")
+        db = DatabaseManager(db_name)
+        db.upsert_teachers([(f"T{i:05d}", f"Teacher {i}", "Lecturer") for i in range(2000)])
+        db.upsert_courses([(f"C{i:05d}", f"Course {i}", 3) for i in range(5000)])
+        conn = sqlite3.connect(db_name)
+        conn.executemany("""
+            INSERT OR IGNORE INTO Course_Teacher (Teacher_Code, Course_Code, Period, Program, Semester, Day)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, synthetic_rows(count))
+        conn.commit()
+        conn.close()
+        
+        summary = run_audit(db)['summary']
+        print(f"audit of {summary['assignments']} assignments: load {summary['load_ms']:.0f} ms, "
+              f"detection {summary['detect_ms']:.0f} ms, detection + report {summary['elapsed_ms']:.0f} ms, "
+              f"total {summary['total_ms']:.0f} ms")
+
+if __name__ == '__main__':
+    bench_timetable_memory()
+    bench_routine_formats()
+    bench_compression()
+    bench_audit()
@@ -0,0 +1,136 @@
+"""Push of routine invalidations to open pages.
+
+Open routine pages subscribe to one routine key, ('routine', program,
+semester) or ('teacher', teacher_code). Writes made through the attached
+DatabaseManager are announced from its write path as soon as they commit;
+a poller reads the change journal to catch writes made by other processes
+(the Streamlit app, another worker). Each subscriber is only an asyncio
+Event, so thousands of idle connections cost one small object each, and
+bursts of writes collapse into a single wakeup per page.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+import journal
+from journal import RoutineKey
+
+# Seconds between journal polls for writes made by other processes
+JOURNAL_POLL_INTERVAL = 2.0
+
+class Subscription:
+    """One open page waiting for its routine to change"""
+    
+    def __init__(self, key: RoutineKey):
+        self.key = key
+        self.changed = asyncio.Event()
+
+class ChangeBus:
+    """Fans routine invalidations out to the subscribers of one event loop"""
+    
+    def __init__(self, db, poll_interval: float = JOURNAL_POLL_INTERVAL,
+                 run: Optional[Callable[..., Awaitable[Any]]] = None):
+        """run(func) awaits a blocking database call; by default it goes to the loop's default executor"""
+        self.db = db
+        self.poll_interval = poll_interval
+        self._run = run or self._run_in_default_executor
+        self._subscribers: Dict[RoutineKey, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._poller: Optional[asyncio.Task] = None
+        # Journal batches already announced, with their undone flag
+        self._lock = threading.Lock()
+        self._seen: Optional[Dict[int, int]] = None
+        self._last_batch = 0
+        self.published = 0
+        self.notified = 0
+        db.add_change_listener(self._on_change)
+    
+    def subscribe(self, key: RoutineKey) -> Subscription:
+        """Register a page for one routine (call from the event loop)"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        if self._poller is None or self._poller.done():
+            self._poller = self._loop.create_task(self._poll())
+        subscription = Subscription(key)
+        self._subscribers.setdefault(key, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        """Forget a page whose connection closed"""
+        subscribers = self._subscribers.get(subscription.key)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.key]
+    
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+    
+    def close(self):
+        """Stop polling the journal"""
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+    
+    def _on_change(self, routines: Optional[Set[RoutineKey]], batches: Dict[int, int]):
+        """DatabaseManager change listener; runs on the writing thread"""
+        with self._lock:
+            if self._seen is not None:
+                self._seen.update(batches)
+                self._last_batch = max([self._last_batch, *batches])
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._deliver, routines)
+    
+    def _deliver(self, routines: Optional[Set[RoutineKey]]):
+        """Wake every page showing one of the routines (None wakes all of them)"""
+        self.published += 1
+        if routines is None:
+            targets = [subscriber for subscribers in self._subscribers.values() for subscriber in subscribers]
+        else:
+            targets = [subscriber for key in routines for subscriber in self._subscribers.get(key, ())]
+        for subscriber in targets:
+            subscriber.changed.set()
+        self.notified += len(targets)
+    
+    def _read_journal(self):
+        """Routines changed by batches nobody announced yet; False when there are none"""
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            current = journal.journal_state(cursor)
+            with self._lock:
+                seen = None if self._seen is None else dict(self._seen)
+                last_batch = self._last_batch
+            if seen is None:
+                batch_ids = []
+            else:
+                batch_ids = journal.unseen_batches(seen, current, last_batch)
+            if batch_ids is None:
+                routines = None
+            elif batch_ids:
+                routines = journal.affected_routines(cursor, journal.batch_entries(cursor, batch_ids))
+            else:
+                routines = False
+            with self._lock:
+                self._seen = current
+                self._last_batch = max(current, default=last_batch)
+            return routines
+        finally:
+            conn.close()
+    
+    @staticmethod
+    async def _run_in_default_executor(func: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+    
+    async def _poll(self):
+        """Announce writes other processes made to the shared database"""
+        while True:
+            try:
+                routines = await self._run(self._read_journal)
+            except Exception:
+                # A busy or briefly unavailable database is retried on the next tick
+                routines = False
+            if routines is not False:
+                self._deliver(routines)
+            await asyncio.sleep(self.poll_interval)
@@ -1,43 +1,158 @@
-import sqlite3
 import pandas as pd
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Tuple, Iterable, Callable, Set
 import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from storage import StorageBackend, SQLiteSnapshot, default_backend
+from availability import AvailabilityIndex
+from academic_calendar import AcademicCalendar, DEFAULT_CALENDAR
+import journal
+from journal import ChangeRecorder
+from free_slots import rank_free_slots
+from search import create_search_index
+
+# Availability masks edited by another process are picked up within this many seconds
+AVAILABILITY_TTL = 60.0
+# Calendar definitions edited by another process are picked up within this many seconds
+CALENDAR_TTL = 60.0
+
+def _now() -> str:
+    """Local time stamp stored in Created_At and Updated_At columns"""
+    return datetime.now().isoformat(timespec="seconds")
+
+def _outside_programs(table: str) -> str:
+    """WHERE clause matching rows of table whose program/semester the calendar does not offer"""
+    return f"""NOT EXISTS (
+        SELECT 1 FROM Calendar_Program p
+        WHERE p.Program = {table}.Program AND {table}.Semester BETWEEN 1 AND p.Semesters
+    )"""
+
+class StaleDataError(RuntimeError):
+    """The data a write was computed from changed before the write could be stored"""
 
 class DatabaseManager:
-    def __init__(self, db_name="Class_routine.db"):
+    def __init__(self, db_name="Class_routine.db", backend: Optional[StorageBackend] = None,
+                 read_snapshot_staleness: Optional[float] = None):
         self.db_name = db_name
+        self.backend = backend or default_backend(db_name)
         self.init_database()
+        # Reads may be served from a snapshot at most this many seconds behind the primary
+        self.snapshot = None
+        if read_snapshot_staleness is not None and self.backend.dialect == "sqlite":
+            self.snapshot = SQLiteSnapshot(self.backend.db_name, read_snapshot_staleness)
+        self._availability: Optional[AvailabilityIndex] = None
+        self._availability_loaded_at = 0.0
+        self._calendar: Optional[AcademicCalendar] = None
+        self._calendar_loaded_at = 0.0
+        # Called after every committed change; see add_change_listener()
+        self._change_listeners: List[Callable[[Optional[Set[tuple]], Dict[int, int]], None]] = []
+        # Recorder of the write in progress on this thread
+        self._local = threading.local()
     
     def get_connection(self):
         """Get database connection"""
-        return sqlite3.connect(self.db_name)
+        return self.backend.connect()
+    
+    def get_read_connection(self):
+        """Get a connection for read-only queries (snapshot when enabled)"""
+        if self.snapshot is not None:
+            return self.snapshot.connect()
+        return self.get_connection()
+    
+    def _after_write(self):
+        """Bookkeeping after a write has been committed"""
+        if self.snapshot is not None:
+            self.snapshot.mark_stale()
+        recorder = getattr(self._local, 'recorder', None)
+        self._local.recorder = None
+        if recorder is not None and recorder.batch_id is not None:
+            self._announce(recorder.entries, {recorder.batch_id: 0})
+    
+    def _changes(self, conn, description: str) -> ChangeRecorder:
+        """Open a write transaction on conn and start journaling it (on its own cursor, so rowcounts are untouched).
+        
+        The transaction starts before any before-image is read, so no other
+        writer can commit to the watched rows between watch() and the write.
+        """
+        recorder_cursor = conn.cursor()
+        self.backend.begin_write(recorder_cursor)
+        recorder = ChangeRecorder(recorder_cursor, description)
+        # _after_write() announces whatever this write ends up journaling
+        self._local.recorder = recorder
+        return recorder
+    
+    def _discard_write(self, conn):
+        """Roll back a write that will not be committed, along with its journal recorder"""
+        conn.rollback()
+        self._local.recorder = None
+    
+    def add_change_listener(self, listener: Callable[[Optional[Set[tuple]], Dict[int, int]], None]):
+        """Call listener(routines, batches) after every committed change made through this manager.
+        
+        routines holds the ('routine', program, semester) and ('teacher', code)
+        keys whose routine changed (None when every routine may have), batches
+        maps the journal batch ids involved to their new undone flag. The
+        listener runs on the writing thread and must not block.
+        """
+        self._change_listeners.append(listener)
+    
+    def _announce(self, entries: List[journal.Entry], batches: Dict[int, int]):
+        """Tell change listeners which routines a committed change affected"""
+        if not self._change_listeners:
+            return
+        conn = self.get_connection()
+        try:
+            routines = journal.affected_routines(conn.cursor(), entries)
+        finally:
+            conn.close()
+        for listener in list(self._change_listeners):
+            listener(routines, batches)
+    
+    # Bookings of a teacher in one slot, on one day and across the week
+    _TEACHER_LOAD_QUERY = """
+        SELECT COALESCE(SUM(CASE WHEN Period = ? AND Day = ? THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN Day = ? THEN 1 ELSE 0 END), 0),
+               COUNT(*)
+        FROM Course_Teacher
+        WHERE Teacher_Code = ?
+    """
     
     def init_database(self):
         """Initialize the database with required tables"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        ddl = self.backend.translate_ddl
         
         try:
             # Create Course table
-            cursor.execute("""
+            cursor.execute(ddl("""
                 CREATE TABLE IF NOT EXISTS Course (
                     Course_Code TEXT PRIMARY KEY,
                     Course_Name TEXT NOT NULL,
-                    Credit_hrs INTEGER NOT NULL
+                    Credit_hrs INTEGER NOT NULL,
+                    Created_At TEXT,
+                    Updated_At TEXT
                 )
-            """)
+            """))
             
             # Create Teacher table
-            cursor.execute("""
+            cursor.execute(ddl("""
                 CREATE TABLE IF NOT EXISTS Teacher (
                     Teacher_Code TEXT PRIMARY KEY,
                     Teacher_Name TEXT NOT NULL,
-                    Teacher_Designation TEXT NOT NULL
+                    Teacher_Designation TEXT NOT NULL,
+                    Created_At TEXT,
+                    Updated_At TEXT
                 )
-            """)
+            """))
+            
+            # Name and code search; other backends and SQLite without FTS5 search with LIKE instead
+            self.full_text_search = self.backend.dialect == "sqlite" and create_search_index(cursor)
             
             # Create Course_Teacher table with additional fields for program and semester
-            cursor.execute("""
+            cursor.execute(ddl("""
                 CREATE TABLE IF NOT EXISTS Course_Teacher (
                     Teacher_Code TEXT,
                     Course_Code TEXT,
@@ -45,11 +160,173 @@ class DatabaseManager:
                     Program TEXT,
                     Semester INTEGER,
                     Day TEXT,
+                    Created_At TEXT,
+                    Updated_At TEXT,
                     PRIMARY KEY (Teacher_Code, Course_Code, Program, Semester, Day, Period),
                     FOREIGN KEY (Teacher_Code) REFERENCES Teacher(Teacher_Code),
                     FOREIGN KEY (Course_Code) REFERENCES Course(Course_Code)
                 )
-            """)
+            """))
+            # Databases created before rows were timestamped; their rows keep NULL timestamps
+            for table in ("Course", "Teacher", "Course_Teacher"):
+                self.backend.add_column(cursor, table, "Created_At", "TEXT")
+                self.backend.add_column(cursor, table, "Updated_At", "TEXT")
+            # The dashboard's recent assignments read the newest entries of this index
+            self.backend.create_index(cursor, "idx_course_teacher_created", "Course_Teacher", ("Created_At",))
+            # The activity feed pages backwards through these (see activity.py)
+            self.backend.create_index(cursor, "idx_course_updated", "Course", ("Updated_At", "Course_Code"))
+            self.backend.create_index(cursor, "idx_teacher_updated", "Teacher", ("Updated_At", "Teacher_Code"))
+            self.backend.create_index(cursor, "idx_course_teacher_updated", "Course_Teacher", ("Updated_At",))
+            
+            # Class-side lookups (a program/semester's bookings) would otherwise scan the table
+            self.backend.create_index(cursor, "idx_course_teacher_class", "Course_Teacher",
+                                      ("Program", "Semester", "Day", "Period"))
+            
+            # Slots a teacher cannot be booked in
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Teacher_Unavailable (
+                    Teacher_Code TEXT,
+                    Day TEXT,
+                    Period INTEGER,
+                    PRIMARY KEY (Teacher_Code, Day, Period),
+                    FOREIGN KEY (Teacher_Code) REFERENCES Teacher(Teacher_Code)
+                )
+            """))
+            
+            # Per-teacher workload limits; NULL means unlimited
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Teacher_Workload (
+                    Teacher_Code TEXT PRIMARY KEY,
+                    Max_Periods_Per_Day INTEGER,
+                    Max_Periods_Per_Week INTEGER,
+                    FOREIGN KEY (Teacher_Code) REFERENCES Teacher(Teacher_Code)
+                )
+            """))
+            
+            # Create Room table
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Room (
+                    Room_Code TEXT PRIMARY KEY,
+                    Room_Name TEXT NOT NULL,
+                    Capacity INTEGER NOT NULL,
+                    Room_Type TEXT NOT NULL
+                )
+            """))
+            
+            # Students per program/semester, used for capacity-aware room allocation
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Class_Enrollment (
+                    Program TEXT,
+                    Semester INTEGER,
+                    Students INTEGER NOT NULL,
+                    PRIMARY KEY (Program, Semester)
+                )
+            """))
+            
+            # One room per class slot; the UNIQUE index makes room clashes impossible and lookups indexed
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Room_Assignment (
+                    Program TEXT,
+                    Semester INTEGER,
+                    Day TEXT,
+                    Period INTEGER,
+                    Room_Code TEXT NOT NULL,
+                    PRIMARY KEY (Program, Semester, Day, Period),
+                    UNIQUE (Room_Code, Day, Period),
+                    FOREIGN KEY (Room_Code) REFERENCES Room(Room_Code)
+                )
+            """))
+            
+            # Saved timetables per term; Course_Teacher stays the working copy
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Timetable_Version (
+                    Version_Id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    Term_Id TEXT NOT NULL,
+                    Label TEXT NOT NULL,
+                    Status TEXT NOT NULL DEFAULT 'draft',
+                    Parent_Version_Id INTEGER,
+                    Created_At TEXT NOT NULL
+                )
+            """))
+            
+            # Version_Id leads the key so one version's rows are a contiguous index range
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Timetable_Version_Assignment (
+                    Version_Id INTEGER,
+                    Teacher_Code TEXT,
+                    Course_Code TEXT,
+                    Period INTEGER,
+                    Program TEXT,
+                    Semester INTEGER,
+                    Day TEXT,
+                    Created_At TEXT,
+                    Updated_At TEXT,
+                    PRIMARY KEY (Version_Id, Teacher_Code, Course_Code, Program, Semester, Day, Period),
+                    FOREIGN KEY (Version_Id) REFERENCES Timetable_Version(Version_Id)
+                )
+            """))
+            # Versions saved before they carried timestamps restore their rows with fresh ones
+            self.backend.add_column(cursor, "Timetable_Version_Assignment", "Created_At", "TEXT")
+            self.backend.add_column(cursor, "Timetable_Version_Assignment", "Updated_At", "TEXT")
+            
+            # Change journal: one batch per write, one entry per changed row
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Change_Batch (
+                    Batch_Id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    Description TEXT NOT NULL,
+                    Created_At TEXT NOT NULL,
+                    Undone INTEGER NOT NULL DEFAULT 0
+                )
+            """))
+            # Row images are JSON; LONGTEXT keeps them unbounded on MySQL
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Change_Journal (
+                    Batch_Id INTEGER,
+                    Seq INTEGER,
+                    Table_Name TEXT NOT NULL,
+                    Before_Row LONGTEXT,
+                    After_Row LONGTEXT,
+                    PRIMARY KEY (Batch_Id, Seq)
+                )
+            """))
+            
+            # Calendar definitions; Position gives the display order
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Calendar_Program (
+                    Program TEXT PRIMARY KEY,
+                    Position INTEGER NOT NULL,
+                    Semesters INTEGER NOT NULL
+                )
+            """))
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Calendar_Day (
+                    Day TEXT PRIMARY KEY,
+                    Position INTEGER NOT NULL
+                )
+            """))
+            cursor.execute(ddl("""
+                CREATE TABLE IF NOT EXISTS Calendar_Period (
+                    Period INTEGER PRIMARY KEY,
+                    Time_Label TEXT NOT NULL,
+                    Shift TEXT
+                )
+            """))
+            
+            # Seed an empty calendar with the defaults from models.Constants
+            cursor.execute("SELECT COUNT(*) FROM Calendar_Program")
+            if cursor.fetchone()[0] == 0:
+                cursor.executemany("INSERT INTO Calendar_Program (Program, Position, Semesters) VALUES (?, ?, ?)",
+                                   [(program, i, DEFAULT_CALENDAR.program_semesters[program])
+                                    for i, program in enumerate(DEFAULT_CALENDAR.programs)])
+            cursor.execute("SELECT COUNT(*) FROM Calendar_Day")
+            if cursor.fetchone()[0] == 0:
+                cursor.executemany("INSERT INTO Calendar_Day (Day, Position) VALUES (?, ?)",
+                                   [(day, i) for i, day in enumerate(DEFAULT_CALENDAR.days)])
+            cursor.execute("SELECT COUNT(*) FROM Calendar_Period")
+            if cursor.fetchone()[0] == 0:
+                cursor.executemany("INSERT INTO Calendar_Period (Period, Time_Label, Shift) VALUES (?, ?, ?)",
+                                   [(period, label, DEFAULT_CALENDAR.shifts.get(period))
+                                    for period, label in DEFAULT_CALENDAR.periods.items()])
             
             conn.commit()
         except Exception as e:
@@ -64,16 +341,22 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         try:
+            changes = self._changes(conn, f"Add course {course_code}")
+            changes.watch("Course", "Course_Code = ?", (course_code,))
+            now = _now()
             cursor.execute("""
-                INSERT INTO Course (Course_Code, Course_Name, Credit_hrs)
-                VALUES (?, ?, ?)
-            """, (course_code, course_name, credit_hrs))
+                INSERT INTO Course (Course_Code, Course_Name, Credit_hrs, Created_At, Updated_At)
+                VALUES (?, ?, ?, ?, ?)
+            """, (course_code, course_name, credit_hrs, now, now))
+            changes.record()
             conn.commit()
+            self._after_write()
             return True
-        except sqlite3.IntegrityError:
+        except self.backend.IntegrityError:
+            self._discard_write(conn)
             return False
         except Exception as e:
-            conn.rollback()
+            self._discard_write(conn)
             raise e
         finally:
             conn.close()
@@ -84,15 +367,19 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         try:
+            changes = self._changes(conn, f"Update course {course_code}")
+            changes.watch("Course", "Course_Code = ?", (course_code,))
             cursor.execute("""
                 UPDATE Course 
-                SET Course_Name = ?, Credit_hrs = ?
+                SET Course_Name = ?, Credit_hrs = ?, Updated_At = ?
                 WHERE Course_Code = ?
-            """, (course_name, credit_hrs, course_code))
+            """, (course_name, credit_hrs, _now(), course_code))
+            changes.record()
             conn.commit()
+            self._after_write()
             return cursor.rowcount > 0
         except Exception as e:
-            conn.rollback()
+            self._discard_write(conn)
             raise e
         finally:
             conn.close()
@@ -103,14 +390,19 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         try:
+            changes = self._changes(conn, f"Delete course {course_code}")
+            changes.watch("Course_Teacher", "Course_Code = ?", (course_code,))
+            changes.watch("Course", "Course_Code = ?", (course_code,))
             # First delete related course assignments
             cursor.execute("DELETE FROM Course_Teacher WHERE Course_Code = ?", (course_code,))
             # Then delete the course
             cursor.execute("DELETE FROM Course WHERE Course_Code = ?", (course_code,))
+            changes.record()
             conn.commit()
+            self._after_write()
             return cursor.rowcount > 0
         except Exception as e:
-            conn.rollback()
+            self._discard_write(conn)
             raise e
         finally:
             conn.close()
@@ -121,16 +413,22 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         try:
+            changes = self._changes(conn, f"Add teacher {teacher_code}")
+            changes.watch("Teacher", "Teacher_Code = ?", (teacher_code,))
+            now = _now()
             cursor.execute("""
-                INSERT INTO Teacher (Teacher_Code, Teacher_Name, Teacher_Designation)
-                VALUES (?, ?, ?)
-            """, (teacher_code, teacher_name, teacher_designation))
+                INSERT INTO Teacher (Teacher_Code, Teacher_Name, Teacher_Designation, Created_At, Updated_At)
+                VALUES (?, ?, ?, ?, ?)
+            """, (teacher_code, teacher_name, teacher_designation, now, now))
+            changes.record()
             conn.commit()
+            self._after_write()
             return True
-        except sqlite3.IntegrityError:
+        except self.backend.IntegrityError:
+            self._discard_write(conn)
             return False
         except Exception as e:
-            conn.rollback()
+            self._discard_write(conn)
             raise e
         finally:
             conn.close()
@@ -141,15 +439,19 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         try:
+            changes = self._changes(conn, f"Update teacher {teacher_code}")
+            changes.watch("Teacher", "Teacher_Code = ?", (teacher_code,))
             cursor.execute("""
                 UPDATE Teacher 
-                SET Teacher_Name = ?, Teacher_Designation = ?
+                SET Teacher_Name = ?, Teacher_Designation = ?, Updated_At = ?
                 WHERE Teacher_Code = ?
-            """, (teacher_name, teacher_designation, teacher_code))
+            """, (teacher_name, teacher_designation, _now(), teacher_code))
+            changes.record()
             conn.commit()
+            self._after_write()
             return cursor.rowcount > 0
         except Exception as e:
-            conn.rollback()
+            self._discard_write(conn)
             raise e
         finally:
             conn.close()
@@ -160,14 +462,21 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         try:
-            # First delete related course assignments
+            changes = self._changes(conn, f"Delete teacher {teacher_code}")
+            for table in ("Course_Teacher", "Teacher_Unavailable", "Teacher_Workload", "Teacher"):
+                changes.watch(table, "Teacher_Code = ?", (teacher_code,))
+            # First delete related course assignments and availability
             cursor.execute("DELETE FROM Course_Teacher WHERE Teacher_Code = ?", (teacher_code,))
+            cursor.execute("DELETE FROM Teacher_Unavailable WHERE Teacher_Code = ?", (teacher_code,))
+            cursor.execute("DELETE FROM Teacher_Workload WHERE Teacher_Code = ?", (teacher_code,))
             # Then delete the teacher
             cursor.execute("DELETE FROM Teacher WHERE Teacher_Code = ?", (teacher_code,))
+            changes.record()
             conn.commit()
+            self._after_write()
             return cursor.rowcount > 0
         except Exception as e:
-            conn.rollback()
+            self._discard_write(conn)
             raise e
         finally:
             conn.close()
@@ -175,29 +484,41 @@ class DatabaseManager:
     def assign_course_teacher(self, teacher_code: str, course_code: str, period: int, 
                             program: str, semester: int, day: str) -> bool:
         """Assign a teacher to a course for a specific period"""
+        availability = self.get_availability_index()
+        if availability.is_blocked(teacher_code, day, period):
+            return False  # Teacher marked this slot unavailable
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            # Check if teacher is already assigned to another course in the same period and day
-            cursor.execute("""
-                SELECT COUNT(*) FROM Course_Teacher 
-                WHERE Teacher_Code = ? AND Period = ? AND Day = ?
-            """, (teacher_code, period, day))
+            changes = self._changes(conn, f"Assign {course_code} to {teacher_code}")
+            # One aggregate gives the slot conflict plus the daily and weekly load
+            cursor.execute(self._TEACHER_LOAD_QUERY, (period, day, day, teacher_code))
+            slot_count, day_count, week_count = cursor.fetchone()
             
-            if cursor.fetchone()[0] > 0:
+            if slot_count > 0:
+                self._discard_write(conn)
                 return False  # Teacher conflict
+            if not availability.within_limits(teacher_code, day_count, week_count):
+                self._discard_write(conn)
+                return False  # Workload limit reached
             
+            changes.watch_keys("Course_Teacher", [(teacher_code, course_code, program, semester, day, period)])
+            now = _now()
             cursor.execute("""
-                INSERT INTO Course_Teacher (Teacher_Code, Course_Code, Period, Program, Semester, Day)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (teacher_code, course_code, period, program, semester, day))
+                INSERT INTO Course_Teacher (Teacher_Code, Course_Code, Period, Program, Semester, Day, Created_At, Updated_At)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (teacher_code, course_code, period, program, semester, day, now, now))
+            changes.record()
             conn.commit()
+            self._after_write()
             return True
-        except sqlite3.IntegrityError:
+        except self.backend.IntegrityError:
+            self._discard_write(conn)
             return False
         except Exception as e:
-            conn.rollback()
+            self._discard_write(conn)
             raise e
         finally:
             conn.close()
@@ -205,26 +526,256 @@ class DatabaseManager:
     def remove_course_assignment(self, teacher_code: str, course_code: str, 
                                program: str, semester: int, day: str, period: int) -> bool:
         """Remove a course assignment"""
+        return self.delete_assignments(keys=[(teacher_code, course_code, program, semester, day, period)]) > 0
+    
+    # Filter spec names accepted by delete_assignments
+    _ASSIGNMENT_FILTERS = {
+        'program': 'Program',
+        'semester': 'Semester',
+        'day': 'Day',
+        'period': 'Period',
+        'teacher_code': 'Teacher_Code',
+        'course_code': 'Course_Code'
+    }
+    
+    def delete_assignments(self, filters: Optional[Dict[str, object]] = None,
+                           keys: Optional[Iterable[Tuple[str, str, str, int, str, int]]] = None) -> int:
+        """Delete assignments matching a filter spec, or by (teacher, course, program, semester, day, period) keys.
+        
+        Runs in one transaction and returns the exact number of rows deleted. A
+        filter spec maps program, semester, day, period, teacher_code and
+        course_code to values (None is ignored); an empty spec deletes nothing.
+        """
+        if keys is not None:
+            key_rows = [(str(t), str(c), str(p), int(sem), str(d), int(per)) for t, c, p, sem, d, per in keys]
+            if not key_rows:
+                return 0
+            where, params = None, ()
+        else:
+            criteria = {name: value for name, value in (filters or {}).items() if value is not None}
+            unknown = set(criteria) - set(self._ASSIGNMENT_FILTERS)
+            if unknown:
+                raise ValueError(f"Unknown assignment filter(s): {', '.join(sorted(unknown))}")
+            if not criteria:
+                return 0
+            where = " AND ".join(f"{self._ASSIGNMENT_FILTERS[name]} = ?" for name in criteria)
+            params = tuple(int(value) if name in ('semester', 'period') else value
+                           for name, value in criteria.items())
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute("""
-                DELETE FROM Course_Teacher 
-                WHERE Teacher_Code = ? AND Course_Code = ? AND Program = ? 
-                AND Semester = ? AND Day = ? AND Period = ?
-            """, (teacher_code, course_code, program, semester, day, period))
+            if where is None:
+                changes = self._changes(conn, f"Delete {len(key_rows)} assignment(s)")
+                changes.watch_keys("Course_Teacher", key_rows)
+                cursor.executemany("""
+                    DELETE FROM Course_Teacher
+                    WHERE Teacher_Code = ? AND Course_Code = ? AND Program = ?
+                    AND Semester = ? AND Day = ? AND Period = ?
+                """, key_rows)
+            else:
+                changes = self._changes(conn, "Delete assignments where " + ", ".join(
+                    f"{name}={value}" for name, value in zip(criteria, params)))
+                changes.watch("Course_Teacher", where, params)
+                cursor.execute(f"DELETE FROM Course_Teacher WHERE {where}", params)
+            deleted = cursor.rowcount
+            changes.record()
             conn.commit()
-            return cursor.rowcount > 0
+            self._after_write()
+            return deleted
         except Exception as e:
-            conn.rollback()
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def upsert_courses(self, courses: Iterable[Tuple[str, str, int]]) -> int:
+        """Insert or update many courses in one transaction"""
+        rows = [tuple(course) for course in courses]
+        if not rows:
+            return 0
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Import {len(rows)} course(s)")
+            changes.watch_keys("Course", [(row[0],) for row in rows])
+            now = _now()
+            cursor.executemany(
+                self.backend.upsert_sql("Course", ("Course_Code", "Course_Name", "Credit_hrs", "Created_At", "Updated_At"),
+                                        ("Course_Code",), insert_only=("Created_At",)),
+                [(*row, now, now) for row in rows]
+            )
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return len(rows)
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def upsert_teachers(self, teachers: Iterable[Tuple[str, str, str]]) -> int:
+        """Insert or update many teachers in one transaction"""
+        rows = [tuple(teacher) for teacher in teachers]
+        if not rows:
+            return 0
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Import {len(rows)} teacher(s)")
+            changes.watch_keys("Teacher", [(row[0],) for row in rows])
+            now = _now()
+            cursor.executemany(
+                self.backend.upsert_sql("Teacher", ("Teacher_Code", "Teacher_Name", "Teacher_Designation",
+                                                    "Created_At", "Updated_At"),
+                                        ("Teacher_Code",), insert_only=("Created_At",)),
+                [(*row, now, now) for row in rows]
+            )
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return len(rows)
+        except Exception as e:
+            self._discard_write(conn)
             raise e
         finally:
             conn.close()
     
+    def bulk_assign_course_teachers(self, assignments: Iterable[Tuple[str, str, int, str, int, str]]) -> int:
+        """Insert many (teacher, course, period, program, semester, day) assignments in one transaction.
+        
+        Rows that would double-book a teacher, fall in a blocked slot or exceed a
+        workload limit are skipped; returns the number inserted.
+        """
+        availability = self.get_availability_index()
+        unlimited = 2 ** 31 - 1
+        created_at = _now()
+        rows = []
+        for teacher_code, course_code, period, program, semester, day in assignments:
+            if availability.is_blocked(teacher_code, day, period):
+                continue
+            max_per_day, max_per_week = availability.get_limits(teacher_code)
+            rows.append((teacher_code, course_code, period, program, semester, day, created_at, created_at,
+                         teacher_code, period, day,
+                         teacher_code, day, unlimited if max_per_day is None else max_per_day,
+                         teacher_code, unlimited if max_per_week is None else max_per_week))
+        if not rows:
+            return 0
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Import {len(rows)} assignment(s)")
+            changes.watch_keys("Course_Teacher", [(row[0], row[1], row[3], row[4], row[5], row[2]) for row in rows])
+            cursor.executemany(f"""
+                INSERT INTO Course_Teacher (Teacher_Code, Course_Code, Period, Program, Semester, Day, Created_At, Updated_At)
+                SELECT ?, ?, ?, ?, ?, ?, ?, ?{self.backend.dual}
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM Course_Teacher
+                    WHERE Teacher_Code = ? AND Period = ? AND Day = ?
+                )
+                AND (SELECT COUNT(*) FROM Course_Teacher WHERE Teacher_Code = ? AND Day = ?) < ?
+                AND (SELECT COUNT(*) FROM Course_Teacher WHERE Teacher_Code = ?) < ?
+            """, rows)
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return cursor.rowcount
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def replace_course_assignments(self, assignments: Iterable[Tuple[str, str, int, str, int, str]],
+                                   expected_version: Optional[str] = None) -> int:
+        """Replace every assignment with the given (teacher, course, period, program, semester, day) rows.
+        
+        Only the difference is written: surviving rows keep their timestamps and
+        a class moved to another slot keeps its Created_At. Returns the number
+        of assignments in the new timetable. With expected_version, raises
+        StaleDataError and writes nothing if get_data_version() has moved on
+        from it.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, "Replace all assignments")
+            if expected_version is not None and journal.data_version(cursor) != expected_version:
+                raise StaleDataError("Assignments changed since they were read")
+            count = self._sync_assignments(cursor, changes, [(*assignment, None, None) for assignment in assignments])
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return count
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    # Changed rows past which _sync_assignments snapshots the whole table for the journal
+    _KEYED_WATCH_LIMIT = 5000
+    
+    def _sync_assignments(self, cursor, changes: ChangeRecorder, rows: List[tuple]) -> int:
+        """Make Course_Teacher hold exactly rows, touching only the assignments that differ.
+        
+        rows are (teacher, course, period, program, semester, day, created_at,
+        updated_at); None timestamps are filled in, with an added row taking the
+        Created_At of a removed row of the same class and course (a move). Must
+        run inside a write transaction; returns the number of rows.
+        """
+        wanted: Dict[tuple, Tuple[Optional[str], Optional[str]]] = {}
+        for teacher_code, course_code, period, program, semester, day, created_at, updated_at in rows:
+            wanted[(teacher_code, course_code, int(period), program, int(semester), day)] = (created_at, updated_at)
+        cursor.execute(f"SELECT {self._ASSIGNMENT_COLUMNS}, Created_At FROM Course_Teacher")
+        current = {(teacher_code, course_code, int(period), program, int(semester), day): created_at
+                   for teacher_code, course_code, period, program, semester, day, created_at in cursor.fetchall()}
+        removed = [key for key in current if key not in wanted]
+        added = [key for key in wanted if key not in current]
+        if not removed and not added:
+            return len(wanted)
+        
+        # Created_At of removed rows per (teacher, course, program, semester), ordered so pop() gives the oldest
+        moved_from: Dict[tuple, List[Optional[str]]] = defaultdict(list)
+        for key in removed:
+            moved_from[(key[0], key[1], key[3], key[4])].append(current[key])
+        for created in moved_from.values():
+            created.sort(key=lambda at: (at is None, at or ''), reverse=True)
+        now = _now()
+        inserts = []
+        for key in added:
+            created_at, updated_at = wanted[key]
+            if created_at is None:
+                earlier = moved_from.get((key[0], key[1], key[3], key[4]))
+                created_at = (earlier.pop() if earlier else None) or now
+            inserts.append((*key, created_at, updated_at or now))
+        
+        if len(removed) + len(added) > self._KEYED_WATCH_LIMIT:
+            # One scan is cheaper than a keyed lookup per changed row; unchanged rows still compare equal
+            changes.watch("Course_Teacher")
+        else:
+            # Journal keys are (teacher, course, program, semester, day, period)
+            changes.watch_keys("Course_Teacher", [(t, c, prog, sem, day, period)
+                                                  for t, c, period, prog, sem, day in removed + added])
+        cursor.executemany("""
+            DELETE FROM Course_Teacher
+            WHERE Teacher_Code = ? AND Course_Code = ? AND Period = ? AND Program = ? AND Semester = ? AND Day = ?
+        """, removed)
+        cursor.executemany(f"""
+            INSERT INTO Course_Teacher ({self._ASSIGNMENT_COLUMNS}, Created_At, Updated_At)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, inserts)
+        return len(wanted)
+    
     def get_courses(self) -> pd.DataFrame:
         """Get all courses"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         try:
             return pd.read_sql_query("SELECT * FROM Course", conn)
         finally:
@@ -232,7 +783,7 @@ class DatabaseManager:
     
     def get_teachers(self) -> pd.DataFrame:
         """Get all teachers"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         try:
             return pd.read_sql_query("SELECT * FROM Teacher", conn)
         finally:
@@ -240,7 +791,7 @@ class DatabaseManager:
     
     def get_course_assignments(self) -> pd.DataFrame:
         """Get all course assignments with teacher and course details"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         try:
             query = """
                 SELECT ct.*, t.Teacher_Name, c.Course_Name 
@@ -253,9 +804,47 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def get_dashboard_stats(self) -> Dict[str, int]:
+        """Counts of courses, teachers, assignments and programs with routines, from one query"""
+        conn = self.get_read_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT (SELECT COUNT(*) FROM Course),
+                       (SELECT COUNT(*) FROM Teacher),
+                       (SELECT COUNT(*) FROM Course_Teacher),
+                       (SELECT COUNT(DISTINCT Program) FROM Course_Teacher){self.backend.dual}
+            """)
+            courses, teachers, assignments, programs = cursor.fetchone()
+            return {
+                'courses': int(courses),
+                'teachers': int(teachers),
+                'assignments': int(assignments),
+                'programs': int(programs)
+            }
+        finally:
+            conn.close()
+    
+    def get_recent_assignments(self, limit: int = 10) -> pd.DataFrame:
+        """Newest assignments first, read from the Created_At index"""
+        conn = self.get_read_connection()
+        try:
+            query = """
+                SELECT ct.Program, ct.Semester, ct.Day, ct.Period, ct.Course_Code, c.Course_Name,
+                       ct.Teacher_Code, t.Teacher_Name, ct.Created_At
+                FROM Course_Teacher ct
+                JOIN Teacher t ON ct.Teacher_Code = t.Teacher_Code
+                JOIN Course c ON ct.Course_Code = c.Course_Code
+                ORDER BY ct.Created_At DESC
+                LIMIT ?
+            """
+            return pd.read_sql_query(query, conn, params=[limit])
+        finally:
+            conn.close()
+    
     def get_routine_for_program_semester(self, program: str, semester: int) -> pd.DataFrame:
         """Get routine for a specific program and semester"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         try:
             query = """
                 SELECT ct.Day, ct.Period, ct.Course_Code, c.Course_Name, 
@@ -270,25 +859,686 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def get_routines_for_program_semesters(self, program: str, semesters: List[int]) -> pd.DataFrame:
+        """Get the routines of several semesters of a program in one query"""
+        conn = self.get_read_connection()
+        try:
+            query = f"""
+                SELECT ct.Semester, ct.Day, ct.Period, ct.Course_Code, c.Course_Name,
+                       ct.Teacher_Code, t.Teacher_Name
+                FROM Course_Teacher ct
+                JOIN Teacher t ON ct.Teacher_Code = t.Teacher_Code
+                JOIN Course c ON ct.Course_Code = c.Course_Code
+                WHERE ct.Program = ? AND ct.Semester IN ({', '.join('?' for _ in semesters) or 'NULL'})
+                ORDER BY ct.Semester, ct.Day, ct.Period
+            """
+            return pd.read_sql_query(query, conn, params=[program, *[int(semester) for semester in semesters]])
+        finally:
+            conn.close()
+    
     def check_teacher_conflict(self, teacher_code: str, period: int, day: str, 
                              exclude_program: str = "", exclude_semester: int = 0) -> bool:
-        """Check if teacher has conflict in the given period and day"""
-        conn = self.get_connection()
+        """Check if teacher has conflict in the given period and day (including blocked slots and workload limits)"""
+        availability = self.get_availability_index()
+        if availability.is_blocked(teacher_code, day, period):
+            return True
+        
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         
         try:
             if exclude_program and exclude_semester:
-                cursor.execute("""
-                    SELECT COUNT(*) FROM Course_Teacher 
-                    WHERE Teacher_Code = ? AND Period = ? AND Day = ?
+                cursor.execute(self._TEACHER_LOAD_QUERY.rstrip() + """
                     AND NOT (Program = ? AND Semester = ?)
-                """, (teacher_code, period, day, exclude_program, exclude_semester))
+                """, (period, day, day, teacher_code, exclude_program, exclude_semester))
             else:
-                cursor.execute("""
-                    SELECT COUNT(*) FROM Course_Teacher 
-                    WHERE Teacher_Code = ? AND Period = ? AND Day = ?
-                """, (teacher_code, period, day))
+                cursor.execute(self._TEACHER_LOAD_QUERY, (period, day, day, teacher_code))
             
-            return cursor.fetchone()[0] > 0
+            slot_count, day_count, week_count = cursor.fetchone()
+            return slot_count > 0 or not availability.within_limits(teacher_code, day_count, week_count)
+        finally:
+            conn.close()
+    
+    def find_free_slots(self, teacher_code: str, program: str, semester: int,
+                        course_code: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Slots where both the teacher and the program/semester are free, best first"""
+        conn = self.get_read_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Both sides come back in one indexed query; rank_free_slots builds day masks from them
+            cursor.execute("""
+                SELECT Teacher_Code, Course_Code, Program, Semester, Day, Period
+                FROM Course_Teacher
+                WHERE Teacher_Code = ? OR (Program = ? AND Semester = ?)
+            """, (teacher_code, program, semester))
+            bookings = cursor.fetchall()
+        finally:
+            conn.close()
+        return rank_free_slots(self.get_calendar(), self.get_availability_index(), teacher_code,
+                               program, semester, bookings, course_code=course_code, limit=limit)
+    
+    def get_availability_index(self) -> AvailabilityIndex:
+        """Get the cached teacher availability masks, reloading when stale"""
+        if (self._availability is None
+                or time.monotonic() - self._availability_loaded_at > AVAILABILITY_TTL):
+            conn = self.get_read_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT Teacher_Code, Day, Period FROM Teacher_Unavailable")
+                blocked = cursor.fetchall()
+                cursor.execute("""
+                    SELECT Teacher_Code, Max_Periods_Per_Day, Max_Periods_Per_Week FROM Teacher_Workload
+                """)
+                workloads = cursor.fetchall()
+            finally:
+                conn.close()
+            calendar = self.get_calendar()
+            self._availability = AvailabilityIndex(blocked, workloads, calendar.days, calendar.max_period)
+            self._availability_loaded_at = time.monotonic()
+        return self._availability
+    
+    def get_teacher_unavailability(self, teacher_code: str) -> pd.DataFrame:
+        """Get the blocked slots of a teacher"""
+        conn = self.get_read_connection()
+        try:
+            return pd.read_sql_query("""
+                SELECT Day, Period FROM Teacher_Unavailable WHERE Teacher_Code = ? ORDER BY Day, Period
+            """, conn, params=[teacher_code])
+        finally:
+            conn.close()
+    
+    def get_teacher_workloads(self) -> pd.DataFrame:
+        """Get every teacher's workload limits"""
+        conn = self.get_read_connection()
+        try:
+            return pd.read_sql_query("SELECT * FROM Teacher_Workload", conn)
+        finally:
+            conn.close()
+    
+    def get_calendar(self) -> AcademicCalendar:
+        """Get the cached academic calendar, reloading when stale"""
+        if (self._calendar is None
+                or time.monotonic() - self._calendar_loaded_at > CALENDAR_TTL):
+            conn = self.get_read_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT Program, Semesters FROM Calendar_Program ORDER BY Position, Program")
+                programs = cursor.fetchall()
+                cursor.execute("SELECT Day FROM Calendar_Day ORDER BY Position, Day")
+                days = [day for day, in cursor.fetchall()]
+                cursor.execute("SELECT Period, Time_Label, Shift FROM Calendar_Period ORDER BY Period")
+                periods = cursor.fetchall()
+            finally:
+                conn.close()
+            calendar = AcademicCalendar.from_rows(programs, days, periods)
+            # Keep handing out the same object while nothing changed
+            if calendar != self._calendar:
+                self._calendar = calendar
+                self._availability = None
+            self._calendar_loaded_at = time.monotonic()
+        return self._calendar
+    
+    def _replace_calendar_table(self, table: str, columns: Tuple[str, ...], rows: List[tuple],
+                                outside: Dict[str, str]) -> int:
+        """Replace one calendar table and drop the cached calendar.
+        
+        outside maps each table booking calendar slots to a WHERE clause that
+        matches its rows outside the new calendar; those rows are deleted in the
+        same journal batch, so undoing the edit brings them back.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Edit {table}")
+            changes.watch(table)
+            cursor.execute(f"DELETE FROM {table}")
+            if rows:
+                placeholders = ", ".join("?" for _ in columns)
+                cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+            # The clauses read the new calendar rows, so they are watched after the insert
+            for dependent, where in outside.items():
+                changes.watch(dependent, where)
+                cursor.execute(f"DELETE FROM {dependent} WHERE {where}")
+            changes.record()
+            conn.commit()
+            self._calendar = None
+            self._availability = None
+            self._after_write()
+            return len(rows)
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def set_calendar_programs(self, programs: Iterable[Tuple[str, int]]) -> int:
+        """Replace the offered programs with (program, number of semesters) rows in display order.
+        
+        Classes, room bookings and enrollments of programs or semesters no
+        longer offered are deleted with the edit.
+        """
+        rows = [(program, i, int(semesters)) for i, (program, semesters) in enumerate(programs)]
+        return self._replace_calendar_table(
+            "Calendar_Program", ("Program", "Position", "Semesters"), rows,
+            {dependent: _outside_programs(dependent)
+             for dependent in ("Course_Teacher", "Room_Assignment", "Class_Enrollment")})
+    
+    def set_calendar_days(self, days: Iterable[str]) -> int:
+        """Replace the teaching days, in week order; classes, room bookings and blocked slots on removed days are deleted"""
+        rows = [(day, i) for i, day in enumerate(days)]
+        return self._replace_calendar_table(
+            "Calendar_Day", ("Day", "Position"), rows,
+            {dependent: "Day NOT IN (SELECT Day FROM Calendar_Day)"
+             for dependent in ("Course_Teacher", "Room_Assignment", "Teacher_Unavailable")})
+    
+    def set_calendar_periods(self, periods: Iterable[Tuple[int, str, Optional[str]]]) -> int:
+        """Replace the periods with (period, time label, shift) rows; classes, room bookings and blocked slots in removed periods are deleted"""
+        rows = [(int(period), label, shift) for period, label, shift in periods]
+        return self._replace_calendar_table(
+            "Calendar_Period", ("Period", "Time_Label", "Shift"), rows,
+            {dependent: "Period NOT IN (SELECT Period FROM Calendar_Period)"
+             for dependent in ("Course_Teacher", "Room_Assignment", "Teacher_Unavailable")})
+    
+    def set_teacher_unavailable_slots(self, teacher_code: str, slots: Iterable[Tuple[str, int]]) -> int:
+        """Replace the blocked (day, period) slots of a teacher"""
+        rows = [(teacher_code, day, int(period)) for day, period in slots]
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Set availability of {teacher_code}")
+            changes.watch("Teacher_Unavailable", "Teacher_Code = ?", (teacher_code,))
+            cursor.execute("DELETE FROM Teacher_Unavailable WHERE Teacher_Code = ?", (teacher_code,))
+            if rows:
+                cursor.executemany("""
+                    INSERT INTO Teacher_Unavailable (Teacher_Code, Day, Period) VALUES (?, ?, ?)
+                """, rows)
+            changes.record()
+            conn.commit()
+            self._availability = None
+            self._after_write()
+            return len(rows)
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def set_teacher_workload(self, teacher_code: str, max_periods_per_day: Optional[int],
+                             max_periods_per_week: Optional[int]) -> bool:
+        """Set a teacher's maximum periods per day and per week (None for unlimited)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Set workload of {teacher_code}")
+            changes.watch("Teacher_Workload", "Teacher_Code = ?", (teacher_code,))
+            cursor.execute(
+                self.backend.upsert_sql("Teacher_Workload",
+                                        ("Teacher_Code", "Max_Periods_Per_Day", "Max_Periods_Per_Week"),
+                                        ("Teacher_Code",)),
+                (teacher_code, max_periods_per_day, max_periods_per_week)
+            )
+            changes.record()
+            conn.commit()
+            self._availability = None
+            self._after_write()
+            return True
+        except self.backend.IntegrityError:
+            self._discard_write(conn)
+            return False
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def add_room(self, room_code: str, room_name: str, capacity: int, room_type: str) -> bool:
+        """Add a new room"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Add room {room_code}")
+            changes.watch("Room", "Room_Code = ?", (room_code,))
+            cursor.execute("""
+                INSERT INTO Room (Room_Code, Room_Name, Capacity, Room_Type)
+                VALUES (?, ?, ?, ?)
+            """, (room_code, room_name, capacity, room_type))
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return True
+        except self.backend.IntegrityError:
+            self._discard_write(conn)
+            return False
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def update_room(self, room_code: str, room_name: str, capacity: int, room_type: str) -> bool:
+        """Update an existing room"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Update room {room_code}")
+            changes.watch("Room", "Room_Code = ?", (room_code,))
+            cursor.execute("""
+                UPDATE Room
+                SET Room_Name = ?, Capacity = ?, Room_Type = ?
+                WHERE Room_Code = ?
+            """, (room_name, capacity, room_type, room_code))
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return cursor.rowcount > 0
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def delete_room(self, room_code: str) -> bool:
+        """Delete a room"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Delete room {room_code}")
+            changes.watch("Room_Assignment", "Room_Code = ?", (room_code,))
+            changes.watch("Room", "Room_Code = ?", (room_code,))
+            # First release the room's class slots
+            cursor.execute("DELETE FROM Room_Assignment WHERE Room_Code = ?", (room_code,))
+            # Then delete the room
+            cursor.execute("DELETE FROM Room WHERE Room_Code = ?", (room_code,))
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return cursor.rowcount > 0
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def set_class_enrollment(self, program: str, semester: int, students: int) -> bool:
+        """Set the number of students in a program/semester"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Set class size of {program} Sem {semester}")
+            changes.watch_keys("Class_Enrollment", [(program, semester)])
+            cursor.execute(
+                self.backend.upsert_sql("Class_Enrollment", ("Program", "Semester", "Students"),
+                                        ("Program", "Semester")),
+                (program, semester, students)
+            )
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return True
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def assign_room(self, program: str, semester: int, day: str, period: int, room_code: str) -> bool:
+        """Put a class slot in a room; fails if the room is already taken in that slot"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Put {program} Sem {semester} in {room_code}")
+            changes.watch_keys("Room_Assignment", [(program, semester, day, period)])
+            cursor.execute(
+                self.backend.upsert_sql("Room_Assignment", ("Program", "Semester", "Day", "Period", "Room_Code"),
+                                        ("Program", "Semester", "Day", "Period")),
+                (program, semester, day, period, room_code)
+            )
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return True
+        except self.backend.IntegrityError:
+            self._discard_write(conn)
+            return False
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def replace_room_assignments(self, assignments: Iterable[Tuple[str, int, str, int, str]]) -> int:
+        """Replace every room assignment with (program, semester, day, period, room_code) rows"""
+        return self.rebuild_room_assignments(lambda cursor: assignments)
+    
+    def rebuild_room_assignments(self, build: Callable[[Any], Iterable[Tuple[str, int, str, int, str]]]) -> int:
+        """Replace every room assignment with the rows build(cursor) returns, all in one transaction.
+        
+        build reads what it needs through cursor after the write lock is taken,
+        so nothing it read can change before its rows are stored.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, "Allocate rooms")
+            assignments = build(cursor)
+            changes.watch("Room_Assignment")
+            cursor.execute("DELETE FROM Room_Assignment")
+            cursor.executemany("""
+                INSERT INTO Room_Assignment (Program, Semester, Day, Period, Room_Code)
+                VALUES (?, ?, ?, ?, ?)
+            """, assignments)
+            inserted = cursor.rowcount
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return inserted
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def get_rooms(self) -> pd.DataFrame:
+        """Get all rooms"""
+        conn = self.get_read_connection()
+        try:
+            return pd.read_sql_query("SELECT * FROM Room ORDER BY Capacity, Room_Code", conn)
+        finally:
+            conn.close()
+    
+    def get_class_enrollments(self) -> pd.DataFrame:
+        """Get students per program/semester"""
+        conn = self.get_read_connection()
+        try:
+            return pd.read_sql_query("SELECT * FROM Class_Enrollment ORDER BY Program, Semester", conn)
+        finally:
+            conn.close()
+    
+    def check_room_conflict(self, room_code: str, period: int, day: str,
+                            exclude_program: str = "", exclude_semester: int = 0) -> bool:
+        """Check if room is already used in the given period and day"""
+        conn = self.get_read_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Served by the UNIQUE (Room_Code, Day, Period) index
+            cursor.execute("""
+                SELECT Program, Semester FROM Room_Assignment
+                WHERE Room_Code = ? AND Day = ? AND Period = ?
+            """, (room_code, day, period))
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            return not (exclude_program and exclude_semester and row[0] == exclude_program
+                        and int(row[1]) == int(exclude_semester))
+        finally:
+            conn.close()
+    
+    # Assignment columns shared by Course_Teacher and Timetable_Version_Assignment
+    _ASSIGNMENT_COLUMNS = "Teacher_Code, Course_Code, Period, Program, Semester, Day"
+    # The same plus the row timestamps, which versions carry so a checkout can restore them
+    _STAMPED_ASSIGNMENT_COLUMNS = _ASSIGNMENT_COLUMNS + ", Created_At, Updated_At"
+    
+    def _assignment_source(self, version_id: Optional[int], columns: str = _ASSIGNMENT_COLUMNS) -> Tuple[str, tuple]:
+        """SELECT of a version's assignments, or of the working timetable when version_id is None"""
+        if version_id is None:
+            return f"SELECT {columns} FROM Course_Teacher", ()
+        return (f"SELECT {columns} FROM Timetable_Version_Assignment WHERE Version_Id = ?",
+                (int(version_id),))
+    
+    def create_timetable_version(self, term_id: str, label: str, source_version_id: Optional[int] = None) -> int:
+        """Create a draft version from the working timetable or as a clone of another version"""
+        source_sql, source_params = self._assignment_source(source_version_id, self._STAMPED_ASSIGNMENT_COLUMNS)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Create version {label} ({term_id})")
+            cursor.execute("""
+                INSERT INTO Timetable_Version (Term_Id, Label, Status, Parent_Version_Id, Created_At)
+                VALUES (?, ?, 'draft', ?, ?)
+            """, (term_id, label, source_version_id, datetime.now().isoformat(timespec="seconds")))
+            version_id = cursor.lastrowid
+            changes.watch_inserted("Timetable_Version", "Version_Id = ?", (version_id,))
+            changes.watch_inserted("Timetable_Version_Assignment", "Version_Id = ?", (version_id,))
+            # One set-based copy; no rows pass through Python
+            cursor.execute(f"""
+                INSERT INTO Timetable_Version_Assignment (Version_Id, {self._STAMPED_ASSIGNMENT_COLUMNS})
+                SELECT ?, {self._STAMPED_ASSIGNMENT_COLUMNS} FROM ({source_sql}) src
+            """, (version_id,) + source_params)
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return version_id
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def save_timetable_version(self, version_id: int) -> bool:
+        """Overwrite a draft version with the working timetable"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Save working timetable to version {version_id}")
+            changes.watch("Timetable_Version_Assignment", "Version_Id = ?", (version_id,))
+            cursor.execute("SELECT Status FROM Timetable_Version WHERE Version_Id = ?", (version_id,))
+            row = cursor.fetchone()
+            if row is None or row[0] != 'draft':
+                self._discard_write(conn)
+                return False
+            cursor.execute("DELETE FROM Timetable_Version_Assignment WHERE Version_Id = ?", (version_id,))
+            cursor.execute(f"""
+                INSERT INTO Timetable_Version_Assignment (Version_Id, {self._STAMPED_ASSIGNMENT_COLUMNS})
+                SELECT ?, {self._STAMPED_ASSIGNMENT_COLUMNS} FROM Course_Teacher
+            """, (version_id,))
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return True
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def publish_timetable_version(self, version_id: int) -> bool:
+        """Publish a version; any other published version of the same term goes back to draft"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Publish version {version_id}")
+            changes.watch("Timetable_Version", "Term_Id = (SELECT Term_Id FROM Timetable_Version WHERE Version_Id = ?)", (version_id,))
+            cursor.execute("SELECT Term_Id FROM Timetable_Version WHERE Version_Id = ?", (version_id,))
+            row = cursor.fetchone()
+            if row is None:
+                self._discard_write(conn)
+                return False
+            cursor.execute("""
+                UPDATE Timetable_Version SET Status = 'draft'
+                WHERE Term_Id = ? AND Status = 'published' AND Version_Id <> ?
+            """, (row[0], version_id))
+            cursor.execute("UPDATE Timetable_Version SET Status = 'published' WHERE Version_Id = ?", (version_id,))
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return True
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def checkout_timetable_version(self, version_id: int) -> int:
+        """Replace the working timetable with a version's assignments.
+        
+        Assignments already in the working timetable are left as they are; the
+        rest come back with the timestamps stored in the version.
+        """
+        source_sql, source_params = self._assignment_source(version_id, self._STAMPED_ASSIGNMENT_COLUMNS)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Load version {version_id}")
+            cursor.execute(source_sql, source_params)
+            inserted = self._sync_assignments(cursor, changes, cursor.fetchall())
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return inserted
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def delete_timetable_version(self, version_id: int) -> bool:
+        """Delete a draft version"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            changes = self._changes(conn, f"Delete version {version_id}")
+            changes.watch("Timetable_Version", "Version_Id = ?", (version_id,))
+            changes.watch("Timetable_Version_Assignment", "Version_Id = ?", (version_id,))
+            cursor.execute("DELETE FROM Timetable_Version WHERE Version_Id = ? AND Status = 'draft'", (version_id,))
+            if cursor.rowcount == 0:
+                self._discard_write(conn)
+                return False
+            cursor.execute("DELETE FROM Timetable_Version_Assignment WHERE Version_Id = ?", (version_id,))
+            changes.record()
+            conn.commit()
+            self._after_write()
+            return True
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def get_timetable_versions(self) -> pd.DataFrame:
+        """Get all versions with their assignment counts, newest first"""
+        conn = self.get_read_connection()
+        try:
+            versions = pd.read_sql_query("""
+                SELECT v.Version_Id, v.Term_Id, v.Label, v.Status, v.Parent_Version_Id, v.Created_At,
+                       COUNT(a.Version_Id) AS Assignments
+                FROM Timetable_Version v
+                LEFT JOIN Timetable_Version_Assignment a ON a.Version_Id = v.Version_Id
+                GROUP BY v.Version_Id, v.Term_Id, v.Label, v.Status, v.Parent_Version_Id, v.Created_At
+                ORDER BY v.Version_Id DESC
+            """, conn)
+            # NULL parents would otherwise turn the ids into floats
+            versions['Parent_Version_Id'] = versions['Parent_Version_Id'].astype('Int64')
+            return versions
+        finally:
+            conn.close()
+    
+    def diff_timetable_versions(self, from_version_id: Optional[int],
+                                to_version_id: Optional[int]) -> Dict[str, pd.DataFrame]:
+        """Assignments added and removed going from one version to another (None is the working timetable)"""
+        from_sql, from_params = self._assignment_source(from_version_id)
+        to_sql, to_params = self._assignment_source(to_version_id)
+        conn = self.get_read_connection()
+        try:
+            added = pd.read_sql_query(f"{to_sql} EXCEPT {from_sql} ORDER BY Program, Semester, Day, Period",
+                                      conn, params=list(to_params + from_params))
+            removed = pd.read_sql_query(f"{from_sql} EXCEPT {to_sql} ORDER BY Program, Semester, Day, Period",
+                                        conn, params=list(from_params + to_params))
+            return {'added': added, 'removed': removed}
+        finally:
+            conn.close()
+    
+    def _apply_journal(self, undo: bool, batches: int) -> int:
+        """Undo the newest live batches or redo the oldest undone ones, all in one transaction"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            self.backend.begin_write(cursor)
+            if undo:
+                cursor.execute("SELECT Batch_Id FROM Change_Batch WHERE Undone = 0 ORDER BY Batch_Id DESC LIMIT ?",
+                               (batches,))
+            else:
+                cursor.execute("SELECT Batch_Id FROM Change_Batch WHERE Undone = 1 ORDER BY Batch_Id LIMIT ?",
+                               (batches,))
+            batch_ids = [batch_id for batch_id, in cursor.fetchall()]
+            if not batch_ids:
+                self._discard_write(conn)
+                return 0
+            entries = journal.apply_batches(cursor, batch_ids, undo)
+            conn.commit()
+            # Any cached structure may have been rolled back
+            self._calendar = None
+            self._availability = None
+            self._after_write()
+            self._announce(entries, {batch_id: int(undo) for batch_id in batch_ids})
+            return len(batch_ids)
+        except self.backend.IntegrityError:
+            self._discard_write(conn)
+            return 0
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
+        finally:
+            conn.close()
+    
+    def undo_changes(self, batches: int = 1) -> int:
+        """Undo the last batches of changes; returns how many were undone"""
+        return self._apply_journal(True, batches)
+    
+    def redo_changes(self, batches: int = 1) -> int:
+        """Redo the most recently undone batches; returns how many were redone"""
+        return self._apply_journal(False, batches)
+    
+    def get_change_history(self, limit: int = 20) -> pd.DataFrame:
+        """Get the newest journal batches with their changed row counts"""
+        conn = self.get_read_connection()
+        try:
+            return pd.read_sql_query("""
+                SELECT b.Batch_Id, b.Description, b.Created_At, b.Undone, COUNT(j.Seq) AS Rows_Changed
+                FROM Change_Batch b
+                LEFT JOIN Change_Journal j ON j.Batch_Id = b.Batch_Id
+                GROUP BY b.Batch_Id, b.Description, b.Created_At, b.Undone
+                ORDER BY b.Batch_Id DESC
+                LIMIT ?
+            """, conn, params=[limit])
+        finally:
+            conn.close()
+    
+    def get_data_version(self) -> str:
+        """Cheap token that changes whenever journaled data changes (see journal.data_version)"""
+        conn = self.get_read_connection()
+        try:
+            return journal.data_version(conn.cursor())
+        finally:
+            conn.close()
+    
+    def compact_journal(self, keep_batches: int = journal.JOURNAL_KEEP_BATCHES) -> int:
+        """Drop all but the newest keep_batches batches; returns the number removed"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            removed = journal.compact(cursor, keep_batches)
+            conn.commit()
+            return removed
+        except Exception as e:
+            self._discard_write(conn)
+            raise e
         finally:
             conn.close()
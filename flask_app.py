@@ -1,30 +1,77 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
 from database import DatabaseManager
-from models import Constants
 from utils import (
     validate_course_data, 
     validate_teacher_data, 
+    validate_assignment_slot,
+    parse_semester_list,
     get_time_slot_info,
-    format_routine_for_display,
-    get_teacher_weekly_routine,
-    format_teacher_routine_for_display
+    build_routine_payload,
+    build_teacher_routine_payload,
+    build_room_routine_payload
 )
+from singleflight import SingleFlight
+from audit import run_audit
+from rooms import run_room_allocation
+from ics import IcsFeeds
+from response_cache import ResponseCompressor, VersionedCache
+from analytics import WorkloadAnalytics
+from activity import activity_page
+from search import SEARCH_LIMIT, TYPEAHEAD_LIMIT, search_entities, parse_kinds, typeahead
+from routine_grid import (
+    GRID_JSON,
+    build_routine_grid,
+    build_routine_grids,
+    build_teacher_routine_grid,
+    negotiate_routine_format,
+    encode_routine
+)
+import json
+import os
 import pandas as pd
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-in-production'
 
-# Initialize database
-db = DatabaseManager()
+# Initialize database; routine reads are served from a snapshot at most 5 seconds old
+db = DatabaseManager(read_snapshot_staleness=5.0)
+
+# Concurrent identical routine reads share one payload build
+routine_flights = SingleFlight()
+
+# Encoded routine bodies are reused until the data version changes
+routine_bodies = VersionedCache()
+
+# Aggregate workload figures, recomputed when the data version changes
+workload_analytics = WorkloadAnalytics(db)
+
+# Responses are gzip/brotli-compressed for clients that accept it
+compressor = ResponseCompressor()
+
+# Calendar feeds are rendered together and kept until the data version changes
+ics_feeds = IcsFeeds()
+
+# Base URL of the ASGI app (uvicorn asgi_app:app) that pushes routine changes to open pages;
+# leave unset to turn live updates off
+EVENTS_BASE_URL = os.environ.get('ROUTINE_EVENTS_URL', '').rstrip('/')
+
+def _events_url(path: str) -> str:
+    return f'{EVENTS_BASE_URL}{path}' if EVENTS_BASE_URL else ''
+
+@app.after_request
+def compress_response(response):
+    """Compress large text responses for clients that accept gzip or brotli"""
+    return compressor.process(request.headers.get('Accept-Encoding'), response)
 
 @app.route('/')
 def index():
     """Main dashboard"""
+    calendar = db.get_calendar()
     return render_template('index.html', 
-                         programs=Constants.PROGRAMS,
-                         semesters=Constants.SEMESTERS,
-                         days=Constants.DAYS,
-                         periods=Constants.PERIODS)
+                         programs=calendar.programs,
+                         semesters=calendar.semesters,
+                         days=calendar.days,
+                         periods=calendar.periods)
 
 @app.route('/courses')
 def courses():
@@ -80,21 +127,30 @@ def add_teacher():
     
     return redirect(url_for('teachers'))
 
+@app.route('/teacher_availability/<teacher_code>')
+def teacher_availability(teacher_code):
+    """Get a teacher's blocked slots and workload limits"""
+    blocked = db.get_teacher_unavailability(teacher_code)
+    max_per_day, max_per_week = db.get_availability_index().get_limits(teacher_code)
+    return jsonify({
+        'teacher_code': teacher_code,
+        'unavailable': [{'day': day, 'period': int(period)} for day, period in zip(blocked['Day'], blocked['Period'])],
+        'max_periods_per_day': max_per_day,
+        'max_periods_per_week': max_per_week
+    })
+
 @app.route('/assignments')
 def assignments():
-    """Course assignments page"""
-    courses = db.get_courses()
-    teachers = db.get_teachers()
+    """Course assignments page; teachers and courses are picked through /typeahead"""
     assignments_data = db.get_course_assignments()
+    calendar = db.get_calendar()
     
     return render_template('assignments.html',
-                         courses=courses.to_dict('records'),
-                         teachers=teachers.to_dict('records'),
                          assignments=assignments_data.to_dict('records'),
-                         programs=Constants.PROGRAMS,
-                         semesters=Constants.SEMESTERS,
-                         days=Constants.DAYS,
-                         periods=Constants.PERIODS)
+                         programs=calendar.programs,
+                         semesters=calendar.semesters,
+                         days=calendar.days,
+                         periods=calendar.periods)
 
 @app.route('/add_assignment', methods=['POST'])
 def add_assignment():
@@ -114,15 +170,35 @@ def add_assignment():
         semester = int(semester_str)
         period = int(period_str)
         
-        if db.assign_course_teacher(teacher_code, course_code, period, program, semester, day):
+        errors = validate_assignment_slot(db.get_calendar(), program, semester, day, period)
+        if errors:
+            for error in errors:
+                flash(error, 'error')
+        elif db.assign_course_teacher(teacher_code, course_code, period, program, semester, day):
             flash('Assignment added successfully!', 'success')
         else:
             flash('Failed to add assignment. There might be a conflict or invalid data.', 'error')
+            suggestions = db.find_free_slots(teacher_code, program, semester, course_code=course_code, limit=3)
+            if suggestions:
+                slots = ', '.join(f"{slot['day']} period {slot['period']}" for slot in suggestions)
+                flash(f'Free slots for this teacher and class: {slots}.', 'info')
     except (ValueError, TypeError):
         flash('Invalid semester or period value.', 'error')
     
     return redirect(url_for('assignments'))
 
+@app.route('/free_slots')
+def free_slots():
+    """Slots where a teacher and a program/semester are both free, best first"""
+    teacher_code = request.args.get('teacher_code', '').strip()
+    program = request.args.get('program', '').strip()
+    semester = request.args.get('semester', type=int)
+    if not teacher_code or not program or semester is None:
+        return jsonify({'error': 'teacher_code, program and semester are required'}), 400
+    course_code = request.args.get('course_code', '').strip() or None
+    limit = request.args.get('limit', type=int)
+    return jsonify({'slots': db.find_free_slots(teacher_code, program, semester, course_code=course_code, limit=limit)})
+
 @app.route('/delete_assignment', methods=['POST'])
 def delete_assignment():
     """Delete course assignment"""
@@ -150,123 +226,208 @@ def delete_assignment():
     
     return redirect(url_for('assignments'))
 
+@app.route('/delete_assignments', methods=['POST'])
+def delete_assignments():
+    """Delete the ticked assignments, or every assignment matching the filter fields"""
+    selected = request.form.getlist('selected')
+    try:
+        if selected:
+            keys = [json.loads(key) for key in selected]
+            deleted = db.delete_assignments(keys=keys)
+        else:
+            filters = {name: request.form.get(name, '').strip() or None
+                       for name in ('program', 'semester', 'day', 'teacher_code', 'course_code')}
+            if not any(filters.values()):
+                flash('Choose at least one filter or tick assignments to delete.', 'error')
+                return redirect(url_for('assignments'))
+            deleted = db.delete_assignments(filters=filters)
+        flash(f'Deleted {deleted} assignment(s).', 'success')
+    except (ValueError, TypeError):
+        flash('Invalid semester or period value.', 'error')
+    
+    return redirect(url_for('assignments'))
+
 @app.route('/routines')
 def routines():
     """Class routines page"""
+    calendar = db.get_calendar()
     return render_template('routines.html',
-                         programs=Constants.PROGRAMS,
-                         semesters=Constants.SEMESTERS)
+                         programs=calendar.programs,
+                         semesters=calendar.semesters,
+                         events_url=_events_url('/events/routine/{program}/{semester}'))
+
+def _routine_response(key, build_payload, build_grid, *args):
+    """Serve a routine as the default JSON or, when the client asks for it, the compact grid"""
+    media_type = negotiate_routine_format(request.headers.get('Accept'), request.args.get('format'))
+    if media_type is None:
+        media_type = app.json.mimetype
+        encode = lambda: app.json.response(build_payload(db, *args)).get_data()
+    else:
+        key = key + (media_type,)
+        encode = lambda: encode_routine(build_grid(db, *args), media_type)
+    body = routine_bodies.get(db, key, lambda: routine_flights.do(key, encode))
+    response = app.response_class(body, mimetype=media_type)
+    response.vary.add('Accept')
+    return response
 
 @app.route('/get_routine/<program>/<int:semester>')
 def get_routine(program, semester):
     """Get routine data for program and semester"""
-    routine_data = db.get_routine_for_program_semester(program, semester)
-    
-    if routine_data.empty:
-        return jsonify({'error': f'No routine found for {program} Semester {semester}'})
-    
-    formatted_routine = format_routine_for_display(routine_data)
-    
-    # Convert to HTML table
-    html_table = create_html_table(formatted_routine)
-    
-    # Get detailed schedule
-    detailed_schedule = []
-    for day in Constants.DAYS:
-        day_schedule = routine_data[routine_data['Day'] == day]
-        if not day_schedule.empty:
-            day_classes = []
-            for _, class_info in day_schedule.iterrows():
-                period_time = Constants.PERIODS.get(int(class_info['Period']), "Unknown")
-                day_classes.append({
-                    'period': int(class_info['Period']),
-                    'time': period_time,
-                    'course_name': class_info['Course_Name'],
-                    'teacher_name': class_info['Teacher_Name']
-                })
-            detailed_schedule.append({
-                'day': day,
-                'classes': day_classes
-            })
-    
-    return jsonify({
-        'html_table': html_table,
-        'detailed_schedule': detailed_schedule
-    })
+    return _routine_response(('routine', program, semester), build_routine_payload, build_routine_grid,
+                             program, semester)
 
 @app.route('/teacher_routines')
 def teacher_routines():
     """Teacher routines page"""
     teachers = db.get_teachers()
     return render_template('teacher_routines.html',
-                         teachers=teachers.to_dict('records'))
+                         teachers=teachers.to_dict('records'),
+                         events_url=_events_url('/events/teacher/{teacher}'))
+
+@app.route('/get_routines')
+def get_routines():
+    """Get the routines of several semesters of a program (?program=BCA&semesters=1-8) as grids"""
+    program = request.args.get('program', '').strip()
+    errors, semesters = parse_semester_list(db.get_calendar(), program, request.args.get('semesters', ''))
+    if errors:
+        return jsonify({'errors': errors}), 400
+    
+    # Always the grid form; msgpack when the client asks for it
+    media_type = negotiate_routine_format(request.headers.get('Accept'), request.args.get('format')) or GRID_JSON
+    key = ('routines', program, tuple(semesters), media_type)
+    encode = lambda: encode_routine(build_routine_grids(db, program, semesters), media_type)
+    body = routine_bodies.get(db, key, lambda: routine_flights.do(key, encode))
+    response = app.response_class(body, mimetype=media_type)
+    response.vary.add('Accept')
+    return response
 
 @app.route('/get_teacher_routine/<teacher_code>')
 def get_teacher_routine(teacher_code):
     """Get routine for specific teacher"""
-    teachers = db.get_teachers()
-    teacher_info = teachers[teachers['Teacher_Code'] == teacher_code]
-    teacher_name = teacher_info['Teacher_Name'].iloc[0] if not teacher_info.empty else 'Unknown'
-    
-    teacher_routine = get_teacher_weekly_routine(db, teacher_code)
-    
-    if teacher_routine.empty:
-        return jsonify({'error': f'No schedule found for {teacher_name}'})
-    
-    formatted_routine = format_teacher_routine_for_display(teacher_routine)
-    html_table = create_html_table(formatted_routine)
-    
-    # Get detailed schedule
-    detailed_schedule = []
-    for day in Constants.DAYS:
-        day_schedule = teacher_routine[teacher_routine['Day'] == day]
-        if not day_schedule.empty:
-            day_classes = []
-            for _, class_info in day_schedule.iterrows():
-                period_time = Constants.PERIODS.get(int(class_info['Period']), "Unknown")
-                day_classes.append({
-                    'period': int(class_info['Period']),
-                    'time': period_time,
-                    'course_name': class_info['Course_Name'],
-                    'program': class_info['Program'],
-                    'semester': int(class_info['Semester'])
-                })
-            detailed_schedule.append({
-                'day': day,
-                'classes': day_classes
-            })
-    
-    return jsonify({
-        'teacher_name': teacher_name,
-        'html_table': html_table,
-        'detailed_schedule': detailed_schedule
-    })
+    return _routine_response(('teacher_routine', teacher_code), build_teacher_routine_payload,
+                             build_teacher_routine_grid, teacher_code)
 
-def create_html_table(df):
-    """Create HTML table from dataframe"""
-    html = "<table class='table table-bordered table-striped'>"
-    
-    # Header
-    html += "<thead class='table-dark'><tr>"
-    for col in df.columns:
-        html += f"<th class='text-center'>{col}</th>"
-    html += "</tr></thead>"
-    
-    # Body
-    html += "<tbody>"
-    for _, row in df.iterrows():
-        html += "<tr>"
-        for col in df.columns:
-            cell_value = str(row[col]) if row[col] else ""
-            cell_value = cell_value.replace('\n', '<br>')
-            if col == 'Day':
-                html += f"<td class='text-center fw-bold table-secondary'>{cell_value}</td>"
-            else:
-                html += f"<td class='text-center'>{cell_value}</td>"
-        html += "</tr>"
-    html += "</tbody></table>"
-    
-    return html
+@app.route('/get_room_routine/<room_code>')
+def get_room_routine(room_code):
+    """Get routine for specific room"""
+    return jsonify(build_room_routine_payload(db, room_code))
+
+def _ics_response(key):
+    """Serve a pre-rendered feed, answering 304 when the client's ETag still matches"""
+    feed = ics_feeds.get(db, key)
+    if feed is None:
+        return jsonify({'error': 'No such calendar feed'}), 404
+    body, etag = feed
+    response = app.response_class(body, mimetype='text/calendar')
+    # Weak: re-renders of the same classes share an ETag but differ in DTSTAMP
+    response.set_etag(etag, weak=True)
+    # Clients may keep the feed but must revalidate it on every poll
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/ics/teacher/<teacher_code>')
+def teacher_ics(teacher_code):
+    """iCalendar feed of a teacher's weekly routine"""
+    return _ics_response(('teacher', teacher_code))
+
+@app.route('/ics/routine/<program>/<int:semester>')
+def routine_ics(program, semester):
+    """iCalendar feed of a program/semester routine"""
+    return _ics_response(('routine', program, semester))
+
+@app.route('/allocate_rooms', methods=['POST'])
+def allocate_rooms():
+    """Allocate rooms for every scheduled class slot"""
+    return jsonify(run_room_allocation(db))
+
+@app.route('/versions')
+def versions():
+    """List saved timetable versions"""
+    versions_data = db.get_timetable_versions()
+    # Parent_Version_Id is NULL for versions taken from the working timetable
+    versions_data = versions_data.astype(object).where(versions_data.notna(), None)
+    return jsonify({'versions': versions_data.to_dict('records')})
+
+@app.route('/versions/diff')
+def versions_diff():
+    """Diff two versions; omit 'from' or 'to' to compare with the working timetable"""
+    from_version = request.args.get('from', type=int)
+    to_version = request.args.get('to', type=int)
+    diff = db.diff_timetable_versions(from_version, to_version)
+    return jsonify({name: frame.to_dict('records') for name, frame in diff.items()})
+
+@app.route('/undo', methods=['POST'])
+def undo():
+    """Undo the last change"""
+    if db.undo_changes():
+        flash('Last change undone.', 'success')
+    else:
+        flash('Nothing to undo.', 'error')
+    return redirect(request.referrer or url_for('index'))
+
+@app.route('/redo', methods=['POST'])
+def redo():
+    """Redo the last undone change"""
+    if db.redo_changes():
+        flash('Change redone.', 'success')
+    else:
+        flash('Nothing to redo.', 'error')
+    return redirect(request.referrer or url_for('index'))
+
+@app.route('/history')
+def history():
+    """List recent journaled changes"""
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({'changes': db.get_change_history(limit).to_dict('records')})
+
+@app.route('/analytics')
+def analytics():
+    """Teacher workload, idle gaps, slot utilization and credit-hour coverage"""
+    return jsonify(workload_analytics.get())
+
+@app.route('/activity')
+def activity():
+    """Recently created or updated courses, teachers and assignments, one keyset page at a time"""
+    limit = request.args.get('limit', 20, type=int)
+    try:
+        return jsonify(activity_page(db, limit, request.args.get('cursor') or None))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/search')
+def search():
+    """Courses and teachers whose codes, names or designations start with the words of q"""
+    limit = request.args.get('limit', SEARCH_LIMIT, type=int)
+    try:
+        hits = search_entities(db, request.args.get('q', ''), parse_kinds(request.args.get('kind')), limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'results': hits})
+
+@app.route('/typeahead/<kind>')
+def typeahead_options(kind):
+    """Best matching teachers or courses for a typeahead box"""
+    limit = request.args.get('limit', TYPEAHEAD_LIMIT, type=int)
+    try:
+        return jsonify({'options': typeahead(db, kind, request.args.get('q', ''), limit)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/audit')
+def audit():
+    """Audit the whole timetable for conflicts, orphans and credit-hour mismatches"""
+    return jsonify(run_audit(db))
+
+@app.route('/metrics/singleflight')
+def singleflight_metrics():
+    """Report how many routine reads joined an in-flight computation"""
+    return jsonify(routine_flights.stats.snapshot())
+
+@app.route('/metrics/compression')
+def compression_metrics():
+    """Report bytes saved by response compression and how often cached bodies were reused"""
+    return jsonify({**compressor.snapshot(), 'routine_cache_hits': routine_bodies.hits,
+                    'routine_cache_misses': routine_bodies.misses})
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
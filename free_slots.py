@@ -0,0 +1,82 @@
+"""Free-slot suggestions for a new assignment.
+
+A slot is free when the teacher is not teaching in it, has not blocked it
+and is under their daily and weekly limits, and the program/semester has no
+class there. Each day's bookings are a bitmask of periods, so the teacher's
+and the class's rows (one indexed query) are enough to test every slot.
+Candidates are ranked by the penalty the optimizer's soft constraints would
+add for a class there; lower is better.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from academic_calendar import AcademicCalendar
+from availability import AvailabilityIndex
+# The optimizer's own gap count, so ranking and optimizing score gaps alike
+from optimizer import SoftConstraintWeights, _gaps
+
+def rank_free_slots(calendar: AcademicCalendar, availability: AvailabilityIndex, teacher_code: str,
+                    program: str, semester: int, bookings: Iterable[Sequence],
+                    course_code: Optional[str] = None, weights: Optional[SoftConstraintWeights] = None,
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Rank every slot where both the teacher and the class are free.
+    
+    bookings holds (teacher, course, program, semester, day, period) rows and
+    must include all of the teacher's and the class's assignments; other rows
+    are ignored. With course_code, days already holding that course for the
+    class are penalised.
+    """
+    weights = weights or SoftConstraintWeights()
+    n_days = len(calendar.days)
+    teacher_day = [0] * n_days
+    class_day = [0] * n_days
+    course_day = [0] * n_days
+    week_load = 0
+    for row_teacher, row_course, row_program, row_semester, day, period in bookings:
+        d = calendar.day_index.get(day)
+        is_teacher = row_teacher == teacher_code
+        week_load += is_teacher
+        if d is None:
+            continue
+        bit = 1 << int(period)
+        if is_teacher:
+            teacher_day[d] |= bit
+        if row_program == program and int(row_semester) == semester:
+            class_day[d] |= bit
+            if row_course == course_code:
+                course_day[d] += 1
+    
+    max_per_day, max_per_week = availability.get_limits(teacher_code)
+    if max_per_week is not None and week_load >= max_per_week:
+        return []
+    
+    period_mask = sum(1 << period for period in calendar.period_numbers)
+    blocked = availability.blocked_mask(teacher_code)
+    day_bits = (1 << availability.stride) - 1
+    early = set(weights.early_periods)
+    slots = []
+    for d, day in enumerate(calendar.days):
+        if max_per_day is not None and bin(teacher_day[d]).count("1") >= max_per_day:
+            continue
+        offset = availability.day_index.get(day)
+        blocked_day = blocked >> (offset * availability.stride) & day_bits if offset is not None else 0
+        free = period_mask & ~(teacher_day[d] | class_day[d] | blocked_day)
+        gaps_before = _gaps(teacher_day[d])
+        while free:
+            bit = free & -free
+            free ^= bit
+            period = bit.bit_length() - 1
+            breakdown = {
+                'teacher_gap': (_gaps(teacher_day[d] | bit) - gaps_before) * weights.teacher_gap,
+                'same_course_same_day': course_day[d] * weights.same_course_same_day,
+                'early_period': weights.early_period if period in early else 0.0
+            }
+            slots.append({
+                'day': day,
+                'period': period,
+                'time': calendar.period_time(period),
+                'score': sum(breakdown.values()),
+                'breakdown': breakdown
+            })
+    
+    slots.sort(key=lambda slot: (slot['score'], calendar.day_index[slot['day']], slot['period']))
+    return slots if limit is None else slots[:limit]
@@ -0,0 +1,178 @@
+"""iCalendar (RFC 5545) feeds of weekly routines.
+
+Every class becomes a weekly recurring event timed from the calendar's period
+labels. Calendar clients poll these feeds constantly, so IcsFeeds renders
+every teacher and program/semester feed in one pass over Course_Teacher and
+keeps them until DatabaseManager.get_data_version() changes; a poll is then
+one version query, a dictionary lookup and usually a 304.
+
+Events start in the first week of the term (ROUTINE_TERM_START, an ISO date,
+defaulting to January 1 of the current year) and the ETag covers everything
+but DTSTAMP, so a feed keeps its ETag across re-renders, restarts and workers
+for as long as its classes stay the same.
+"""
+import hashlib
+import os
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from academic_calendar import AcademicCalendar
+
+# RRULE day codes by weekday name (calendar days with other names get no events)
+_BYDAY = {
+    'Monday': 'MO', 'Tuesday': 'TU', 'Wednesday': 'WE', 'Thursday': 'TH',
+    'Friday': 'FR', 'Saturday': 'SA', 'Sunday': 'SU'
+}
+_WEEKDAY = {day: i for i, day in enumerate(
+    ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])}
+
+FeedKey = Tuple
+Feed = Tuple[str, str]  # (body, etag)
+
+def parse_period_times(label: str) -> Optional[Tuple[time, time]]:
+    """Start and end time of a '6:30 AM - 7:20 AM' label, or None if it is not one"""
+    parts = [part.strip() for part in label.split('-')]
+    if len(parts) != 2:
+        return None
+    try:
+        start, end = (datetime.strptime(part, '%I:%M %p').time() for part in parts)
+    except ValueError:
+        return None
+    return start, end
+
+def _escape(text) -> str:
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+def _fold(line: str) -> str:
+    """Fold a content line to 75 octets as RFC 5545 requires"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line
+    chunks = []
+    while data:
+        limit = 75 if not chunks else 74
+        cut = min(limit, len(data))
+        # Never split a multi-byte character
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        chunks.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    return '\r\n '.join(chunks)
+
+def default_term_start() -> date:
+    """First day of the term from ROUTINE_TERM_START, or January 1 of the current year"""
+    setting = os.environ.get('ROUTINE_TERM_START')
+    return date.fromisoformat(setting) if setting else date(date.today().year, 1, 1)
+
+def _first_date(day: str, term_start: date) -> date:
+    """First date on or after term_start falling on day"""
+    return term_start + timedelta(days=(_WEEKDAY[day] - term_start.weekday()) % 7)
+
+def feed_etag(body: str) -> str:
+    """ETag of a rendered feed, leaving out the DTSTAMP lines that only record when it was rendered"""
+    content = '\r\n'.join(line for line in body.split('\r\n') if not line.startswith('DTSTAMP:'))
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:20]
+
+def render_feed(name: str, uid_prefix: str, classes: Iterable[Tuple[str, int, str, str, str]],
+                calendar: AcademicCalendar, term_start: date, stamp: datetime) -> str:
+    """Render one VCALENDAR from (day, period, course code, summary, description) rows.
+    
+    Times are floating (no time zone), so clients show them in local time.
+    Periods whose label is not a time range are left out.
+    """
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Class Routine Management System//Routine Feed//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}'
+    ]
+    dtstamp = stamp.strftime('%Y%m%dT%H%M%SZ')
+    for day, period, course_code, summary, description in classes:
+        times = parse_period_times(calendar.period_time(period))
+        if day not in _BYDAY or times is None:
+            continue
+        first = _first_date(day, term_start)
+        start, end = (datetime.combine(first, t) for t in times)
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:{uid_prefix}-{day}-{period}-{course_code}@class-routine'.replace(' ', '_'),
+            f'DTSTAMP:{dtstamp}',
+            f'DTSTART:{start:%Y%m%dT%H%M%S}',
+            f'DTEND:{end:%Y%m%dT%H%M%S}',
+            f'RRULE:FREQ=WEEKLY;BYDAY={_BYDAY[day]}',
+            f'SUMMARY:{_escape(summary)}',
+            f'DESCRIPTION:{_escape(description)}',
+            'END:VEVENT'
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+def render_all_feeds(db, term_start: Optional[date] = None) -> Dict[FeedKey, str]:
+    """Render the feed of every teacher and every calendar program/semester in one pass"""
+    term_start = term_start or default_term_start()
+    calendar = db.get_calendar()
+    conn = db.get_read_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT Teacher_Code, Teacher_Name FROM Teacher")
+        teacher_names = dict(cursor.fetchall())
+        cursor.execute("""
+            SELECT ct.Teacher_Code, ct.Course_Code, c.Course_Name, ct.Program, ct.Semester, ct.Day, ct.Period
+            FROM Course_Teacher ct
+            JOIN Course c ON ct.Course_Code = c.Course_Code
+            ORDER BY ct.Day, ct.Period, ct.Course_Code
+        """)
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+    
+    by_teacher: Dict[str, List[tuple]] = defaultdict(list)
+    by_class: Dict[Tuple[str, int], List[tuple]] = defaultdict(list)
+    for teacher_code, course_code, course_name, program, semester, day, period in rows:
+        semester, period = int(semester), int(period)
+        teacher_name = teacher_names.get(teacher_code, teacher_code)
+        by_teacher[teacher_code].append(
+            (day, period, course_code, f'{course_name} ({program} Sem {semester})',
+             f'{course_code} - {program} Semester {semester}, Period {period}'))
+        by_class[(program, semester)].append(
+            (day, period, course_code, course_name, f'{course_code} - {teacher_name}, Period {period}'))
+    
+    stamp = datetime.now(timezone.utc)
+    feeds: Dict[FeedKey, str] = {}
+    for teacher_code, teacher_name in teacher_names.items():
+        feeds[('teacher', teacher_code)] = render_feed(
+            f'{teacher_name} - Weekly Routine', f'teacher-{teacher_code}',
+            by_teacher.get(teacher_code, []), calendar, term_start, stamp)
+    for program in calendar.programs:
+        for semester in calendar.semesters_for(program):
+            feeds[('routine', program, semester)] = render_feed(
+                f'{program} Semester {semester} - Class Routine', f'routine-{program}-{semester}',
+                by_class.get((program, semester), []), calendar, term_start, stamp)
+    return feeds
+
+class IcsFeeds:
+    """Pre-rendered feeds with ETags, regenerated when the data version moves"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._feeds: Dict[FeedKey, Feed] = {}
+        self.generations = 0
+    
+    def get(self, db, key: FeedKey) -> Optional[Feed]:
+        """(body, etag) of a feed, or None if no such teacher or program/semester exists"""
+        version = db.get_data_version()
+        if version != self._version:
+            with self._lock:
+                # Another request may have regenerated while we waited
+                if version != self._version:
+                    self._feeds = {feed_key: (body, feed_etag(body))
+                                   for feed_key, body in render_all_feeds(db).items()}
+                    self._version = version
+                    self.generations += 1
+        return self._feeds.get(key)
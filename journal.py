@@ -0,0 +1,246 @@
+"""Append-only change journal behind undo/redo.
+
+Every DatabaseManager write opens a ChangeRecorder on its cursor, names the
+rows it is about to touch with watch()/watch_keys(), and calls record()
+before committing. record() re-reads those rows, keeps only the ones that
+changed and appends their before/after images to Change_Journal as one
+batch, all inside the write's own transaction.
+
+Undo deletes a batch's after-images and re-inserts its before-images;
+redo does the opposite. Both run in a single transaction.
+
+Readers that cache derived output (the static export, the change bus) keep
+the undone flag of every batch they have seen and ask unseen_batches() and
+affected_routines() which routines to refresh.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Primary key of every journaled table, parents before children so inverse
+# operations can insert in this order and delete in reverse
+JOURNALED_TABLES: Dict[str, Tuple[str, ...]] = {
+    'Course': ('Course_Code',),
+    'Teacher': ('Teacher_Code',),
+    'Room': ('Room_Code',),
+    'Timetable_Version': ('Version_Id',),
+    'Calendar_Program': ('Program',),
+    'Calendar_Day': ('Day',),
+    'Calendar_Period': ('Period',),
+    'Course_Teacher': ('Teacher_Code', 'Course_Code', 'Program', 'Semester', 'Day', 'Period'),
+    'Teacher_Unavailable': ('Teacher_Code', 'Day', 'Period'),
+    'Teacher_Workload': ('Teacher_Code',),
+    'Class_Enrollment': ('Program', 'Semester'),
+    'Room_Assignment': ('Program', 'Semester', 'Day', 'Period'),
+    'Timetable_Version_Assignment': ('Version_Id', 'Teacher_Code', 'Course_Code', 'Program', 'Semester', 'Day', 'Period'),
+}
+
+# Batches kept after compaction, and how often (in batches) compaction runs
+JOURNAL_KEEP_BATCHES = 200
+JOURNAL_COMPACT_INTERVAL = 50
+
+# Keys per statement when watching explicit keys (stays under SQLite's 999 parameters)
+_KEY_CHUNK = 100
+
+# Tables every routine depends on; a change to any of them affects all routines
+CALENDAR_TABLES = ('Calendar_Program', 'Calendar_Day', 'Calendar_Period')
+
+Row = Dict[str, Any]
+# (table, row before, row after) as stored in Change_Journal
+Entry = Tuple[str, Optional[Row], Optional[Row]]
+# ('routine', program, semester) or ('teacher', teacher_code)
+RoutineKey = Tuple
+
+def _key(table: str, row: Row) -> tuple:
+    return tuple(row[column] for column in JOURNALED_TABLES[table])
+
+def _select_rows(cursor, table: str, where: str, params: Sequence[Any]) -> Dict[tuple, Row]:
+    """Rows of table matching where, keyed by primary key"""
+    cursor.execute(f"SELECT * FROM {table}" + (f" WHERE {where}" if where else ""), tuple(params))
+    columns = [d[0] for d in cursor.description]
+    rows = (dict(zip(columns, values)) for values in cursor.fetchall())
+    return {_key(table, row): row for row in rows}
+
+class ChangeRecorder:
+    """Collects before/after row images of one write for the journal"""
+    
+    def __init__(self, cursor, description: str):
+        self.cursor = cursor
+        self.description = description
+        # (table, where, params, rows before the write)
+        self._scopes: List[Tuple[str, str, tuple, Dict[tuple, Row]]] = []
+        # Filled in by record()
+        self.batch_id: Optional[int] = None
+        self.entries: List[Entry] = []
+    
+    def watch(self, table: str, where: str = "", params: Sequence[Any] = ()):
+        """Snapshot the rows matching where (the whole table if empty) before writing to them"""
+        self._scopes.append((table, where, tuple(params), _select_rows(self.cursor, table, where, params)))
+    
+    def watch_keys(self, table: str, keys: Iterable[Sequence[Any]]):
+        """Snapshot the rows with the given primary keys (in JOURNALED_TABLES order)"""
+        columns = JOURNALED_TABLES[table]
+        match = "(" + " AND ".join(f"{column} = ?" for column in columns) + ")"
+        keys = list(dict.fromkeys(tuple(key) for key in keys))
+        for start in range(0, len(keys), _KEY_CHUNK):
+            chunk = keys[start:start + _KEY_CHUNK]
+            self.watch(table, " OR ".join([match] * len(chunk)), [value for key in chunk for value in key])
+    
+    def watch_inserted(self, table: str, where: str, params: Sequence[Any] = ()):
+        """Register rows the write has just created (they did not exist before)"""
+        self._scopes.append((table, where, tuple(params), {}))
+    
+    def record(self) -> Optional[int]:
+        """Append the changed rows as one batch; returns the batch id, or None if nothing changed"""
+        cursor = self.cursor
+        entries = []
+        for table, where, params, before in self._scopes:
+            after = _select_rows(cursor, table, where, params)
+            for key in before.keys() | after.keys():
+                old, new = before.get(key), after.get(key)
+                if old != new:
+                    entries.append((table, old, new))
+        if not entries:
+            return None
+        self.entries = entries
+        
+        # A new change invalidates everything that was undone before it
+        cursor.execute("DELETE FROM Change_Journal WHERE Batch_Id IN (SELECT Batch_Id FROM Change_Batch WHERE Undone = 1)")
+        cursor.execute("DELETE FROM Change_Batch WHERE Undone = 1")
+        
+        cursor.execute("INSERT INTO Change_Batch (Description, Created_At, Undone) VALUES (?, ?, 0)",
+                       (self.description, datetime.now().isoformat(timespec="seconds")))
+        batch_id = cursor.lastrowid
+        cursor.executemany("""
+            INSERT INTO Change_Journal (Batch_Id, Seq, Table_Name, Before_Row, After_Row) VALUES (?, ?, ?, ?, ?)
+        """, [(batch_id, seq, table,
+               None if old is None else json.dumps(old),
+               None if new is None else json.dumps(new))
+              for seq, (table, old, new) in enumerate(entries)])
+        
+        if batch_id % JOURNAL_COMPACT_INTERVAL == 0:
+            compact(cursor, JOURNAL_KEEP_BATCHES)
+        self.batch_id = batch_id
+        return batch_id
+
+def compact(cursor, keep_batches: int) -> int:
+    """Drop all but the newest keep_batches batches; returns the number of batches removed"""
+    cursor.execute("SELECT MAX(Batch_Id) FROM Change_Batch")
+    newest = cursor.fetchone()[0]
+    if newest is None:
+        return 0
+    cutoff = newest - keep_batches
+    cursor.execute("DELETE FROM Change_Journal WHERE Batch_Id <= ?", (cutoff,))
+    cursor.execute("DELETE FROM Change_Batch WHERE Batch_Id <= ?", (cutoff,))
+    return cursor.rowcount
+
+def batch_entries(cursor, batch_ids: Sequence[int]) -> List[Entry]:
+    """Decoded entries of the given batches, each batch in recording order"""
+    entries: List[Entry] = []
+    for batch_id in batch_ids:
+        cursor.execute("""
+            SELECT Table_Name, Before_Row, After_Row FROM Change_Journal WHERE Batch_Id = ? ORDER BY Seq
+        """, (batch_id,))
+        entries += [(table,
+                     None if before is None else json.loads(before),
+                     None if after is None else json.loads(after))
+                    for table, before, after in cursor.fetchall()]
+    return entries
+
+def apply_batches(cursor, batch_ids: Sequence[int], undo: bool) -> List[Entry]:
+    """Roll batches back (undo) or forward (redo) in the given order; returns the entries applied"""
+    order = list(JOURNALED_TABLES)
+    applied: List[Entry] = []
+    for batch_id in batch_ids:
+        entries = batch_entries(cursor, [batch_id])
+        applied += entries
+        removals: Dict[str, List[Row]] = {}
+        inserts: Dict[str, List[Row]] = {}
+        for table, before, after in entries:
+            remove, insert = (after, before) if undo else (before, after)
+            if remove is not None:
+                removals.setdefault(table, []).append(remove)
+            if insert is not None:
+                inserts.setdefault(table, []).append(insert)
+        
+        # Clear every replaced row first so swapped unique values cannot collide
+        for table in reversed(order):
+            if table in removals:
+                columns = JOURNALED_TABLES[table]
+                cursor.executemany(
+                    f"DELETE FROM {table} WHERE " + " AND ".join(f"{column} = ?" for column in columns),
+                    [_key(table, row) for row in removals[table]]
+                )
+        for table in order:
+            if table in inserts:
+                columns = list(inserts[table][0])
+                cursor.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                    [tuple(row[column] for column in columns) for row in inserts[table]]
+                )
+        cursor.execute("UPDATE Change_Batch SET Undone = ? WHERE Batch_Id = ?", (1 if undo else 0, batch_id))
+    return applied
+
+def journal_state(cursor) -> Dict[int, int]:
+    """Undone flag of every batch still in the journal"""
+    cursor.execute("SELECT Batch_Id, Undone FROM Change_Batch")
+    return {int(batch_id): int(undone) for batch_id, undone in cursor.fetchall()}
+
+def data_version(cursor) -> str:
+    """Token for the current data state: the newest batch id and the number of undone batches.
+    
+    Undo always takes the newest batches and redo the oldest undone ones, so
+    these two numbers identify the state; undoing and redoing back returns
+    the same token.
+    """
+    cursor.execute("SELECT MAX(Batch_Id), COALESCE(SUM(Undone), 0) FROM Change_Batch")
+    newest, undone = cursor.fetchone()
+    return f"{newest or 0}.{int(undone)}"
+
+def unseen_batches(seen: Dict[int, int], current: Dict[int, int], last_seen_batch: int) -> Optional[List[int]]:
+    """Batches added, undone or redone since seen was taken, or None if history was lost.
+    
+    History is lost when a batch that was live in seen has been undone and
+    discarded, or when batches newer than last_seen_batch were compacted away.
+    """
+    oldest = min(current, default=None)
+    if oldest is not None:
+        if oldest > last_seen_batch + 1:
+            return None
+        if any(batch_id >= oldest and batch_id not in current and not undone
+               for batch_id, undone in seen.items()):
+            return None
+    return sorted(batch_id for batch_id, undone in current.items() if seen.get(batch_id) != undone)
+
+def affected_routines(cursor, entries: Iterable[Entry]) -> Optional[Set[RoutineKey]]:
+    """Program/semester and teacher routines showing any changed row, or None if all of them do"""
+    keys: Set[RoutineKey] = set()
+    teachers: Set[str] = set()
+    courses: Set[str] = set()
+    for table, before, after in entries:
+        if table in CALENDAR_TABLES:
+            return None
+        for row in (before, after):
+            if row is None:
+                continue
+            if table == 'Course_Teacher':
+                keys.add(('routine', row['Program'], int(row['Semester'])))
+                keys.add(('teacher', row['Teacher_Code']))
+            elif table == 'Teacher':
+                teachers.add(row['Teacher_Code'])
+            elif table == 'Course':
+                courses.add(row['Course_Code'])
+    
+    # Teacher and course names appear on every routine that schedules them
+    keys |= {('teacher', teacher_code) for teacher_code in teachers}
+    for column, values in (('Teacher_Code', sorted(teachers)), ('Course_Code', sorted(courses))):
+        for start in range(0, len(values), _KEY_CHUNK):
+            chunk = values[start:start + _KEY_CHUNK]
+            cursor.execute(f"""
+                SELECT DISTINCT Program, Semester, Teacher_Code FROM Course_Teacher
+                WHERE {column} IN ({', '.join('?' for _ in chunk)})
+            """, chunk)
+            for program, semester, teacher_code in cursor.fetchall():
+                keys.add(('routine', program, int(semester)))
+                keys.add(('teacher', teacher_code))
+    return keys
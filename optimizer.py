@@ -0,0 +1,279 @@
+"""Soft-constraint optimizer for an existing timetable.
+
+Hard constraints (no teacher or class double-booking) are never broken by a
+move; the annealer only relocates assignments into slots where both the
+teacher and the program/semester are free.
+
+Run with ``python optimizer.py [--budget SECONDS] [--save] [database]``.
+"""
+import argparse
+import math
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from availability import AvailabilityIndex
+from timetable import CompactTimetable
+
+@dataclass
+class SoftConstraintWeights:
+    teacher_gap: float = 1.0             # per idle period between a teacher's first and last class of a day
+    same_course_same_day: float = 3.0    # per extra meeting of a course on one day for a class
+    early_period: float = 0.5            # per class held in an early period
+    early_periods: Tuple[int, ...] = (1,)
+
+@dataclass
+class OptimizationResult:
+    initial_score: float
+    final_score: float
+    iterations: int
+    accepted_moves: int
+    elapsed_seconds: float
+    saved: bool = False
+    initial_breakdown: Dict[str, float] = field(default_factory=dict)
+    final_breakdown: Dict[str, float] = field(default_factory=dict)
+
+def _gaps(mask: int) -> int:
+    """Idle periods between the first and last occupied bit of a day mask"""
+    if mask == 0:
+        return 0
+    low = (mask & -mask).bit_length()
+    high = mask.bit_length()
+    return high - low + 1 - bin(mask).count("1")
+
+class _ScheduleState:
+    """Occupancy indexes that make every move's score delta O(1)"""
+    
+    def __init__(self, timetable: CompactTimetable, weights: SoftConstraintWeights,
+                 availability: Optional[AvailabilityIndex] = None):
+        self.tt = timetable
+        self.w = weights
+        self.n_days = len(timetable.days)
+        _, n_semesters, _, self.n_periods = timetable.shape()
+        self.early = set(weights.early_periods)
+        
+        self.klass = [p * n_semesters + s for p, s in zip(timetable.program, timetable.semester)]
+        
+        # Per-slot occupancy counts (counts, not flags, so pre-existing conflicts are tolerated)
+        self.teacher_slot: Dict[int, int] = defaultdict(int)
+        self.class_slot: Dict[int, int] = defaultdict(int)
+        # Per teacher/day bitmask of occupied periods and per class/course/day meeting counts
+        self.teacher_day: Dict[int, int] = defaultdict(int)
+        self.course_day: Dict[Tuple[int, int, int], int] = defaultdict(int)
+        
+        for i in range(len(timetable)):
+            self._place(i, timetable.day[i], timetable.period[i])
+        
+        # Teacher availability masks re-keyed by timetable ids, consulted on every move
+        self.blocked: Optional[List[int]] = None
+        if availability is not None:
+            self.avail_stride = availability.stride
+            self.blocked = [availability.blocked_mask(code) for code in timetable.teachers.values]
+            self.max_per_day = [availability.get_limits(code)[0] for code in timetable.teachers.values]
+            self.day_offset = [availability.day_index.get(day) for day in timetable.days.values]
+    
+    def _teacher_key(self, i: int, day: int, period: int) -> int:
+        return (self.tt.teacher[i] * self.n_days + day) * self.n_periods + period
+    
+    def _class_key(self, i: int, day: int, period: int) -> int:
+        return (self.klass[i] * self.n_days + day) * self.n_periods + period
+    
+    def _place(self, i: int, day: int, period: int):
+        self.teacher_slot[self._teacher_key(i, day, period)] += 1
+        self.class_slot[self._class_key(i, day, period)] += 1
+        self.teacher_day[self.tt.teacher[i] * self.n_days + day] |= 1 << period
+        self.course_day[(self.klass[i], self.tt.course[i], day)] += 1
+    
+    def _unplace(self, i: int, day: int, period: int):
+        key = self._teacher_key(i, day, period)
+        self.teacher_slot[key] -= 1
+        if self.teacher_slot[key] == 0:
+            self.teacher_day[self.tt.teacher[i] * self.n_days + day] &= ~(1 << period)
+        self.class_slot[self._class_key(i, day, period)] -= 1
+        self.course_day[(self.klass[i], self.tt.course[i], day)] -= 1
+    
+    def breakdown(self) -> Dict[str, float]:
+        """Full score by constraint (used once at the start and end)"""
+        gaps = sum(_gaps(mask) for mask in self.teacher_day.values())
+        repeats = sum(n - 1 for n in self.course_day.values() if n > 1)
+        early = sum(1 for p in self.tt.period if p in self.early)
+        return {
+            'teacher_gap': gaps * self.w.teacher_gap,
+            'same_course_same_day': repeats * self.w.same_course_same_day,
+            'early_period': early * self.w.early_period
+        }
+    
+    def is_free(self, i: int, day: int, period: int) -> bool:
+        """Whether assignment i could move to day/period without a hard conflict"""
+        if (self.teacher_slot.get(self._teacher_key(i, day, period), 0) != 0
+                or self.class_slot.get(self._class_key(i, day, period), 0) != 0):
+            return False
+        if self.blocked is not None:
+            teacher = self.tt.teacher[i]
+            offset = self.day_offset[day]
+            if offset is not None and self.blocked[teacher] >> (offset * self.avail_stride + period) & 1:
+                return False
+            limit = self.max_per_day[teacher]
+            if (limit is not None and day != self.tt.day[i]
+                    and bin(self.teacher_day[teacher * self.n_days + day]).count("1") >= limit):
+                return False
+        return True
+    
+    def delta(self, i: int, day: int, period: int) -> float:
+        """Score change of moving assignment i to day/period"""
+        tt, w = self.tt, self.w
+        old_day, old_period = tt.day[i], tt.period[i]
+        teacher_base = tt.teacher[i] * self.n_days
+        
+        # Teacher gaps only change on the two affected teacher-days
+        old_mask = self.teacher_day[teacher_base + old_day]
+        shared = self.teacher_slot[self._teacher_key(i, old_day, old_period)] > 1
+        removed = old_mask if shared else old_mask & ~(1 << old_period)
+        if day == old_day:
+            gap_delta = _gaps(removed | (1 << period)) - _gaps(old_mask)
+        else:
+            new_mask = self.teacher_day[teacher_base + day]
+            gap_delta = (_gaps(removed) - _gaps(old_mask)
+                         + _gaps(new_mask | (1 << period)) - _gaps(new_mask))
+        
+        repeat_delta = 0
+        if day != old_day:
+            course_key = (self.klass[i], tt.course[i])
+            if self.course_day[course_key + (old_day,)] > 1:
+                repeat_delta -= 1
+            if self.course_day.get(course_key + (day,), 0) >= 1:
+                repeat_delta += 1
+        
+        early_delta = (period in self.early) - (old_period in self.early)
+        return (gap_delta * w.teacher_gap + repeat_delta * w.same_course_same_day
+                + early_delta * w.early_period)
+    
+    def move(self, i: int, day: int, period: int):
+        """Relocate assignment i and update the indexes"""
+        self._unplace(i, self.tt.day[i], self.tt.period[i])
+        self.tt.day[i] = day
+        self.tt.period[i] = period
+        self._place(i, day, period)
+
+def score_timetable(timetable: CompactTimetable,
+                    weights: Optional[SoftConstraintWeights] = None) -> Dict[str, float]:
+    """Weighted soft-constraint penalties of a timetable (lower is better)"""
+    breakdown = _ScheduleState(timetable, weights or SoftConstraintWeights()).breakdown()
+    breakdown['total'] = sum(breakdown.values())
+    return breakdown
+
+def _undone(timetable: CompactTimetable, moves: List[Tuple[int, int, int]]):
+    """Day and period columns of timetable with the (i, old day, old period) moves rolled back"""
+    days, periods = timetable.day[:], timetable.period[:]
+    for i, day, period in reversed(moves):
+        days[i] = day
+        periods[i] = period
+    return days, periods
+
+def optimize_timetable(timetable: CompactTimetable, weights: Optional[SoftConstraintWeights] = None,
+                       time_budget: float = 5.0, seed: Optional[int] = None,
+                       initial_temperature: float = 2.0, final_temperature: float = 0.01,
+                       availability: Optional[AvailabilityIndex] = None) -> OptimizationResult:
+    """Improve a timetable in place with simulated annealing within time_budget seconds"""
+    weights = weights or SoftConstraintWeights()
+    rng = random.Random(seed)
+    state = _ScheduleState(timetable, weights, availability)
+    initial_breakdown = state.breakdown()
+    score = best_score = initial_score = sum(initial_breakdown.values())
+    # The best layout is the current one with since_best undone; copying it on every
+    # improvement would cost O(n) per move, so it is only materialized (into
+    # best_days/best_periods) once since_best outgrows the timetable
+    since_best: List[Tuple[int, int, int]] = []
+    best_days = best_periods = None
+    
+    slots: List[Tuple[int, int]] = [(timetable.days.get(day), period)
+                                    for day, period in timetable.calendar.slots()]
+    start = time.perf_counter()
+    deadline = start + time_budget
+    iterations = accepted = 0
+    temperature = initial_temperature
+    
+    if len(timetable) and time_budget > 0:
+        while True:
+            # Check the clock in batches; time.perf_counter is not free
+            if iterations % 256 == 0:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                progress = (now - start) / time_budget
+                temperature = initial_temperature * (final_temperature / initial_temperature) ** progress
+            iterations += 1
+            
+            i = rng.randrange(len(timetable))
+            day, period = slots[rng.randrange(len(slots))]
+            if (day == timetable.day[i] and period == timetable.period[i]) or not state.is_free(i, day, period):
+                continue
+            delta = state.delta(i, day, period)
+            if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                if best_days is None:
+                    since_best.append((i, timetable.day[i], timetable.period[i]))
+                state.move(i, day, period)
+                score += delta
+                accepted += 1
+                if score < best_score - 1e-9:
+                    best_score = score
+                    since_best.clear()
+                    best_days = best_periods = None
+                elif len(since_best) > len(timetable):
+                    best_days, best_periods = _undone(timetable, since_best)
+                    since_best.clear()
+    
+    if best_days is None:
+        for i, day, period in reversed(since_best):
+            timetable.day[i] = day
+            timetable.period[i] = period
+    else:
+        timetable.day[:] = best_days
+        timetable.period[:] = best_periods
+    final_breakdown = _ScheduleState(timetable, weights).breakdown()
+    return OptimizationResult(
+        initial_score=initial_score,
+        final_score=sum(final_breakdown.values()),
+        iterations=iterations,
+        accepted_moves=accepted,
+        elapsed_seconds=time.perf_counter() - start,
+        initial_breakdown=initial_breakdown,
+        final_breakdown=final_breakdown
+    )
+
+def run_optimizer(db, time_budget: float = 5.0, weights: Optional[SoftConstraintWeights] = None,
+                  save: bool = False, seed: Optional[int] = None) -> OptimizationResult:
+    """Optimize the stored Course_Teacher timetable, optionally writing back the moved assignments.
+    
+    The save is refused with database.StaleDataError if anything was written
+    while the optimizer ran, so concurrent edits are never overwritten.
+    """
+    timetable = CompactTimetable.load(db)
+    result = optimize_timetable(timetable, weights, time_budget=time_budget, seed=seed,
+                                availability=db.get_availability_index())
+    if save and result.final_score < result.initial_score:
+        timetable.save(db)
+        result.saved = True
+    return result
+
+if __name__ == '__main__':
+    from database import DatabaseManager, StaleDataError
+    
+    parser = argparse.ArgumentParser(description="Improve timetable quality against soft constraints")
+    parser.add_argument("database", nargs="?", default="Class_routine.db")
+    parser.add_argument("--budget", type=float, default=5.0, help="time budget in seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--save", action="store_true", help="write the improved timetable back")
+    args = parser.parse_args()
+    
+    try:
+        result = run_optimizer(DatabaseManager(args.database), args.budget, save=args.save, seed=args.seed)
+    except StaleDataError:
+        raise SystemExit("The timetable was edited while optimizing; nothing was saved. Run again.")
+    print(f"Score {result.initial_score:.2f} -> {result.final_score:.2f} "
+          f"({result.iterations} iterations, {result.accepted_moves} accepted, {result.elapsed_seconds:.2f}s"
+          f"{', saved' if result.saved else ''})")
+    for name, value in result.final_breakdown.items():
+        print(f"  {name}: {result.initial_breakdown[name]:.2f} -> {value:.2f}")
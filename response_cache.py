@@ -0,0 +1,158 @@
+"""Cached response bodies and their compressed variants.
+
+Routine bodies are kept until DatabaseManager.get_data_version() moves
+(VersionedCache), and ResponseCompressor gzip- or brotli-encodes responses
+for clients that accept it. Compressed variants are stored under a digest
+of the body, so a cached routine is compressed once per encoding rather
+than on every hit; bodies below MIN_COMPRESS_SIZE are sent as they are,
+since the saving would not pay for the CPU or the extra header.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this go out uncompressed
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Media types worth compressing besides text/* and *+json
+COMPRESSIBLE_TYPES = {'application/json', 'application/javascript', 'application/xml'}
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Encode data with 'gzip' or 'br'"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best content coding the client accepts ('br' or 'gzip'), or None"""
+    qualities = {}
+    for item in (accept_encoding or '').split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    wildcard = qualities.get('*', 0.0)
+    offers = (['br'] if brotli is not None else []) + ['gzip']
+    # max() keeps the first of equal offers, so brotli wins ties
+    best = max(offers, key=lambda coding: qualities.get(coding, wildcard))
+    return best if qualities.get(best, wildcard) > 0.0 else None
+
+def _compressible(mimetype: Optional[str]) -> bool:
+    mimetype = (mimetype or '').lower()
+    return mimetype.startswith('text/') or mimetype.endswith('+json') or mimetype in COMPRESSIBLE_TYPES
+
+class VersionedCache:
+    """Values built from the database, kept until its data version changes"""
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, db, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Cached value of key, calling build() when the data changed or the key is new"""
+        version = db.get_data_version()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            elif key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        
+        value = build()
+        with self._lock:
+            # A newer version may have cleared the cache while we were building
+            if version == self._version:
+                self._entries[key] = value
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+class ResponseCompressor:
+    """Flask after_request hook compressing responses the client can decode"""
+    
+    def __init__(self, min_size: int = MIN_COMPRESS_SIZE, max_variants: int = 512):
+        self.min_size = min_size
+        self.max_variants = max_variants
+        self._lock = threading.Lock()
+        self._variants: 'OrderedDict[tuple, bytes]' = OrderedDict()
+        self.stats = {'compressed': 0, 'variant_hits': 0, 'skipped_small': 0, 'bytes_in': 0, 'bytes_out': 0}
+    
+    def variant(self, data: bytes, encoding: str) -> bytes:
+        """Compressed data, reusing the stored variant of an identical earlier body"""
+        key = (hashlib.sha1(data).digest(), encoding)
+        with self._lock:
+            cached = self._variants.get(key)
+            if cached is not None:
+                self._variants.move_to_end(key)
+                self.stats['variant_hits'] += 1
+                return cached
+        
+        compressed = compress(data, encoding)
+        with self._lock:
+            self._variants[key] = compressed
+            while len(self._variants) > self.max_variants:
+                self._variants.popitem(last=False)
+        return compressed
+    
+    def process(self, accept_encoding: Optional[str], response):
+        """Compress a finished Flask response in place when it is worth it"""
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers or not _compressible(response.mimetype)):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            return response
+        
+        data = response.get_data()
+        if len(data) < self.min_size:
+            with self._lock:
+                self.stats['skipped_small'] += 1
+            return response
+        compressed = self.variant(data, encoding)
+        if len(compressed) >= len(data):
+            return response
+        
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        # The encoded bytes differ from the identity body, so its strong ETag becomes weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        with self._lock:
+            self.stats['compressed'] += 1
+            self.stats['bytes_in'] += len(data)
+            self.stats['bytes_out'] += len(compressed)
+        return response
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a copy of the counters"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 4) if stats['bytes_in'] else 0.0
+        return stats
@@ -0,0 +1,86 @@
+"""Room allocation over the existing Course_Teacher timetable.
+
+Each day/period is an independent bipartite matching between the classes
+(program/semester) meeting in that slot and the rooms large enough for them.
+Because a room that fits a class also fits every smaller class, the
+feasible sets are nested and a greedy pass (largest class first, smallest
+free room that fits) yields a maximum matching without augmenting paths.
+"""
+import bisect
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+
+ClassKey = Tuple[str, int]
+
+def allocate_slot(classes: Iterable[Tuple[ClassKey, int]],
+                  rooms: List[Tuple[int, str]]) -> Tuple[Dict[ClassKey, str], List[ClassKey]]:
+    """Assign rooms for one day/period.
+    
+    classes holds ((program, semester), students) pairs, rooms holds
+    (capacity, room_code) pairs sorted by capacity.
+    """
+    free = list(rooms)
+    capacities = [capacity for capacity, _ in free]
+    allocated: Dict[ClassKey, str] = {}
+    unallocated: List[ClassKey] = []
+    
+    for klass, students in sorted(classes, key=lambda item: item[1], reverse=True):
+        idx = bisect.bisect_left(capacities, students)
+        if idx == len(free):
+            unallocated.append(klass)
+            continue
+        allocated[klass] = free[idx][1]
+        del free[idx]
+        del capacities[idx]
+    return allocated, unallocated
+
+def allocate_rooms(class_slots: Iterable[Tuple[str, int, str, int]], rooms: Iterable[Tuple[str, int]],
+                   enrollment: Dict[ClassKey, int]) -> Tuple[List[Tuple[str, int, str, int, str]], List[Dict[str, Any]]]:
+    """Allocate rooms for every (program, semester, day, period) class slot.
+    
+    Returns (program, semester, day, period, room_code) rows and the class
+    slots that could not be given a room.
+    """
+    by_slot: Dict[Tuple[str, int], List[ClassKey]] = defaultdict(list)
+    for program, semester, day, period in class_slots:
+        by_slot[(day, int(period))].append((program, int(semester)))
+    
+    sorted_rooms = sorted((int(capacity), code) for code, capacity in rooms)
+    rows: List[Tuple[str, int, str, int, str]] = []
+    unplaced: List[Dict[str, Any]] = []
+    
+    for (day, period), classes in sorted(by_slot.items()):
+        sized = [(klass, enrollment.get(klass, 0)) for klass in classes]
+        allocated, unallocated = allocate_slot(sized, sorted_rooms)
+        for (program, semester), room_code in allocated.items():
+            rows.append((program, semester, day, period, room_code))
+        for program, semester in unallocated:
+            unplaced.append({
+                'program': program,
+                'semester': semester,
+                'day': day,
+                'period': period,
+                'students': enrollment.get((program, semester), 0)
+            })
+    return rows, unplaced
+
+def run_room_allocation(db) -> Dict[str, Any]:
+    """Allocate rooms for the whole timetable, reading and storing in one transaction"""
+    start = time.perf_counter()
+    result: Dict[str, Any] = {}
+    
+    def allocate(cursor) -> List[Tuple[str, int, str, int, str]]:
+        cursor.execute("SELECT DISTINCT Program, Semester, Day, Period FROM Course_Teacher")
+        class_slots = cursor.fetchall()
+        cursor.execute("SELECT Room_Code, Capacity FROM Room")
+        rooms = cursor.fetchall()
+        cursor.execute("SELECT Program, Semester, Students FROM Class_Enrollment")
+        enrollment = {(program, int(semester)): int(students) for program, semester, students in cursor.fetchall()}
+        rows, unplaced = allocate_rooms(class_slots, rooms, enrollment)
+        result.update(class_slots=len(class_slots), allocated=len(rows), unallocated=unplaced)
+        return rows
+    
+    db.rebuild_room_assignments(allocate)
+    result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return result
@@ -0,0 +1,187 @@
+"""Compact routine payloads, opt-in through content negotiation.
+
+The default routine JSON carries a pre-rendered HTML table and repeats the
+names and period times of every class. The grid form sends each string once:
+    
+    days, periods, times   calendar axes (times parallel to periods)
+    names                  every course/teacher/program string, once
+    entries                one list per distinct class, indexes into names
+    grid                   days x periods of entry number (0 = free)
+    extra                  [day, period position, entry number] of further
+                           classes booked into an already filled slot
+
+and the page renders the table itself. Clients ask for it with
+``Accept: application/vnd.routine.grid+json`` (or ``?format=grid``), or as
+MessagePack with ``Accept: application/msgpack`` when the msgpack package is
+installed.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # optional; without it only the JSON grid is offered
+    msgpack = None
+
+from academic_calendar import AcademicCalendar
+from utils import get_teacher_weekly_routine
+
+GRID_JSON = 'application/vnd.routine.grid+json'
+MSGPACK = 'application/msgpack'
+
+# ?format= values and the media type each stands for
+_FORMATS = {'grid': GRID_JSON, 'msgpack': MSGPACK}
+
+class _Names:
+    """String dictionary shared by the grids of one payload"""
+    
+    def __init__(self):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+    
+    def __call__(self, text) -> int:
+        text = str(text)
+        name_id = self._ids.get(text)
+        if name_id is None:
+            name_id = self._ids[text] = len(self.names)
+            self.names.append(text)
+        return name_id
+
+class _GridBuilder:
+    """Interns strings and classes while filling a days x periods grid"""
+    
+    def __init__(self, calendar: AcademicCalendar, names: Optional[_Names] = None):
+        self.calendar = calendar
+        self.period_pos = {period: i for i, period in enumerate(calendar.period_numbers)}
+        self.name = names or _Names()
+        self.entries: List[List] = []
+        self._entry_ids: Dict[Tuple, int] = {}
+        self.grid = [[0] * len(self.period_pos) for _ in calendar.days]
+        self.extra: List[List[int]] = []
+    
+    def add(self, day: str, period: int, entry: Tuple):
+        """Book an entry (a tuple of ints) into a slot; slots outside the calendar are skipped"""
+        d = self.calendar.day_index.get(day)
+        p = self.period_pos.get(period)
+        if d is None or p is None:
+            return
+        entry_id = self._entry_ids.get(entry)
+        if entry_id is None:
+            self.entries.append(list(entry))
+            entry_id = self._entry_ids[entry] = len(self.entries)
+        if self.grid[d][p]:
+            self.extra.append([d, p, entry_id])
+        else:
+            self.grid[d][p] = entry_id
+    
+    def cells(self) -> Dict[str, Any]:
+        return {'entries': self.entries, 'grid': self.grid, 'extra': self.extra}
+    
+    def payload(self, kind: str, **fields) -> Dict[str, Any]:
+        return {**_axes(self.calendar, kind), **fields, 'names': self.name.names, **self.cells()}
+
+def _axes(calendar: AcademicCalendar, kind: str) -> Dict[str, Any]:
+    return {
+        'format': 'grid',
+        'kind': kind,
+        'days': calendar.days,
+        'periods': calendar.period_numbers,
+        'times': [calendar.period_time(period) for period in calendar.period_numbers]
+    }
+
+def build_routine_grid(db, program: str, semester: int) -> Dict[str, Any]:
+    """Grid form of a program/semester routine; entries are [course name, teacher name]"""
+    routine_data = db.get_routine_for_program_semester(program, semester)
+    if routine_data.empty:
+        return {'error': f'No routine found for {program} Semester {semester}'}
+    
+    builder = _GridBuilder(db.get_calendar())
+    for day, period, course_name, teacher_name in zip(routine_data['Day'], routine_data['Period'],
+                                                       routine_data['Course_Name'], routine_data['Teacher_Name']):
+        builder.add(day, int(period), (builder.name(course_name), builder.name(teacher_name)))
+    return builder.payload('routine')
+
+def build_routine_grids(db, program: str, semesters: List[int]) -> Dict[str, Any]:
+    """Grids of several semesters of a program from one query, sharing one name dictionary.
+    
+    routines maps each semester (as a string) to its entries/grid/extra, or
+    to an error when it has no classes.
+    """
+    calendar = db.get_calendar()
+    routine_data = db.get_routines_for_program_semesters(program, semesters)
+    names = _Names()
+    builders = {int(semester): _GridBuilder(calendar, names) for semester in semesters}
+    for semester, day, period, course_name, teacher_name in zip(
+            routine_data['Semester'], routine_data['Day'], routine_data['Period'],
+            routine_data['Course_Name'], routine_data['Teacher_Name']):
+        builders[int(semester)].add(day, int(period), (names(course_name), names(teacher_name)))
+    
+    routines = {}
+    for semester, builder in builders.items():
+        if builder.entries:
+            routines[str(semester)] = builder.cells()
+        else:
+            routines[str(semester)] = {'error': f'No routine found for {program} Semester {semester}'}
+    return {**_axes(calendar, 'routines'), 'program': program, 'names': names.names, 'routines': routines}
+
+def build_teacher_routine_grid(db, teacher_code: str) -> Dict[str, Any]:
+    """Grid form of a teacher's routine; entries are [course name, program, semester]"""
+    teachers = db.get_teachers()
+    teacher_info = teachers[teachers['Teacher_Code'] == teacher_code]
+    teacher_name = teacher_info['Teacher_Name'].iloc[0] if not teacher_info.empty else 'Unknown'
+    
+    teacher_routine = get_teacher_weekly_routine(db, teacher_code)
+    if teacher_routine.empty:
+        return {'error': f'No schedule found for {teacher_name}'}
+    
+    builder = _GridBuilder(db.get_calendar())
+    for day, period, course_name, program, semester in zip(
+            teacher_routine['Day'], teacher_routine['Period'], teacher_routine['Course_Name'],
+            teacher_routine['Program'], teacher_routine['Semester']):
+        builder.add(day, int(period), (builder.name(course_name), builder.name(program), int(semester)))
+    return builder.payload('teacher', teacher_name=teacher_name)
+
+def _accept_qualities(accept: str) -> Dict[str, float]:
+    """Media types of an Accept header with their q values"""
+    qualities = {}
+    for item in accept.split(','):
+        media_type, *params = [part.strip() for part in item.split(';')]
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[media_type.lower()] = quality
+    return qualities
+
+def negotiate_routine_format(accept: Optional[str], format_param: Optional[str] = None) -> Optional[str]:
+    """Compact media type the client asked for, or None for the default JSON.
+    
+    Compact forms are only chosen when named explicitly; wildcards keep the
+    default so existing clients see no change.
+    """
+    if format_param:
+        media_type = _FORMATS.get(format_param.lower())
+        if media_type == MSGPACK and msgpack is None:
+            return None
+        return media_type
+    qualities = _accept_qualities(accept or '')
+    offers = [GRID_JSON]
+    if msgpack is not None:
+        offers += [MSGPACK, 'application/x-msgpack']
+    best = max(offers, key=lambda media_type: qualities.get(media_type, 0.0))
+    best_quality = qualities.get(best, 0.0)
+    if best_quality <= 0.0 or qualities.get('application/json', 0.0) > best_quality:
+        return None
+    return MSGPACK if best == 'application/x-msgpack' else best
+
+def encode_routine(payload: Dict[str, Any], media_type: str) -> bytes:
+    """Serialize a grid payload for the negotiated media type"""
+    if media_type == MSGPACK:
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,179 @@
+"""Ranked prefix search over courses and teachers.
+
+On SQLite, Course_Search and Teacher_Search are FTS5 indexes kept in step
+with Course and Teacher by triggers. They store their own copy of the
+indexed columns and are matched back to the base rows by code: Course and
+Teacher have TEXT primary keys, so their rowids are not stable (VACUUM may
+renumber them) and cannot link an index row to its table row. Every word
+typed is matched as a prefix, all words must match, and hits are ranked by
+bm25 with codes weighted above names. Other backends, and SQLite builds
+without FTS5, fall back to LIKE filters over the same columns.
+"""
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence
+
+SEARCH_LIMIT = 20
+# Options a typeahead box shows at once
+TYPEAHEAD_LIMIT = 10
+# Largest result list a client may ask for
+MAX_SEARCH_LIMIT = 100
+
+KINDS = ('course', 'teacher')
+
+# kind -> (base table, FTS table, indexed columns, bm25 weight of each column, detail column)
+_INDEXES = {
+    'course': ('Course', 'Course_Search', ('Course_Code', 'Course_Name'), (10.0, 1.0), 'Credit_hrs'),
+    'teacher': ('Teacher', 'Teacher_Search', ('Teacher_Code', 'Teacher_Name', 'Teacher_Designation'),
+                (10.0, 4.0, 1.0), 'Teacher_Designation')
+}
+
+# Runs of letters and digits, the same words FTS5's unicode61 tokenizer indexes
+_WORD = re.compile(r"[^\W_]+")
+
+def fts5_available(cursor) -> bool:
+    """Whether this SQLite build has the FTS5 module"""
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.Fts5_Probe USING fts5(x)")
+    except sqlite3.OperationalError:
+        return False
+    cursor.execute("DROP TABLE temp.Fts5_Probe")
+    return True
+
+def _drop_triggers(cursor, fts: str):
+    for event in ("insert", "delete", "update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {fts}_{event}")
+
+def create_search_index(cursor) -> bool:
+    """Create the FTS5 indexes and their sync triggers, filling an index from its table when new.
+    
+    Returns False, leaving no triggers behind, when SQLite lacks FTS5; search
+    then uses LIKE filters.
+    """
+    if not fts5_available(cursor):
+        # Triggers from a build that had FTS5 would make every write fail
+        for _, fts, _, _, _ in _INDEXES.values():
+            _drop_triggers(cursor, fts)
+        return False
+    for table, fts, columns, _, _ in _INDEXES.values():
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,))
+        row = cursor.fetchone()
+        if row is not None and "content=" in row[0]:
+            # Older external-content index keyed on the base table's rowid
+            _drop_triggers(cursor, fts)
+            cursor.execute(f"DROP TABLE {fts}")
+            row = None
+        names = ", ".join(columns)
+        new = ", ".join(f"new.{column}" for column in columns)
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, prefix='2 3')")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} ({names}) VALUES ({new});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM {fts} WHERE {columns[0]} = old.{columns[0]};
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE ON {table} BEGIN
+                DELETE FROM {fts} WHERE {columns[0]} = old.{columns[0]};
+                INSERT INTO {fts} ({names}) VALUES ({new});
+            END
+        """)
+        if row is None:
+            cursor.execute(f"INSERT INTO {fts} ({names}) SELECT {names} FROM {table}")
+    return True
+
+def search_words(text: str) -> List[str]:
+    """Words of a search box entry, as the index splits them"""
+    return _WORD.findall(text or '')
+
+def fts_query(words: Sequence[str]) -> str:
+    """FTS5 MATCH expression requiring every word as a prefix"""
+    # Quoting keeps words like AND/OR/NOT from being read as operators
+    return " ".join(f'"{word}"*' for word in words)
+
+def _fts_hits(cursor, kind: str, words: Sequence[str], limit: int) -> List[tuple]:
+    table, fts, columns, weights, detail = _INDEXES[kind]
+    cursor.execute(f"""
+        SELECT b.{columns[0]}, b.{columns[1]}, b.{detail}, bm25({fts}, {', '.join(map(str, weights))}) AS score
+        FROM {fts}
+        JOIN {table} b ON b.{columns[0]} = {fts}.{columns[0]}
+        WHERE {fts} MATCH ?
+        ORDER BY score
+        LIMIT ?
+    """, (fts_query(words), limit))
+    return cursor.fetchall()
+
+def _like_hits(cursor, kind: str, words: Sequence[str], limit: int) -> List[tuple]:
+    table, _, columns, _, detail = _INDEXES[kind]
+    # A word matches the start of a column or of any word inside it
+    word_match = "(" + " OR ".join(f"{column} LIKE ? OR {column} LIKE ?" for column in columns) + ")"
+    params = [pattern for word in words for _ in columns for pattern in (f"{word}%", f"% {word}%")]
+    cursor.execute(f"""
+        SELECT {columns[0]}, {columns[1]}, {detail}, 0
+        FROM {table}
+        WHERE {' AND '.join([word_match] * len(words))}
+        ORDER BY {columns[1]}
+        LIMIT ?
+    """, (*params, limit))
+    return cursor.fetchall()
+
+def search_entities(db, text: str, kinds: Sequence[str] = KINDS, limit: int = SEARCH_LIMIT) -> List[Dict[str, Any]]:
+    """Courses and teachers matching every word of text as a prefix, best first.
+    
+    Each hit has kind, code, name, detail (credit hours or designation) and
+    score (bm25; lower is better). Raises ValueError for an unknown kind.
+    """
+    unknown = [kind for kind in kinds if kind not in _INDEXES]
+    if unknown:
+        raise ValueError(f"Unknown search kind: {', '.join(unknown)}")
+    words = search_words(text)
+    if not words:
+        return []
+    limit = max(1, min(int(limit), MAX_SEARCH_LIMIT))
+    hits_of = _fts_hits if db.full_text_search else _like_hits
+    
+    conn = db.get_read_connection()
+    try:
+        cursor = conn.cursor()
+        hits = [{'kind': kind, 'code': code, 'name': name, 'detail': detail, 'score': float(score)}
+                for kind in kinds
+                for code, name, detail, score in hits_of(cursor, kind, words, limit)]
+    finally:
+        conn.close()
+    hits.sort(key=lambda hit: hit['score'])
+    return hits[:limit]
+
+def typeahead(db, kind: str, text: str, limit: int = TYPEAHEAD_LIMIT) -> List[Dict[str, str]]:
+    """Options for a course or teacher typeahead as {'value': code, 'label': 'code - name'}.
+    
+    Empty text lists the first codes in order, read from the primary key;
+    otherwise the options are the best search hits.
+    """
+    if kind not in _INDEXES:
+        raise ValueError(f"Unknown search kind: {kind}")
+    limit = max(1, min(int(limit), MAX_SEARCH_LIMIT))
+    if search_words(text):
+        pairs = [(hit['code'], hit['name']) for hit in search_entities(db, text, (kind,), limit)]
+    else:
+        table, _, columns, _, _ = _INDEXES[kind]
+        conn = db.get_read_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {columns[0]}, {columns[1]} FROM {table} ORDER BY {columns[0]} LIMIT ?", (limit,))
+            pairs = cursor.fetchall()
+        finally:
+            conn.close()
+    return [{'value': code, 'label': f"{code} - {name}"} for code, name in pairs]
+
+def ranked_codes(hits: List[Dict[str, Any]], kind: str) -> List[str]:
+    """Codes of one kind of hit, in rank order"""
+    return [hit['code'] for hit in hits if hit['kind'] == kind]
+
+def parse_kinds(value: Optional[str]) -> Sequence[str]:
+    """Kinds named in a comma-separated query parameter, or all of them when empty"""
+    kinds = [kind.strip() for kind in (value or '').split(',') if kind.strip()]
+    return kinds or KINDS
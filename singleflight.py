@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+class SingleFlightStats:
+    """Counters describing how much work request coalescing saved"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced_waiters = 0
+        self.errors = 0
+        self.max_waiters = 0
+    
+    def record(self, executed: bool, error: bool = False):
+        """Record one call and whether it ran the computation or joined another"""
+        with self._lock:
+            self.calls += 1
+            if executed:
+                self.executions += 1
+            else:
+                self.coalesced_waiters += 1
+            if error:
+                self.errors += 1
+    
+    def observe_waiters(self, waiters: int):
+        """Track the largest number of callers that joined a single flight"""
+        with self._lock:
+            self.max_waiters = max(self.max_waiters, waiters)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a copy of the counters"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'coalesced_waiters': self.coalesced_waiters,
+                'max_waiters': self.max_waiters,
+                'errors': self.errors,
+                'coalesce_ratio': round(self.coalesced_waiters / self.calls, 4) if self.calls else 0.0
+            }
+
+class _Flight:
+    """One in-flight computation shared by every concurrent caller of a key"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Collapse concurrent identical calls into one execution (thread-based servers)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.stats = SingleFlightStats()
+    
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """Run func for key, or wait for the identical call already running"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                flight.waiters += 1
+        
+        if not leader:
+            flight.done.wait()
+            self.stats.record(executed=False, error=flight.error is not None)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        
+        try:
+            flight.result = func(*args, **kwargs)
+        except Exception as e:
+            flight.error = e
+        finally:
+            # Results are shared only with callers that arrived while the call was running
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        
+        self.stats.observe_waiters(flight.waiters)
+        self.stats.record(executed=True, error=flight.error is not None)
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+class AsyncSingleFlight:
+    """Collapse concurrent identical awaitables into one execution (event-loop servers)"""
+    
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.stats = SingleFlightStats()
+    
+    async def do(self, key: Hashable, coro_func: Callable, *args) -> Any:
+        """Await coro_func(*args) for key, or join the identical call already running"""
+        future = self._flights.get(key)
+        executed = future is None
+        if executed:
+            future = asyncio.ensure_future(coro_func(*args))
+            self._flights[key] = future
+            self._waiters[key] = 0
+            future.add_done_callback(lambda _: self._finish(key))
+        else:
+            self._waiters[key] += 1
+        
+        try:
+            # Shield so a disconnecting client does not cancel the shared computation
+            result = await asyncio.shield(future)
+        except Exception:
+            self.stats.record(executed=executed, error=True)
+            raise
+        self.stats.record(executed=executed)
+        return result
+    
+    def _finish(self, key: Hashable):
+        self._flights.pop(key, None)
+        self.stats.observe_waiters(self._waiters.pop(key, 0))
@@ -0,0 +1,188 @@
+"""Static export of every routine for hosting without Python.
+
+Run with ``python static_site.py [out_dir] [--database DB] [--full]``. Every
+program/semester and teacher routine is written as JSON, as an HTML page
+rendered from the Flask templates and as an iCalendar feed, next to the
+routine and teacher selector pages:
+    
+    index.html, routines.html, teacher_routines.html
+    routine/<program>/<semester>.html   data/routine/<program>/<semester>.json
+    teacher/<code>.html                 data/teacher/<code>.json
+    ics/routine/<program>/<semester>.ics, ics/teacher/<code>.ics
+
+A manifest in the output directory remembers which journal batches the site
+reflects. Later builds read only the journal entries written (or undone)
+since then and regenerate just the pages those rows touch; calendar edits,
+lost journal history or ``--full`` rebuild everything.
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+import journal
+from ics import render_all_feeds
+from utils import build_routine_payload, build_teacher_routine_payload
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+MANIFEST_NAME = ".build-manifest.json"
+
+PageKey = journal.RoutineKey
+
+# Selector pages and the endpoint each one stands in for
+_SELECTOR_PAGES = {'index': 'index.html', 'routines': 'routines.html', 'teacher_routines': 'teacher_routines.html'}
+
+def _environment(root: str) -> Environment:
+    """Jinja environment for the Flask templates with links relative to root"""
+    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(['html']))
+    env.globals['url_for'] = lambda endpoint, **_: root + _SELECTOR_PAGES.get(endpoint, 'index.html')
+    env.globals['get_flashed_messages'] = lambda with_categories=False: []
+    env.globals['static_site'] = True
+    return env
+
+def _safe_segment(name) -> bool:
+    """Whether a program or teacher code can be used as a path segment"""
+    name = str(name)
+    return bool(name) and '/' not in name and '\\' not in name and name not in ('.', '..')
+
+def page_files(key: PageKey) -> List[str]:
+    """Output paths (relative, '/'-separated) written for one routine"""
+    if key[0] == 'routine':
+        _, program, semester = key
+        return [f'routine/{program}/{semester}.html', f'data/routine/{program}/{semester}.json',
+                f'ics/routine/{program}/{semester}.ics']
+    _, teacher_code = key
+    return [f'teacher/{teacher_code}.html', f'data/teacher/{teacher_code}.json', f'ics/teacher/{teacher_code}.ics']
+
+def _write(out_dir: str, path: str, content: str):
+    """Write a file atomically so a host syncing mid-build never serves half a page"""
+    target = os.path.join(out_dir, *path.split('/'))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8', newline='') as f:
+        f.write(content)
+    os.replace(tmp, target)
+
+def _remove(out_dir: str, path: str):
+    try:
+        os.remove(os.path.join(out_dir, *path.split('/')))
+    except FileNotFoundError:
+        pass
+
+def _load_manifest(out_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def changed_pages(db, manifest: Optional[Dict[str, Any]]) -> Tuple[Optional[Set[PageKey]], Dict[int, int]]:
+    """Pages affected since the manifest was written (None means rebuild everything) and the journal state"""
+    conn = db.get_read_connection()
+    try:
+        cursor = conn.cursor()
+        current = journal.journal_state(cursor)
+        if manifest is None:
+            return None, current
+        built = {int(batch_id): undone for batch_id, undone in manifest['batches'].items()}
+        batch_ids = journal.unseen_batches(built, current, manifest['last_batch'])
+        if batch_ids is None:
+            return None, current
+        entries = journal.batch_entries(cursor, batch_ids)
+        pages = journal.affected_routines(cursor, entries)
+        # The teacher selector lists every teacher
+        if pages is not None and any(table == 'Teacher' for table, _, _ in entries):
+            pages.add(('selectors',))
+        return pages, current
+    finally:
+        conn.close()
+
+def build_site(db, out_dir: str, full: bool = False) -> Dict[str, Any]:
+    """Render the static site into out_dir, regenerating only pages changed since the last build"""
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = None if full else _load_manifest(out_dir)
+    pages, journal_state = changed_pages(db, manifest)
+    rebuild_all = pages is None
+    
+    calendar = db.get_calendar()
+    teachers = db.get_teachers()[['Teacher_Code', 'Teacher_Name']].to_dict('records')
+    live: Set[PageKey] = {('teacher', teacher['Teacher_Code']) for teacher in teachers}
+    live |= {('routine', program, semester)
+             for program in calendar.programs for semester in calendar.semesters_for(program)}
+    live = {key for key in live if all(_safe_segment(part) for part in key[1:])}
+    targets = live if rebuild_all else pages & live
+    
+    feeds = render_all_feeds(db) if targets else {}
+    written: List[str] = []
+    for key in sorted(targets, key=lambda k: tuple(map(str, k))):
+        html_path, json_path, ics_path = page_files(key)
+        root = '../' * html_path.count('/')
+        env = _environment(root)
+        if key[0] == 'routine':
+            _, program, semester = key
+            payload = build_routine_payload(db, program, semester)
+            html = env.get_template('routines.html').render(
+                programs=calendar.programs, semesters=calendar.semesters,
+                selected_program=program, selected_semester=semester,
+                routine_url=root + 'data/routine/{program}/{semester}.json',
+                ics_url=root + 'ics/routine/{program}/{semester}.ics')
+        else:
+            _, teacher_code = key
+            payload = build_teacher_routine_payload(db, teacher_code)
+            html = env.get_template('teacher_routines.html').render(
+                teachers=teachers, selected_teacher=teacher_code,
+                routine_url=root + 'data/teacher/{teacher}.json',
+                ics_url=root + 'ics/teacher/{teacher}.ics')
+        _write(out_dir, html_path, html)
+        _write(out_dir, json_path, json.dumps(payload))
+        _write(out_dir, ics_path, feeds.get(key, ''))
+        written += [html_path, json_path, ics_path]
+    
+    if rebuild_all or ('selectors',) in pages or not os.path.exists(os.path.join(out_dir, 'index.html')):
+        env = _environment('')
+        routines_page = env.get_template('routines.html').render(
+            programs=calendar.programs, semesters=calendar.semesters,
+            routine_url='data/routine/{program}/{semester}.json', ics_url='ics/routine/{program}/{semester}.ics')
+        _write(out_dir, 'index.html', routines_page)
+        _write(out_dir, 'routines.html', routines_page)
+        _write(out_dir, 'teacher_routines.html', env.get_template('teacher_routines.html').render(
+            teachers=teachers, routine_url='data/teacher/{teacher}.json', ics_url='ics/teacher/{teacher}.ics'))
+        written += ['index.html', 'routines.html', 'teacher_routines.html']
+    
+    # Drop pages of teachers and classes that no longer exist
+    previous = set(manifest['files']) if manifest else set()
+    files = {path for key in live for path in page_files(key)}
+    removed = sorted(previous - files)
+    for path in removed:
+        _remove(out_dir, path)
+    
+    _write(out_dir, MANIFEST_NAME, json.dumps({
+        'last_batch': max(journal_state, default=0),
+        'batches': {str(batch_id): undone for batch_id, undone in journal_state.items()},
+        'files': sorted(files)
+    }))
+    return {
+        'full_rebuild': rebuild_all,
+        'pages': len(targets),
+        'files_written': len(written),
+        'files_removed': len(removed),
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+    }
+
+if __name__ == '__main__':
+    from database import DatabaseManager
+    
+    parser = argparse.ArgumentParser(description="Render every routine to static HTML, JSON and ICS files")
+    parser.add_argument("out_dir", nargs="?", default="site")
+    parser.add_argument("--database", default="Class_routine.db")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and rebuild every page")
+    args = parser.parse_args()
+    
+    summary = build_site(DatabaseManager(args.database), args.out_dir, full=args.full)
+    kind = "Full" if summary['full_rebuild'] else "Incremental"
+    print(f"{kind} build: {summary['pages']} pages, {summary['files_written']} files written, "
+          f"{summary['files_removed']} removed in {summary['elapsed_ms']:.0f} ms")
@@ -0,0 +1,33 @@
+import sqlite3
+
+import pytest
+
+from database import DatabaseManager
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "routine.db")
+
+@pytest.fixture
+def db(db_path):
+    """DatabaseManager over a fresh SQLite file"""
+    return DatabaseManager(db_path)
+
+@pytest.fixture
+def catalog(db):
+    """db with two teachers and three courses"""
+    db.upsert_teachers([("T1", "Anita Rai", "Lecturer"), ("T2", "Bikash Shah", "Professor")])
+    db.upsert_courses([("C1", "Algorithms", 3), ("C2", "Databases", 3), ("C3", "Networks", 2)])
+    return db
+
+@pytest.fixture
+def stored_assignments(db_path):
+    """Callable returning the stored (teacher, course, program, semester, day, period) keys as a set"""
+    def read():
+        conn = sqlite3.connect(db_path)
+        try:
+            return set(conn.execute(
+                "SELECT Teacher_Code, Course_Code, Program, Semester, Day, Period FROM Course_Teacher"))
+        finally:
+            conn.close()
+    return read
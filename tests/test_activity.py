@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+import database
+from activity import activity_page, decode_cursor, encode_cursor
+
+def _identity(item):
+    if item["kind"] == "assignment":
+        return ("assignment", item["teacher_code"], item["course_code"], item["program"],
+                item["semester"], item["day"], item["period"])
+    if item["kind"] == "course":
+        return ("course", item["course_code"])
+    return ("teacher", item["teacher_code"])
+
+def _walk(db, limit, cursor=None):
+    """Every item of the feed from cursor on, page by page, and the number of pages"""
+    items, pages = [], 0
+    while True:
+        page = activity_page(db, limit=limit, cursor=cursor)
+        items += page["items"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items, pages
+
+@pytest.fixture
+def busy(db, db_path):
+    """32 feed rows, all but one written in the same second, plus a teacher from before timestamps"""
+    db.upsert_teachers([(f"T{i}", f"Teacher {i}", "Lecturer") for i in range(5)])
+    db.upsert_courses([(f"C{i}", f"Course {i}", 3) for i in range(8)])
+    db.bulk_assign_course_teachers([(f"T{i % 5}", f"C{i % 8}", i % 6 + 1, "BCA", i // 6 + 1, "Sunday")
+                                    for i in range(20)])
+    conn = sqlite3.connect(db_path)
+    for table in ("Course", "Teacher", "Course_Teacher"):
+        conn.execute(f"UPDATE {table} SET Created_At = '2026-01-01T09:00:00', Updated_At = '2026-01-01T09:00:00'")
+    conn.execute("UPDATE Course SET Updated_At = '2026-01-02T09:00:00' WHERE Course_Code = 'C3'")
+    conn.execute("UPDATE Teacher SET Created_At = NULL, Updated_At = NULL WHERE Teacher_Code = 'T4'")
+    conn.commit()
+    conn.close()
+    return db
+
+@pytest.mark.parametrize("limit", [1, 7, 32, 100])
+def test_pages_return_every_row_once_newest_first(busy, limit):
+    items, pages = _walk(busy, limit)
+    
+    identities = [_identity(item) for item in items]
+    assert len(identities) == len(set(identities)) == 32
+    assert ("teacher", "T4") not in identities
+    assert [item["at"] for item in items] == sorted((item["at"] for item in items), reverse=True)
+    assert pages == -(-32 // limit)
+
+def test_updated_rows_lead_the_feed(busy):
+    first = activity_page(busy, limit=1)["items"][0]
+    assert (first["kind"], first["course_code"], first["action"]) == ("course", "C3", "updated")
+
+def test_rows_written_after_a_cursor_do_not_shift_later_pages(busy):
+    page = activity_page(busy, limit=5)
+    busy.add_course("C99", "Brand New", 3)
+    
+    rest, _ = _walk(busy, 10, page["next_cursor"])
+    seen = [_identity(item) for item in page["items"] + rest]
+    assert len(seen) == len(set(seen)) == 32
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("2026-01-01T09:00:00", "assignment", ["T1", "C1", "BCA", 1, "Sunday", 2])
+    assert decode_cursor(cursor) == ("2026-01-01T09:00:00", "assignment", ["T1", "C1", "BCA", 1, "Sunday", 2])
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor("x", "room", ["R1"]),
+                                    encode_cursor("x", "course", ["C1", "extra"])])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid activity cursor"):
+        decode_cursor(cursor)
+
+def test_replacing_the_timetable_keeps_timestamps_of_unmoved_rows(catalog, db_path, monkeypatch):
+    rows = [("T1", "C1", 1, "BCA", 1, "Sunday"), ("T2", "C2", 2, "BCA", 1, "Sunday")]
+    catalog.replace_course_assignments(rows)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE Course_Teacher SET Created_At = '2025-01-01T00:00:00', Updated_At = '2025-01-01T00:00:00'")
+    conn.commit()
+    monkeypatch.setattr(database, "_now", lambda: "2026-10-19T12:00:00")
+    
+    # T2's class moves to period 3; T1's stays
+    catalog.replace_course_assignments([rows[0], ("T2", "C2", 3, "BCA", 1, "Sunday")])
+    
+    stamps = {row[0]: row[1:] for row in conn.execute(
+        "SELECT Teacher_Code, Period, Created_At, Updated_At FROM Course_Teacher")}
+    conn.close()
+    assert stamps == {"T1": (1, "2025-01-01T00:00:00", "2025-01-01T00:00:00"),
+                      "T2": (3, "2025-01-01T00:00:00", "2026-10-19T12:00:00")}
+    assert catalog.get_change_history(1)["Rows_Changed"].iloc[0] == 2
+    moved = activity_page(catalog, limit=1)["items"][0]
+    assert (moved["teacher_code"], moved["period"], moved["action"]) == ("T2", 3, "updated")
+
+def test_checkout_restores_assignments_and_their_timestamps(catalog, db_path, stored_assignments):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    catalog.assign_course_teacher("T2", "C2", 2, "BCA", 1, "Sunday")
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE Course_Teacher SET Created_At = '2025-01-01T00:00:00', Updated_At = '2025-01-02T00:00:00'")
+    conn.commit()
+    version_id = catalog.create_timetable_version("2026-spring", "Draft 1")
+    saved = stored_assignments()
+    
+    catalog.delete_assignments({"teacher_code": "T1"})
+    catalog.assign_course_teacher("T1", "C3", 4, "BIT", 1, "Monday")
+    assert catalog.checkout_timetable_version(version_id) == 2
+    
+    assert stored_assignments() == saved
+    stamps = set(conn.execute("SELECT Created_At, Updated_At FROM Course_Teacher"))
+    conn.close()
+    assert stamps == {("2025-01-01T00:00:00", "2025-01-02T00:00:00")}
+    # Only the rows that differed were journaled
+    assert catalog.get_change_history(1)["Rows_Changed"].iloc[0] == 2
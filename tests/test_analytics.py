@@ -0,0 +1,68 @@
+from analytics import WorkloadAnalytics, compute_analytics
+
+def _schedule(db):
+    """T1 teaches Sunday 1 and 3 (one idle period) and Monday 2; T2 teaches Sunday 1"""
+    db.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    db.assign_course_teacher("T1", "C1", 3, "BCA", 1, "Sunday")
+    db.assign_course_teacher("T1", "C1", 2, "BCA", 1, "Monday")
+    db.assign_course_teacher("T2", "C2", 1, "BCA", 2, "Sunday")
+
+def test_teacher_load_and_gaps(catalog):
+    _schedule(catalog)
+    
+    analytics = compute_analytics(catalog)
+    
+    t1, t2 = analytics['teacher_load']
+    assert (t1['teacher_code'], t1['teacher_name']) == ("T1", "Anita Rai")
+    assert t1['per_day'] == {"Sunday": 2, "Monday": 1, "Tuesday": 0, "Wednesday": 0, "Thursday": 0, "Friday": 0}
+    assert (t1['week'], t1['max_day'], t1['teaching_days'], t1['gaps']) == (3, 2, 2, 1)
+    assert (t2['week'], t2['max_day'], t2['teaching_days'], t2['gaps']) == (1, 1, 1, 0)
+    assert analytics['gaps'] == {'total': 1, 'teachers_with_gaps': 1, 'per_teaching_day': round(1 / 3, 4),
+                                 'max_teacher': 1}
+    assert analytics['weekly_load'] == {'max': 3, 'average': 2.0, 'idle_teachers': 0}
+
+def test_slot_utilization(catalog):
+    _schedule(catalog)
+    
+    utilization = compute_analytics(catalog)['utilization']
+    
+    # Three programs of eight semesters each
+    assert utilization['classes'] == 24
+    assert utilization['counts'][0][:3] == [2, 0, 1]
+    assert utilization['counts'][1][:3] == [0, 1, 0]
+    assert sum(map(sum, utilization['counts'])) == 4
+    assert utilization['utilization'][0][0] == round(2 / 24, 4)
+
+def test_coverage_caps_each_course_at_its_credit_hours(catalog):
+    _schedule(catalog)
+    # A fourth Algorithms period does not make up for the missing Databases periods
+    catalog.assign_course_teacher("T1", "C1", 4, "BCA", 1, "Monday")
+    catalog.assign_course_teacher("T2", "C2", 5, "BCA", 1, "Monday")
+    
+    coverage = {(row['program'], row['semester']): row for row in compute_analytics(catalog)['coverage']}
+    
+    assert len(coverage) == 24
+    first = coverage[("BCA", 1)]
+    assert (first['courses'], first['scheduled_periods'], first['credit_hours'], first['covered_courses']) == (2, 5, 6, 1)
+    assert first['coverage'] == round(4 / 6, 4)
+    assert coverage[("BCA", 2)]['coverage'] == round(1 / 3, 4)
+    assert coverage[("BIT", 1)] == {'program': "BIT", 'semester': 1, 'courses': 0, 'scheduled_periods': 0,
+                                    'credit_hours': 0, 'covered_courses': 0, 'coverage': 0.0}
+
+def test_empty_timetable(catalog):
+    analytics = compute_analytics(catalog)
+    
+    assert [teacher['week'] for teacher in analytics['teacher_load']] == [0, 0]
+    assert analytics['gaps']['per_teaching_day'] == 0.0
+    assert analytics['weekly_load'] == {'max': 0, 'average': 0.0, 'idle_teachers': 2}
+
+def test_workload_analytics_recomputes_after_a_write(catalog):
+    analytics = WorkloadAnalytics(catalog)
+    first = analytics.get()
+    
+    assert analytics.get() is first
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    second = analytics.get()
+    
+    assert second is not first
+    assert second['teacher_load'][0]['week'] == 1
@@ -0,0 +1,81 @@
+import asyncio
+import importlib
+import json
+import threading
+
+import pytest
+
+@pytest.fixture
+def asgi(db, tmp_path, monkeypatch):
+    """(module, app) with the app over db; the module's own app is built in tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module("asgi_app")
+    app = module.RoutineASGIApp(db)
+    yield module, app
+    app.bus.close()
+    app.adb.shutdown()
+
+def _post(asgi, path, body, content_type="application/json"):
+    module, app = asgi
+    scope = {'method': 'POST', 'path': path, 'headers': [(b'content-type', content_type.encode())]}
+    return asyncio.run(app.dispatch(module.Request(scope, body)))
+
+@pytest.mark.parametrize("body, error", [
+    (b'{"course_code": ', 'Malformed request body'),
+    (b'\xff\xfe', 'Malformed request body'),
+    (b'["C1", "Algorithms"]', 'Request body must be a JSON object'),
+    (b'42', 'Request body must be a JSON object'),
+    (b'null', 'Request body must be a JSON object'),
+])
+def test_unreadable_json_bodies_get_400(asgi, body, error):
+    assert _post(asgi, '/api/courses', body) == (400, {'error': error})
+
+def test_unreadable_form_body_gets_400(asgi):
+    status, payload = _post(asgi, '/api/courses', b'course_code=\xff', 'application/x-www-form-urlencoded')
+    assert (status, payload) == (400, {'error': 'Malformed request body'})
+
+def test_valid_bodies_still_work(asgi):
+    status, _ = _post(asgi, '/api/courses', b'{"course_code": "C1", "course_name": "Algorithms", "credit_hours": 3}')
+    assert status == 201
+    status, _ = _post(asgi, '/api/courses', b'course_code=C2&course_name=Databases&credit_hours=3',
+                      'application/x-www-form-urlencoded')
+    assert status == 201
+
+def _call(app, scope):
+    """Status and body of one request through the full ASGI interface"""
+    sent = []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        sent.append(message)
+    
+    asyncio.run(app({'type': 'http', 'headers': [], **scope}, receive, send))
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+def test_undecodable_query_string_gets_400(asgi):
+    _, app = asgi
+    status, payload = _call(app, {'method': 'GET', 'path': '/api/search', 'query_string': b'q=\xff'})
+    assert (status, payload) == (400, {'error': 'Malformed query string'})
+    status, _ = _call(app, {'method': 'GET', 'path': '/api/search', 'query_string': b'q=algo'})
+    assert status == 200
+
+def test_journal_polls_run_on_the_database_pool(asgi, monkeypatch):
+    _, app = asgi
+    threads = []
+    real_read = app.bus._read_journal
+    
+    def read_journal():
+        threads.append(threading.current_thread().name)
+        return real_read()
+    monkeypatch.setattr(app.bus, "_read_journal", read_journal)
+    
+    async def poll_once():
+        app.bus.subscribe(('routine', 'BCA', 1))
+        while not threads:
+            await asyncio.sleep(0.01)
+        app.bus.close()
+    asyncio.run(poll_once())
+    
+    assert threads[0].startswith("db")
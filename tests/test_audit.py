@@ -0,0 +1,36 @@
+from audit import run_audit
+
+def test_audit_reports_each_problem_once(catalog):
+    catalog.replace_course_assignments([
+        ("T1", "C1", 1, "BCA", 1, "Sunday"),
+        ("T1", "C2", 1, "BCA", 2, "Sunday"),
+        ("T2", "C3", 2, "BCA", 1, "Sunday"),
+        ("T2", "C3", 3, "BCA", 1, "Sunday"),
+        ("T9", "C1", 4, "BCA", 1, "Monday"),
+    ])
+    catalog.set_teacher_unavailable_slots("T2", [("Sunday", 3)])
+    
+    report = run_audit(catalog)
+    
+    [booking] = report["teacher_double_bookings"]
+    assert sorted(entry["course_code"] for entry in booking) == ["C1", "C2"]
+    assert report["orphaned_assignments"] == [{
+        "teacher_code": "T9", "course_code": "C1", "period": 4, "program": "BCA", "semester": 1,
+        "day": "Monday", "missing_teacher": True, "missing_course": False}]
+    assert [entry["period"] for entry in report["blocked_slot_bookings"]] == [3]
+    mismatches = {(m["program"], m["semester"], m["course_code"]): m["scheduled_periods"]
+                  for m in report["credit_hour_mismatches"]}
+    # C3 is a two-credit course taught twice; everything else falls short
+    assert mismatches == {("BCA", 1, "C1"): 2, ("BCA", 2, "C2"): 1}
+    summary = report["summary"]
+    for key in ("teacher_double_bookings", "orphaned_assignments", "credit_hour_mismatches",
+                "blocked_slot_bookings", "class_slot_collisions", "workload_violations", "outside_calendar"):
+        assert summary[key] == len(report[key])
+
+def test_timings_cover_report_building(catalog):
+    catalog.replace_course_assignments([("T1", "C1", 1, "BCA", 1, "Sunday")])
+    
+    summary = run_audit(catalog)["summary"]
+    
+    assert 0 <= summary["detect_ms"] <= summary["elapsed_ms"] <= summary["total_ms"]
+    assert summary["load_ms"] <= summary["total_ms"]
@@ -0,0 +1,52 @@
+import sqlite3
+
+from availability import AvailabilityIndex
+
+def test_index_bits_and_limits():
+    index = AvailabilityIndex([("T1", "Monday", 2), ("T1", "Holiday", 1), ("T1", "Sunday", 99)],
+                              [("T1", 2, None), ("T2", None, 5)])
+    
+    assert index.is_blocked("T1", "Monday", 2)
+    assert not index.is_blocked("T1", "Monday", 3)
+    assert not index.is_blocked("T2", "Monday", 2)
+    # Unknown days and periods are ignored rather than mapped onto real slots
+    assert bin(index.blocked_mask("T1")).count("1") == 1
+    assert index.within_limits("T1", 1, 30) and not index.within_limits("T1", 2, 2)
+    assert index.within_limits("T2", 4, 4) and not index.within_limits("T2", 0, 5)
+    assert index.get_limits("T3") == (None, None)
+    assert not index.allows("T1", "Monday", 2, 0, 0)
+
+def test_assignments_respect_blocked_slots(catalog):
+    catalog.set_teacher_unavailable_slots("T1", [("Sunday", 1), ("Sunday", 2)])
+    
+    assert not catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    assert catalog.check_teacher_conflict("T1", 2, "Sunday")
+    assert catalog.assign_course_teacher("T1", "C1", 3, "BCA", 1, "Sunday")
+    assert len(catalog.get_teacher_unavailability("T1")) == 2
+
+def test_assignments_respect_daily_and_weekly_limits(catalog):
+    catalog.set_teacher_workload("T1", 2, 3)
+    
+    assert catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    assert catalog.assign_course_teacher("T1", "C2", 2, "BCA", 1, "Sunday")
+    assert not catalog.assign_course_teacher("T1", "C3", 3, "BCA", 1, "Sunday")
+    assert catalog.check_teacher_conflict("T1", 3, "Sunday")
+    assert catalog.assign_course_teacher("T1", "C3", 1, "BCA", 1, "Monday")
+    assert not catalog.assign_course_teacher("T1", "C3", 2, "BCA", 1, "Tuesday")
+    
+    # Bulk imports skip what single assignments would refuse
+    catalog.set_teacher_workload("T2", 1, None)
+    assert catalog.bulk_assign_course_teachers([("T2", "C1", 1, "BIT", 1, "Sunday"),
+                                                ("T2", "C2", 2, "BIT", 1, "Sunday")]) == 1
+
+def test_edits_from_another_process_are_picked_up_after_the_ttl(catalog, db_path):
+    assert catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO Teacher_Unavailable (Teacher_Code, Day, Period) VALUES ('T1', 'Sunday', 2)")
+    conn.commit()
+    conn.close()
+    
+    # Cached until the TTL runs out
+    assert not catalog.get_availability_index().is_blocked("T1", "Sunday", 2)
+    catalog._availability_loaded_at -= 3600
+    assert catalog.get_availability_index().is_blocked("T1", "Sunday", 2)
@@ -0,0 +1,63 @@
+import pytest
+
+ROWS = [
+    ("T1", "C1", 1, "BCA", 1, "Sunday"),
+    ("T1", "C2", 2, "BCA", 1, "Sunday"),
+    ("T2", "C2", 1, "BCA", 2, "Monday"),
+    ("T2", "C3", 3, "BIT", 1, "Sunday"),
+]
+
+@pytest.fixture
+def booked(catalog):
+    assert catalog.bulk_assign_course_teachers(ROWS) == len(ROWS)
+    return catalog
+
+def _key(row):
+    teacher, course, period, program, semester, day = row
+    return (teacher, course, program, semester, day, period)
+
+def test_delete_by_filter(booked, stored_assignments):
+    assert booked.delete_assignments({"program": "BCA", "day": "Sunday"}) == 2
+    assert stored_assignments() == {_key(ROWS[2]), _key(ROWS[3])}
+
+def test_filter_values_of_none_are_ignored(booked, stored_assignments):
+    assert booked.delete_assignments({"teacher_code": "T2", "semester": None}) == 2
+    assert stored_assignments() == {_key(ROWS[0]), _key(ROWS[1])}
+
+def test_empty_filter_deletes_nothing(booked, stored_assignments):
+    assert booked.delete_assignments({}) == 0
+    assert booked.delete_assignments({"program": None}) == 0
+    assert len(stored_assignments()) == len(ROWS)
+
+def test_unknown_filter_is_rejected(booked):
+    with pytest.raises(ValueError, match="Unknown assignment filter"):
+        booked.delete_assignments({"room": "R1"})
+
+def test_delete_by_keys_counts_only_existing_rows(booked, stored_assignments):
+    missing = ("T1", "C3", "BIT", 2, "Friday", 6)
+    deleted = booked.delete_assignments(keys=[_key(ROWS[0]), _key(ROWS[3]), missing])
+    
+    assert deleted == 2
+    assert stored_assignments() == {_key(ROWS[1]), _key(ROWS[2])}
+
+def test_delete_keys_spanning_several_journal_chunks(catalog, stored_assignments):
+    rows = [("T1", "C1", period, "BCA", semester, day)
+            for semester in range(1, 9) for day in ("Sunday", "Monday", "Tuesday") for period in range(1, 7)]
+    # Different semesters in the same slot would double-book T1, so insert them directly
+    catalog.replace_course_assignments(rows)
+    
+    assert catalog.delete_assignments(keys=[_key(row) for row in rows]) == len(rows)
+    assert stored_assignments() == set()
+
+def test_bulk_delete_is_one_undoable_batch(booked, stored_assignments):
+    before = stored_assignments()
+    booked.delete_assignments({"day": "Sunday"})
+    
+    assert booked.get_change_history(1)["Rows_Changed"].iloc[0] == 3
+    assert booked.undo_changes() == 1
+    assert stored_assignments() == before
+
+def test_remove_course_assignment(booked, stored_assignments):
+    assert booked.remove_course_assignment("T1", "C1", "BCA", 1, "Sunday", 1)
+    assert not booked.remove_course_assignment("T1", "C1", "BCA", 1, "Sunday", 1)
+    assert _key(ROWS[0]) not in stored_assignments()
@@ -0,0 +1,77 @@
+import sqlite3
+
+from audit import run_audit
+
+def test_settings_round_trip(db):
+    db.set_calendar_programs([("BIT", 8), ("BCA", 6)])
+    db.set_calendar_days(["Monday", "Sunday"])
+    db.set_calendar_periods([(2, "7:20 AM", "Morning"), (1, "6:30 AM", None)])
+    
+    calendar = db.get_calendar()
+    
+    assert calendar.programs == ("BIT", "BCA")
+    assert calendar.semesters_for("BCA") == (1, 2, 3, 4, 5, 6)
+    assert calendar.days == ("Monday", "Sunday")
+    assert dict(calendar.periods) == {1: "6:30 AM", 2: "7:20 AM"}
+    assert dict(calendar.shifts) == {2: "Morning"}
+    assert db.get_calendar() is calendar
+    
+    assert db.undo_changes(3) == 3
+    assert db.get_calendar().programs == ("BCA", "BIT", "B.Tech AI")
+
+def test_defaults_are_seeded_once(db, db_path):
+    db.set_calendar_days(["Sunday"])
+    
+    assert type(db)(db_path).get_calendar().days == ("Sunday",)
+
+def _room_bookings(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM Room_Assignment").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_removed_slots_take_their_bookings_along(catalog, db_path, stored_assignments):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    catalog.assign_course_teacher("T1", "C2", 6, "BCA", 1, "Monday")
+    catalog.assign_course_teacher("T2", "C3", 2, "BCA", 1, "Tuesday")
+    catalog.set_teacher_unavailable_slots("T2", [("Tuesday", 3), ("Sunday", 6)])
+    catalog.add_room("R1", "Lab", 40, "Lab")
+    catalog.assign_room("BCA", 1, "Tuesday", 2, "R1")
+    
+    catalog.set_calendar_days(["Sunday", "Monday"])
+    catalog.set_calendar_periods([(period, f"{period}:00", None) for period in range(1, 6)])
+    
+    assert stored_assignments() == {("T1", "C1", "BCA", 1, "Sunday", 1)}
+    assert catalog.get_teacher_unavailability("T2").empty
+    assert _room_bookings(db_path) == 0
+    assert run_audit(catalog)["summary"]["outside_calendar"] == 0
+    
+    # One batch per edit; undoing them brings every booking back
+    assert catalog.undo_changes(2) == 2
+    assert len(stored_assignments()) == 3
+    assert len(catalog.get_teacher_unavailability("T2")) == 2
+    assert _room_bookings(db_path) == 1
+
+def test_dropped_programs_and_semesters_take_their_classes_along(catalog, stored_assignments):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    catalog.assign_course_teacher("T1", "C2", 2, "BCA", 7, "Sunday")
+    catalog.assign_course_teacher("T2", "C3", 1, "BIT", 1, "Sunday")
+    catalog.set_class_enrollment("BIT", 1, 30)
+    
+    catalog.set_calendar_programs([("BCA", 6)])
+    
+    assert stored_assignments() == {("T1", "C1", "BCA", 1, "Sunday", 1)}
+    assert catalog.get_class_enrollments().empty
+
+def test_audit_reports_assignments_outside_the_calendar(catalog):
+    catalog.replace_course_assignments([("T1", "C1", 1, "BCA", 1, "Sunday"), ("T1", "C2", 9, "BCA", 1, "Sunday"),
+                                        ("T2", "C3", 1, "BCA", 1, "Saturday"), ("T2", "C1", 2, "MBA", 1, "Sunday"),
+                                        ("T2", "C2", 3, "BCA", 9, "Sunday")])
+    
+    report = run_audit(catalog)
+    
+    assert report["summary"]["outside_calendar"] == 4
+    assert sorted((entry["program"], entry["semester"], entry["day"], entry["period"])
+                  for entry in report["outside_calendar"]) == [
+        ("BCA", 1, "Saturday", 1), ("BCA", 1, "Sunday", 9), ("BCA", 9, "Sunday", 3), ("MBA", 1, "Sunday", 2)]
@@ -0,0 +1,121 @@
+import asyncio
+import importlib
+
+from change_bus import ChangeBus
+from database import DatabaseManager
+
+async def _settle():
+    """Let callbacks scheduled with call_soon_threadsafe run"""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+def test_local_writes_wake_only_the_affected_pages(catalog):
+    bus = ChangeBus(catalog)
+    
+    async def scenario():
+        class_page = bus.subscribe(('routine', 'BCA', 1))
+        other_class = bus.subscribe(('routine', 'BCA', 2))
+        teacher_page = bus.subscribe(('teacher', 'T1'))
+        other_teacher = bus.subscribe(('teacher', 'T2'))
+        catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+        await _settle()
+        woken = [page.changed.is_set() for page in (class_page, other_class, teacher_page, other_teacher)]
+        bus.close()
+        return woken
+    
+    assert asyncio.run(scenario()) == [True, False, True, False]
+    assert (bus.published, bus.notified) == (1, 2)
+
+def test_renaming_a_course_wakes_the_routines_that_show_it(catalog):
+    catalog.assign_course_teacher("T2", "C2", 1, "BIT", 3, "Sunday")
+    bus = ChangeBus(catalog)
+    
+    async def scenario():
+        pages = [bus.subscribe(('routine', 'BIT', 3)), bus.subscribe(('teacher', 'T2')),
+                 bus.subscribe(('routine', 'BCA', 1))]
+        catalog.update_course("C2", "Database Systems", 3)
+        await _settle()
+        bus.close()
+        return [page.changed.is_set() for page in pages]
+    
+    assert asyncio.run(scenario()) == [True, True, False]
+
+def test_calendar_edits_wake_every_page(catalog):
+    bus = ChangeBus(catalog)
+    
+    async def scenario():
+        pages = [bus.subscribe(('routine', 'BCA', 1)), bus.subscribe(('teacher', 'T2'))]
+        catalog.set_calendar_days(["Sunday"])
+        await _settle()
+        bus.close()
+        return [page.changed.is_set() for page in pages]
+    
+    assert asyncio.run(scenario()) == [True, True]
+
+def test_writes_from_other_processes_are_found_by_the_poller(catalog, db_path):
+    bus = ChangeBus(catalog, poll_interval=0.01)
+    # Another process writing to the same file; its commits never reach this bus directly
+    other = DatabaseManager(db_path)
+    
+    async def scenario():
+        page = bus.subscribe(('routine', 'BIT', 2))
+        unrelated = bus.subscribe(('routine', 'BCA', 1))
+        # The first poll only records what is already in the journal
+        while bus._seen is None:
+            await asyncio.sleep(0.01)
+        other.assign_course_teacher("T2", "C3", 4, "BIT", 2, "Monday")
+        await asyncio.wait_for(page.changed.wait(), 5)
+        bus.close()
+        return unrelated.changed.is_set()
+    
+    assert asyncio.run(scenario()) is False
+
+def test_unsubscribed_pages_are_forgotten(catalog):
+    bus = ChangeBus(catalog)
+    
+    async def scenario():
+        subscription = bus.subscribe(('teacher', 'T1'))
+        assert bus.subscriber_count() == 1
+        bus.unsubscribe(subscription)
+        bus.close()
+    asyncio.run(scenario())
+    
+    assert bus.subscriber_count() == 0
+
+def test_event_stream_sends_an_invalidation(catalog, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = importlib.import_module("asgi_app").RoutineASGIApp(catalog)
+    sent = []
+    
+    async def scenario():
+        disconnect = asyncio.Event()
+        requested = False
+        
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+        
+        async def send(message):
+            sent.append(message)
+            if b'event: invalidate' in message.get('body', b''):
+                disconnect.set()
+        
+        scope = {'type': 'http', 'method': 'GET', 'path': '/events/routine/BCA/1', 'headers': []}
+        stream = asyncio.ensure_future(app(scope, receive, send))
+        while len(sent) < 2:
+            await asyncio.sleep(0.01)
+        await app.adb.run(catalog.assign_course_teacher, "T1", "C1", 1, "BCA", 1, "Sunday")
+        await asyncio.wait_for(stream, 5)
+    
+    asyncio.run(scenario())
+    app.bus.close()
+    app.adb.shutdown()
+    
+    assert sent[0]['status'] == 200
+    assert (b'content-type', b'text/event-stream') in sent[0]['headers']
+    assert sent[-1]['body'] == b'event: invalidate\ndata: {"program": "BCA", "semester": 1}\n\n'
+    assert app.bus.subscriber_count() == 0
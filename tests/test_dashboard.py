@@ -0,0 +1,56 @@
+import itertools
+import sqlite3
+
+import pytest
+
+import database
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Give every write its own Created_At, one minute after the previous one"""
+    minutes = itertools.count()
+    monkeypatch.setattr(database, "_now", lambda: f"2026-10-19T09:{next(minutes):02d}:00")
+
+def test_dashboard_counts(catalog):
+    assert catalog.get_dashboard_stats() == {'courses': 3, 'teachers': 2, 'assignments': 0, 'programs': 0}
+    
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    catalog.assign_course_teacher("T1", "C2", 2, "BCA", 2, "Sunday")
+    catalog.assign_course_teacher("T2", "C3", 1, "BIT", 1, "Sunday")
+    
+    assert catalog.get_dashboard_stats() == {'courses': 3, 'teachers': 2, 'assignments': 3, 'programs': 2}
+
+def test_recent_assignments_are_newest_first(catalog, clock):
+    for period in range(1, 6):
+        catalog.assign_course_teacher("T1", "C1", period, "BCA", 1, "Sunday")
+    
+    recent = catalog.get_recent_assignments(3)
+    
+    assert list(recent["Period"]) == [5, 4, 3]
+    assert list(recent.columns) == ["Program", "Semester", "Day", "Period", "Course_Code", "Course_Name",
+                                    "Teacher_Code", "Teacher_Name", "Created_At"]
+    assert (recent["Course_Name"].iloc[0], recent["Teacher_Name"].iloc[0]) == ("Algorithms", "Anita Rai")
+    assert len(catalog.get_recent_assignments()) == 5
+
+def test_rows_without_a_timestamp_sort_last(catalog, db_path, clock):
+    # A row from before Created_At existed
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO Course_Teacher (Teacher_Code, Course_Code, Period, Program, Semester, Day) "
+                 "VALUES ('T2', 'C2', 1, 'BCA', 2, 'Monday')")
+    conn.commit()
+    conn.close()
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    
+    recent = catalog.get_recent_assignments()
+    
+    assert list(recent["Teacher_Code"]) == ["T1", "T2"]
+    assert recent["Created_At"].isna().tolist() == [False, True]
+
+def test_recent_assignments_are_read_from_the_created_at_index(catalog, db_path):
+    conn = sqlite3.connect(db_path)
+    plan = " ".join(row[-1] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM Course_Teacher ORDER BY Created_At DESC LIMIT 10"))
+    conn.close()
+    
+    assert "idx_course_teacher_created" in plan
+    assert "TEMP B-TREE" not in plan
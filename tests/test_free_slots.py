@@ -0,0 +1,40 @@
+from academic_calendar import AcademicCalendar
+from availability import AvailabilityIndex
+from free_slots import rank_free_slots
+
+CALENDAR = AcademicCalendar.from_rows([("BCA", 8)], ["Sunday", "Monday"],
+                                      [(period, f"{period}:00", None) for period in range(1, 5)])
+
+def _rank(bookings, availability=None, **kwargs):
+    availability = availability or AvailabilityIndex(days=CALENDAR.days, max_period=CALENDAR.max_period)
+    return rank_free_slots(CALENDAR, availability, "T1", "BCA", 1, bookings, **kwargs)
+
+def test_gap_cost_counts_the_idle_periods_a_slot_adds():
+    # T1 teaches Sunday period 1 for another class; period 3 would leave period 2 idle
+    slots = {(slot["day"], slot["period"]): slot["breakdown"] for slot in _rank([("T1", "C9", "BIT", 1, "Sunday", 1)])}
+    
+    assert slots[("Sunday", 2)]["teacher_gap"] == 0
+    assert slots[("Sunday", 3)]["teacher_gap"] == 1.0
+    assert slots[("Sunday", 4)]["teacher_gap"] == 2.0
+    assert ("Sunday", 1) not in slots
+
+def test_busy_blocked_and_same_course_days_rank_accordingly():
+    availability = AvailabilityIndex([("T1", "Monday", 2)], days=CALENDAR.days, max_period=CALENDAR.max_period)
+    bookings = [("T2", "C1", "BCA", 1, "Monday", 1), ("T1", "C2", "BIT", 1, "Sunday", 4)]
+    
+    slots = _rank(bookings, availability, course_code="C1")
+    
+    taken = {("Monday", 1), ("Monday", 2), ("Sunday", 4)}
+    assert {(slot["day"], slot["period"]) for slot in slots} == {
+        (day, period) for day in CALENDAR.days for period in range(1, 5)} - taken
+    # Sunday 3 sits next to T1's class; Monday already has C1 for the class
+    assert (slots[0]["day"], slots[0]["period"], slots[0]["score"]) == ("Sunday", 3, 0.0)
+    assert all(slot["breakdown"]["same_course_same_day"] == 3.0 for slot in slots if slot["day"] == "Monday")
+
+def test_workload_limits_close_days_and_weeks():
+    full_day = AvailabilityIndex(workloads=[("T1", 1, None)], days=CALENDAR.days, max_period=CALENDAR.max_period)
+    full_week = AvailabilityIndex(workloads=[("T1", None, 1)], days=CALENDAR.days, max_period=CALENDAR.max_period)
+    bookings = [("T1", "C2", "BIT", 1, "Sunday", 1)]
+    
+    assert {slot["day"] for slot in _rank(bookings, full_day)} == {"Monday"}
+    assert _rank(bookings, full_week) == []
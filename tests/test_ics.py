@@ -0,0 +1,48 @@
+from datetime import date
+
+import pytest
+
+from ics import IcsFeeds, default_term_start, feed_etag, render_all_feeds
+
+@pytest.fixture
+def taught(catalog):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    catalog.assign_course_teacher("T1", "C2", 2, "BCA", 1, "Wednesday")
+    return catalog
+
+def _lines(body, prefix):
+    return [line for line in body.split("\r\n") if line.startswith(prefix)]
+
+def test_events_start_in_the_first_week_of_the_term(taught):
+    body = render_all_feeds(taught, date(2026, 2, 3))[("teacher", "T1")]
+    
+    # 3 February 2026 is a Tuesday
+    assert sorted(_lines(body, "DTSTART")) == ["DTSTART:20260204T072000", "DTSTART:20260208T063000"]
+
+def test_term_start_setting(monkeypatch):
+    monkeypatch.setenv("ROUTINE_TERM_START", "2026-08-17")
+    assert default_term_start() == date(2026, 8, 17)
+    monkeypatch.delenv("ROUTINE_TERM_START")
+    assert default_term_start() == date(date.today().year, 1, 1)
+
+def test_etag_ignores_dtstamp(taught):
+    first = render_all_feeds(taught, date(2026, 2, 3))[("teacher", "T1")]
+    restamped = first.replace(_lines(first, "DTSTAMP")[0], "DTSTAMP:19990101T000000Z")
+    
+    assert restamped != first
+    assert feed_etag(restamped) == feed_etag(first)
+
+def test_etag_survives_unrelated_writes_and_follows_real_ones(taught):
+    feeds = IcsFeeds()
+    _, etag = feeds.get(taught, ("teacher", "T1"))
+    
+    taught.add_course("C9", "Unrelated", 3)
+    assert feeds.get(taught, ("teacher", "T1"))[1] == etag
+    assert feeds.generations == 2
+    
+    taught.assign_course_teacher("T1", "C3", 3, "BCA", 2, "Monday")
+    assert feeds.get(taught, ("teacher", "T1"))[1] != etag
+
+def test_etags_agree_across_instances(taught):
+    assert IcsFeeds().get(taught, ("routine", "BCA", 1))[1] == IcsFeeds().get(taught, ("routine", "BCA", 1))[1]
+    assert IcsFeeds().get(taught, ("teacher", "NOPE")) is None
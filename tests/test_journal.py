@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+
+import journal
+from journal import ChangeRecorder
+
+def test_undo_and_redo_round_trip(catalog, stored_assignments):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    catalog.update_course("C1", "Advanced Algorithms", 4)
+    version = catalog.get_data_version()
+    
+    assert catalog.undo_changes(2) == 2
+    assert stored_assignments() == set()
+    course = catalog.get_courses().set_index("Course_Code").loc["C1"]
+    assert (course["Course_Name"], course["Credit_hrs"]) == ("Algorithms", 3)
+    
+    assert catalog.redo_changes(2) == 2
+    assert stored_assignments() == {("T1", "C1", "BCA", 1, "Sunday", 1)}
+    course = catalog.get_courses().set_index("Course_Code").loc["C1"]
+    assert (course["Course_Name"], course["Credit_hrs"]) == ("Advanced Algorithms", 4)
+    assert catalog.get_data_version() == version
+
+def test_new_write_discards_redo(catalog):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    assert catalog.undo_changes() == 1
+    
+    catalog.assign_course_teacher("T2", "C2", 2, "BCA", 1, "Sunday")
+    
+    assert catalog.redo_changes() == 0
+    assert catalog.get_change_history()["Undone"].sum() == 0
+
+def test_undo_with_empty_journal(db):
+    assert db.undo_changes() == 0
+    assert db.redo_changes() == 0
+
+def test_compaction_keeps_newest_batches(catalog):
+    for period in range(1, 6):
+        catalog.assign_course_teacher("T1", "C1", period, "BCA", 1, "Sunday")
+    newest = int(catalog.get_change_history(1)["Batch_Id"].iloc[0])
+    
+    removed = catalog.compact_journal(keep_batches=2)
+    
+    history = catalog.get_change_history(100)
+    assert removed > 0
+    assert sorted(history["Batch_Id"]) == [newest - 1, newest]
+    # Only what is left can be undone
+    assert catalog.undo_changes(10) == 2
+    assert len(catalog.get_course_assignments()) == 3
+
+def test_writes_compact_the_journal_periodically(catalog, monkeypatch):
+    monkeypatch.setattr(journal, "JOURNAL_COMPACT_INTERVAL", 4)
+    monkeypatch.setattr(journal, "JOURNAL_KEEP_BATCHES", 2)
+    for period in range(1, 6):
+        catalog.assign_course_teacher("T1", "C1", period, "BCA", 1, "Sunday")
+    
+    # Seven batches in all; writing batch 4 dropped batches 1 and 2
+    assert sorted(catalog.get_change_history(100)["Batch_Id"]) == [3, 4, 5, 6, 7]
+
+def test_rejected_assignment_journals_nothing(catalog):
+    assert catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    version = catalog.get_data_version()
+    
+    # Teacher already booked in that slot
+    assert not catalog.assign_course_teacher("T1", "C2", 1, "BCA", 2, "Sunday")
+    # Duplicate key: the IntegrityError path
+    assert not catalog.add_teacher("T1", "Someone Else", "Lecturer")
+    
+    assert catalog.get_data_version() == version
+    assert getattr(catalog._local, "recorder", None) is None
+    # The connection was released cleanly, so the next write is not blocked
+    assert catalog.assign_course_teacher("T2", "C2", 1, "BCA", 2, "Sunday")
+
+def test_workload_limit_rejection_leaves_no_recorder(catalog):
+    catalog.set_teacher_workload("T1", 1, None)
+    assert catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    
+    assert not catalog.assign_course_teacher("T1", "C2", 2, "BCA", 1, "Sunday")
+    
+    assert getattr(catalog._local, "recorder", None) is None
+    assert len(catalog.get_course_assignments()) == 1
+
+def test_concurrent_writer_waits_for_the_journaled_write(catalog, db_path, stored_assignments, monkeypatch):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    
+    def insert_matching_row():
+        conn = sqlite3.connect(db_path, timeout=10)
+        conn.execute("INSERT INTO Course_Teacher (Teacher_Code, Course_Code, Period, Program, Semester, Day) "
+                     "VALUES ('T2', 'C2', 3, 'BCA', 1, 'Sunday')")
+        conn.commit()
+        conn.close()
+    
+    writer = threading.Thread(target=insert_matching_row)
+    real_watch = ChangeRecorder.watch
+    
+    def watch_then_race(self, *args):
+        real_watch(self, *args)
+        # Another connection tries to add a row the DELETE would match; it has to wait for the commit
+        writer.start()
+        writer.join(0.5)
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(ChangeRecorder, "watch", watch_then_race)
+        deleted = catalog.delete_assignments({"program": "BCA"})
+    writer.join()
+    
+    assert deleted == 1
+    assert catalog.get_change_history(1)["Rows_Changed"].iloc[0] == 1
+    assert catalog.undo_changes() == 1
+    assert stored_assignments() == {("T1", "C1", "BCA", 1, "Sunday", 1), ("T2", "C2", "BCA", 1, "Sunday", 3)}
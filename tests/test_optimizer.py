@@ -0,0 +1,75 @@
+import itertools
+import random
+
+import pytest
+
+import optimizer
+from optimizer import optimize_timetable, score_timetable
+from timetable import CompactTimetable
+
+def _sparse():
+    """Twelve classes that can be rearranged down to a zero score"""
+    timetable = CompactTimetable()
+    timetable.extend([(f"T{i % 4}", f"C{i}", 1 + (i * 5) % 6, "BCA", 1 + i % 3, ("Sunday", "Monday")[i // 6])
+                      for i in range(12)])
+    return timetable
+
+def _dense():
+    """96 classes, four a day for eight semesters over three days, with no double bookings"""
+    rng = random.Random(1)
+    timetable = CompactTimetable()
+    for k in range(8):
+        for d, day in enumerate(("Sunday", "Monday", "Tuesday")):
+            for period in rng.sample(range(1, 7), 4):
+                timetable.append(f"T{(k + 3 * period + d) % 10}", f"C{k}{rng.randrange(3)}", period, "BCA", k + 1, day)
+    return timetable
+
+@pytest.fixture
+def visited(monkeypatch):
+    """Scores of every layout the annealer passes through, starting with the initial one.
+    
+    The clock is faked so a run is a fixed number of 256-iteration batches
+    (half its time budget in seconds each).
+    """
+    clock = itertools.count(0, 0.5)
+    monkeypatch.setattr(optimizer.time, "perf_counter", lambda: next(clock))
+    scores = []
+    real_init, real_move = optimizer._ScheduleState.__init__, optimizer._ScheduleState.move
+    
+    def init(self, *args, **kwargs):
+        real_init(self, *args, **kwargs)
+        scores.append(sum(self.breakdown().values()))
+    
+    def move(self, i, day, period):
+        real_move(self, i, day, period)
+        scores.append(sum(self.breakdown().values()))
+    
+    monkeypatch.setattr(optimizer._ScheduleState, "__init__", init)
+    monkeypatch.setattr(optimizer._ScheduleState, "move", move)
+    return scores
+
+# The sparse runs wander far past their best layout, so it has to be copied aside;
+# the dense ones end a few moves past it, which are rolled back
+@pytest.mark.parametrize("build, batches, temperature", [
+    (_sparse, 8, 5.0), (_sparse, 8, 50.0), (_dense, 4, 0.3), (_dense, 4, 1.0), (_dense, 4, 3.0),
+])
+def test_returns_the_best_layout_seen(visited, build, batches, temperature):
+    timetable = build()
+    
+    result = optimize_timetable(timetable, time_budget=batches / 2, seed=1,
+                                initial_temperature=temperature, final_temperature=temperature)
+    
+    # visited ends with the rescoring of the returned layout
+    assert result.final_score == pytest.approx(min(visited[:-1]))
+    assert result.final_score < result.initial_score
+    assert score_timetable(timetable)["total"] == pytest.approx(result.final_score)
+
+def test_moves_never_double_book(visited):
+    timetable = _dense()
+    
+    optimize_timetable(timetable, time_budget=2, seed=5, initial_temperature=3.0, final_temperature=3.0)
+    
+    teacher_slots = [(row[0], row[5], row[2]) for row in timetable.rows()]
+    class_slots = [(row[3], row[4], row[5], row[2]) for row in timetable.rows()]
+    assert len(set(teacher_slots)) == len(teacher_slots) == 96
+    assert len(set(class_slots)) == len(class_slots) == 96
@@ -0,0 +1,59 @@
+import pytest
+
+from database import StaleDataError
+from optimizer import run_optimizer
+from timetable import CompactTimetable
+
+@pytest.fixture
+def gappy(catalog):
+    """T1 teaches periods 1 and 6 of one day, leaving a four-period gap"""
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    catalog.assign_course_teacher("T1", "C2", 6, "BCA", 1, "Sunday")
+    catalog.assign_course_teacher("T2", "C3", 3, "BCA", 2, "Monday")
+    return catalog
+
+def _moved(timetable, i, period):
+    timetable.period[i] = period
+    return timetable
+
+def test_save_writes_only_the_moved_rows(gappy, stored_assignments):
+    timetable = CompactTimetable.load(gappy)
+    i = next(i for i in range(len(timetable)) if timetable.row(i)[2] == 6)
+    _moved(timetable, i, 2)
+    
+    assert timetable.save(gappy) == 3
+    assert stored_assignments() == {("T1", "C1", "BCA", 1, "Sunday", 1), ("T1", "C2", "BCA", 1, "Sunday", 2),
+                                    ("T2", "C3", "BCA", 2, "Monday", 3)}
+    history = gappy.get_change_history(1)
+    assert history["Rows_Changed"].iloc[0] == 2
+
+def test_save_is_refused_after_a_concurrent_edit(gappy, stored_assignments):
+    timetable = CompactTimetable.load(gappy)
+    _moved(timetable, 0, 5)
+    # An admin edits the timetable while the optimizer runs
+    gappy.assign_course_teacher("T2", "C1", 4, "BIT", 1, "Tuesday")
+    before = stored_assignments()
+    version = gappy.get_data_version()
+    
+    with pytest.raises(StaleDataError):
+        timetable.save(gappy)
+    
+    assert stored_assignments() == before
+    assert gappy.get_data_version() == version
+    assert getattr(gappy._local, "recorder", None) is None
+
+def test_run_optimizer_saves_an_improvement(gappy, stored_assignments):
+    result = run_optimizer(gappy, time_budget=0.2, save=True, seed=7)
+    
+    assert result.final_score < result.initial_score
+    assert result.saved
+    assert len(stored_assignments()) == 3
+    # The stored timetable now scores what the optimizer reached
+    assert run_optimizer(gappy, time_budget=0).initial_score == pytest.approx(result.final_score)
+
+def test_run_optimizer_without_save_leaves_the_timetable(gappy, stored_assignments):
+    before = stored_assignments()
+    result = run_optimizer(gappy, time_budget=0.2, seed=7)
+    
+    assert not result.saved
+    assert stored_assignments() == before
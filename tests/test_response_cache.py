@@ -0,0 +1,154 @@
+import gzip
+import importlib
+import json
+import threading
+
+import pytest
+from flask import Response
+
+import response_cache
+from response_cache import ResponseCompressor, VersionedCache, choose_encoding
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(response_cache, "brotli", None)
+
+def test_cached_value_is_reused_until_the_data_version_moves(catalog):
+    cache = VersionedCache()
+    builds = []
+    
+    def build():
+        builds.append(len(builds))
+        return len(builds)
+    
+    assert cache.get(catalog, "routine", build) == 1
+    assert cache.get(catalog, "routine", build) == 1
+    assert cache.get(catalog, "other", build) == 2
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    assert cache.get(catalog, "routine", build) == 3
+    assert cache.get(catalog, "routine", build) == 3
+    
+    assert (cache.hits, cache.misses) == (2, 3)
+
+def test_least_recently_used_entry_is_evicted(catalog):
+    cache = VersionedCache(max_entries=2)
+    cache.get(catalog, "a", lambda: "a")
+    cache.get(catalog, "b", lambda: "b")
+    cache.get(catalog, "a", lambda: "rebuilt")
+    cache.get(catalog, "c", lambda: "c")
+    
+    assert cache.get(catalog, "a", lambda: "rebuilt") == "a"
+    assert cache.get(catalog, "b", lambda: "rebuilt") == "rebuilt"
+
+def test_value_built_from_an_older_version_is_not_kept(catalog):
+    cache = VersionedCache()
+    
+    def build_while_someone_writes():
+        # The write lands after the version was read but before the value is stored
+        thread = threading.Thread(target=catalog.assign_course_teacher, args=("T1", "C1", 1, "BCA", 1, "Sunday"))
+        thread.start()
+        thread.join()
+        cache.get(catalog, "other", lambda: "newer")
+        return "stale"
+    
+    assert cache.get(catalog, "routine", build_while_someone_writes) == "stale"
+    assert cache.get(catalog, "routine", lambda: "fresh") == "fresh"
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("br", None),
+    ("*", "gzip"),
+    ("*;q=0.1, gzip;q=0", None),
+])
+def test_gzip_is_chosen_when_accepted(without_brotli, accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+def test_brotli_wins_ties_when_installed(monkeypatch):
+    monkeypatch.setattr(response_cache, "brotli", pytest.importorskip("brotli"))
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("*") == "br"
+    assert choose_encoding("br;q=0.5, gzip") == "gzip"
+
+def _json_response(size=4096, status=200, mimetype="application/json"):
+    return Response(json.dumps({"rows": "x" * size}), status=status, mimetype=mimetype)
+
+def test_large_text_responses_are_gzipped(without_brotli):
+    compressor = ResponseCompressor()
+    response = _json_response()
+    body = response.get_data()
+    response.set_etag("v1")
+    
+    compressor.process("gzip, br", response)
+    
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.get_data()) == body
+    assert "Accept-Encoding" in response.vary
+    assert response.get_etag() == ("v1", True)
+    stats = compressor.snapshot()
+    assert (stats["compressed"], stats["bytes_in"]) == (1, len(body))
+    assert 0 < stats["ratio"] < 1
+
+def test_identical_bodies_are_compressed_once(without_brotli, monkeypatch):
+    compressor = ResponseCompressor()
+    calls = []
+    real_compress = response_cache.compress
+    
+    def counting_compress(data, encoding):
+        calls.append(encoding)
+        return real_compress(data, encoding)
+    monkeypatch.setattr(response_cache, "compress", counting_compress)
+    
+    first, second = _json_response(), _json_response()
+    compressor.process("gzip", first)
+    compressor.process("gzip", second)
+    
+    assert calls == ["gzip"]
+    assert first.get_data() == second.get_data()
+    assert compressor.snapshot()["variant_hits"] == 1
+
+@pytest.mark.parametrize("response, accept_encoding", [
+    (_json_response(size=100), "gzip"),
+    (_json_response(status=404), "gzip"),
+    (_json_response(mimetype="image/png"), "gzip"),
+    (_json_response(), "identity"),
+])
+def test_other_responses_are_left_alone(without_brotli, response, accept_encoding):
+    body = response.get_data()
+    
+    ResponseCompressor().process(accept_encoding, response)
+    
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data() == body
+
+@pytest.fixture
+def client(catalog, tmp_path, monkeypatch):
+    """Flask test client over catalog with fresh caches"""
+    monkeypatch.chdir(tmp_path)
+    flask_app = importlib.import_module("flask_app")
+    monkeypatch.setattr(flask_app, "db", catalog)
+    monkeypatch.setattr(flask_app, "routine_bodies", VersionedCache())
+    monkeypatch.setattr(flask_app, "compressor", ResponseCompressor(min_size=0))
+    monkeypatch.setattr(response_cache, "brotli", None)
+    return flask_app.app.test_client()
+
+def _routine(client):
+    response = client.get("/get_routine/BCA/1", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    return json.loads(gzip.decompress(response.get_data()))
+
+def test_compressed_routine_follows_the_data_version(client, catalog):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    first = _routine(client)
+    assert _routine(client) == first
+    
+    catalog.update_course("C1", "Advanced Algorithms", 4)
+    
+    second = _routine(client)
+    assert second != first
+    assert "Advanced Algorithms" in json.dumps(second)
+    assert "Advanced Algorithms" not in json.dumps(first)
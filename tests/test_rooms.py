@@ -0,0 +1,48 @@
+import sqlite3
+
+import pytest
+
+from rooms import allocate_slot, run_room_allocation
+
+@pytest.fixture
+def campus(catalog):
+    catalog.add_room("R1", "Hall", 60, "lecture")
+    catalog.add_room("R2", "Lab", 30, "lab")
+    catalog.set_class_enrollment("BCA", 1, 50)
+    catalog.set_class_enrollment("BCA", 2, 25)
+    catalog.set_class_enrollment("BIT", 1, 70)
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    catalog.assign_course_teacher("T2", "C2", 1, "BCA", 2, "Sunday")
+    catalog.assign_course_teacher("T1", "C3", 2, "BIT", 1, "Sunday")
+    return catalog
+
+def test_largest_class_gets_the_smallest_room_that_fits():
+    allocated, unallocated = allocate_slot([(("A", 1), 25), (("B", 1), 50), (("C", 1), 90)],
+                                           [(30, "R2"), (60, "R1")])
+    assert allocated == {("B", 1): "R1", ("A", 1): "R2"}
+    assert unallocated == [("C", 1)]
+
+def test_run_room_allocation_stores_one_batch(campus, db_path):
+    result = run_room_allocation(campus)
+    
+    assert (result["class_slots"], result["allocated"]) == (3, 2)
+    assert [(u["program"], u["semester"], u["students"]) for u in result["unallocated"]] == [("BIT", 1, 70)]
+    conn = sqlite3.connect(db_path)
+    rooms = set(conn.execute("SELECT Program, Semester, Room_Code FROM Room_Assignment"))
+    conn.close()
+    assert rooms == {("BCA", 1, "R1"), ("BCA", 2, "R2")}
+    assert campus.get_change_history(1)["Description"].iloc[0] == "Allocate rooms"
+
+def test_other_writers_wait_while_the_allocation_reads(campus, db_path):
+    def build(cursor):
+        cursor.execute("SELECT COUNT(*) FROM Course_Teacher")
+        other = sqlite3.connect(db_path, timeout=0)
+        try:
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                other.execute("DELETE FROM Course_Teacher")
+        finally:
+            other.close()
+        return [("BCA", 1, "Sunday", 1, "R1")]
+    
+    assert campus.rebuild_room_assignments(build) == 1
+    assert len(campus.get_course_assignments()) == 3
@@ -0,0 +1,161 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+
+import routine_grid
+from routine_grid import (
+    GRID_JSON,
+    MSGPACK,
+    build_routine_grid,
+    build_routine_grids,
+    build_teacher_routine_grid,
+    encode_routine,
+    negotiate_routine_format
+)
+
+@pytest.fixture
+def routine(catalog):
+    """catalog with three BCA 1 classes (one course twice) and one BCA 2 class"""
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    catalog.assign_course_teacher("T1", "C1", 2, "BCA", 1, "Monday")
+    catalog.assign_course_teacher("T2", "C2", 3, "BCA", 1, "Sunday")
+    catalog.assign_course_teacher("T2", "C3", 1, "BCA", 2, "Tuesday")
+    return catalog
+
+@pytest.fixture
+def without_msgpack(monkeypatch):
+    monkeypatch.setattr(routine_grid, "msgpack", None)
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, None),
+    ("*/*", None),
+    ("application/json", None),
+    (GRID_JSON, GRID_JSON),
+    (f"application/json;q=0.5, {GRID_JSON}", GRID_JSON),
+    (f"application/json, {GRID_JSON};q=0.5", None),
+    (f"{GRID_JSON};q=0", None),
+    (f"{GRID_JSON};q=oops", None),
+])
+def test_grid_is_only_chosen_when_named(accept, expected):
+    assert negotiate_routine_format(accept) == expected
+
+def test_format_parameter_wins_over_accept(without_msgpack):
+    assert negotiate_routine_format("application/json", "grid") == GRID_JSON
+    assert negotiate_routine_format(GRID_JSON, "nonsense") is None
+    # MessagePack is never offered without the package
+    assert negotiate_routine_format(MSGPACK) is None
+    assert negotiate_routine_format(f"{MSGPACK}, {GRID_JSON};q=0.5") == GRID_JSON
+    assert negotiate_routine_format(None, "msgpack") is None
+
+def test_msgpack_is_negotiated_and_round_trips(routine, monkeypatch):
+    msgpack = pytest.importorskip("msgpack")
+    monkeypatch.setattr(routine_grid, "msgpack", msgpack)
+    assert negotiate_routine_format(f"{GRID_JSON};q=0.5, {MSGPACK}") == MSGPACK
+    assert negotiate_routine_format("application/x-msgpack") == MSGPACK
+    assert negotiate_routine_format(None, "msgpack") == MSGPACK
+    
+    payload = build_routine_grid(routine, "BCA", 1)
+    assert msgpack.unpackb(encode_routine(payload, MSGPACK), raw=False) == json.loads(encode_routine(payload, GRID_JSON))
+
+def _cell(payload, cells, day, period):
+    """Names of the entry booked in a slot, or None when it is free"""
+    entry = cells['grid'][payload['days'].index(day)][payload['periods'].index(period)]
+    if not entry:
+        return None
+    return [payload['names'][name] if isinstance(name, int) and i < 2 else name
+            for i, name in enumerate(cells['entries'][entry - 1])]
+
+def test_routine_grid_sends_each_string_once(routine):
+    payload = build_routine_grid(routine, "BCA", 1)
+    
+    assert (payload['format'], payload['kind']) == ('grid', 'routine')
+    assert list(payload['days']) == ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+    assert list(payload['periods']) == [1, 2, 3, 4, 5, 6]
+    assert len(payload['times']) == 6
+    assert sorted(payload['names']) == ["Algorithms", "Anita Rai", "Bikash Shah", "Databases"]
+    # The repeated Algorithms class is one entry booked twice
+    assert len(payload['entries']) == 2
+    assert _cell(payload, payload, "Sunday", 1) == ["Algorithms", "Anita Rai"]
+    assert _cell(payload, payload, "Monday", 2) == ["Algorithms", "Anita Rai"]
+    assert _cell(payload, payload, "Sunday", 3) == ["Databases", "Bikash Shah"]
+    assert _cell(payload, payload, "Sunday", 2) is None
+    assert payload['extra'] == []
+    assert sum(map(bool, sum(payload['grid'], []))) == 3
+
+def test_empty_routine_reports_an_error(routine):
+    assert build_routine_grid(routine, "BIT", 1) == {'error': 'No routine found for BIT Semester 1'}
+
+def test_second_class_in_a_filled_slot_goes_to_extra(routine):
+    builder = routine_grid._GridBuilder(routine.get_calendar())
+    builder.add("Sunday", 1, (0, 1))
+    builder.add("Sunday", 1, (2, 3))
+    builder.add("Saturday", 1, (4, 5))
+    builder.add("Sunday", 9, (4, 5))
+    
+    assert builder.cells()['extra'] == [[0, 0, 2]]
+    assert builder.grid[0][0] == 1
+    assert builder.entries == [[0, 1], [2, 3]]
+
+def test_several_semesters_share_one_name_dictionary(routine):
+    payload = build_routine_grids(routine, "BCA", [1, 2, 3])
+    
+    assert (payload['kind'], payload['program']) == ('routines', 'BCA')
+    assert len(payload['names']) == len(set(payload['names'])) == 5
+    assert _cell(payload, payload['routines']['2'], "Tuesday", 1) == ["Networks", "Bikash Shah"]
+    assert _cell(payload, payload['routines']['1'], "Sunday", 3) == ["Databases", "Bikash Shah"]
+    assert payload['routines']['3'] == {'error': 'No routine found for BCA Semester 3'}
+
+def test_teacher_grid_lists_program_and_semester(routine):
+    payload = build_teacher_routine_grid(routine, "T2")
+    
+    assert (payload['kind'], payload['teacher_name']) == ('teacher', 'Bikash Shah')
+    assert _cell(payload, payload, "Tuesday", 1) == ["Networks", "BCA", 2]
+    assert _cell(payload, payload, "Sunday", 3) == ["Databases", "BCA", 1]
+
+def test_grid_json_is_compact(routine):
+    payload = build_routine_grid(routine, "BCA", 1)
+    body = encode_routine(payload, GRID_JSON)
+    
+    assert body == json.dumps(payload, separators=(',', ':')).encode()
+    assert b', ' not in body and b': ' not in body
+
+@pytest.fixture
+def asgi(routine, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = importlib.import_module("asgi_app").RoutineASGIApp(routine)
+    yield app
+    app.bus.close()
+    app.adb.shutdown()
+
+def _get(app, path, query=b'', accept=None):
+    """Status, content type and body of one GET through the ASGI interface"""
+    sent = []
+    headers = [(b'accept', accept.encode())] if accept else []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        sent.append(message)
+    
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query, 'headers': headers}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]['status'], dict(sent[0]['headers'])[b'content-type'].decode(), sent[1]['body']
+
+def test_routine_endpoint_negotiates_the_grid(asgi, routine):
+    status, content_type, body = _get(asgi, '/get_routine/BCA/1')
+    assert (status, content_type) == (200, 'application/json')
+    assert 'grid' not in json.loads(body)
+    
+    for query, accept in [(b'', GRID_JSON), (b'format=grid', None)]:
+        status, content_type, body = _get(asgi, '/get_routine/BCA/1', query, accept)
+        assert (status, content_type) == (200, GRID_JSON)
+        assert body == encode_routine(build_routine_grid(routine, "BCA", 1), GRID_JSON)
+
+def test_routines_endpoint_always_sends_grids(asgi):
+    status, content_type, body = _get(asgi, '/get_routines', b'program=BCA&semesters=1-2')
+    
+    assert (status, content_type) == (200, GRID_JSON)
+    assert sorted(json.loads(body)['routines']) == ['1', '2']
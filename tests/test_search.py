@@ -0,0 +1,121 @@
+import sqlite3
+
+import pytest
+
+import search
+from database import DatabaseManager
+from search import fts_query, search_entities, search_words, typeahead
+
+def _codes(db, text, kinds=("course", "teacher")):
+    return [hit["code"] for hit in search_entities(db, text, kinds)]
+
+def test_words_match_as_prefixes(catalog):
+    assert _codes(catalog, "algo") == ["C1"]
+    assert _codes(catalog, "anit ra") == ["T1"]
+    assert _codes(catalog, "anita databases") == []
+
+def test_codes_rank_above_names(catalog):
+    catalog.add_course("DB1", "Distributed Systems", 3)
+    catalog.add_course("C9", "Intro to DB1 tuning", 3)
+    
+    assert _codes(catalog, "db1", ("course",)) == ["DB1", "C9"]
+
+def test_operator_words_are_searched_as_text(catalog):
+    catalog.add_course("C4", "Logic AND Sets", 3)
+    
+    assert fts_query(search_words("and or")) == '"and"* "or"*'
+    assert _codes(catalog, "AND") == ["C4"]
+    assert _codes(catalog, '"') == []
+
+def test_triggers_follow_inserts_updates_and_deletes(catalog):
+    catalog.add_teacher("T3", "Chandra Karki", "Lecturer")
+    assert _codes(catalog, "chandra") == ["T3"]
+    
+    catalog.update_teacher("T3", "Deepa Karki", "Lecturer")
+    assert _codes(catalog, "chandra") == []
+    assert _codes(catalog, "deepa") == ["T3"]
+    
+    catalog.delete_teacher("T3")
+    assert _codes(catalog, "karki") == []
+    
+    _assert_index_matches_tables(catalog.db_name)
+
+def _assert_index_matches_tables(path):
+    conn = sqlite3.connect(path)
+    assert sorted(conn.execute("SELECT Course_Code, Course_Name FROM Course_Search")) == sorted(
+        conn.execute("SELECT Course_Code, Course_Name FROM Course"))
+    assert sorted(conn.execute("SELECT Teacher_Code, Teacher_Name, Teacher_Designation FROM Teacher_Search")) == sorted(
+        conn.execute("SELECT Teacher_Code, Teacher_Name, Teacher_Designation FROM Teacher"))
+    for fts in ("Course_Search", "Teacher_Search"):
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('integrity-check')")
+    conn.close()
+
+def test_undo_and_bulk_imports_keep_the_index_in_step(catalog):
+    catalog.update_course("C2", "Data Mining", 3)
+    catalog.undo_changes()
+    assert _codes(catalog, "mining") == []
+    assert _codes(catalog, "databases") == ["C2"]
+    
+    catalog.upsert_courses([("C2", "Data Warehousing", 3), ("C5", "Compilers", 3)])
+    assert _codes(catalog, "warehous") == ["C2"]
+    assert _codes(catalog, "compil") == ["C5"]
+
+def test_existing_rows_are_indexed_when_the_index_is_created(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE Course (Course_Code TEXT PRIMARY KEY, Course_Name TEXT NOT NULL, Credit_hrs INTEGER)")
+    conn.execute("INSERT INTO Course VALUES ('C7', 'Graph Theory', 3)")
+    conn.commit()
+    conn.close()
+    
+    db = DatabaseManager(db_path)
+    assert _codes(db, "graph") == ["C7"]
+
+def test_unknown_kind_is_rejected(catalog):
+    with pytest.raises(ValueError, match="Unknown search kind"):
+        search_entities(catalog, "algo", ("room",))
+
+def test_typeahead_lists_codes_when_empty(catalog):
+    assert [option["value"] for option in typeahead(catalog, "course", "")] == ["C1", "C2", "C3"]
+    assert typeahead(catalog, "teacher", "bik") == [{"value": "T2", "label": "T2 - Bikash Shah"}]
+
+def test_hits_do_not_depend_on_base_table_rowids(catalog):
+    catalog.delete_course("C1")
+    catalog.add_course("C4", "Compilers", 3)
+    conn = sqlite3.connect(catalog.db_name)
+    conn.execute("VACUUM")
+    conn.close()
+    
+    assert _codes(catalog, "compil") == ["C4"]
+    assert _codes(catalog, "networks") == ["C3"]
+    _assert_index_matches_tables(catalog.db_name)
+
+def test_rowid_keyed_index_is_rebuilt(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE Course (Course_Code TEXT PRIMARY KEY, Course_Name TEXT NOT NULL, Credit_hrs INTEGER)")
+    conn.execute("INSERT INTO Course VALUES ('C7', 'Graph Theory', 3)")
+    conn.execute("""CREATE VIRTUAL TABLE Course_Search
+                    USING fts5(Course_Code, Course_Name, content='Course', content_rowid='rowid')""")
+    conn.execute("""CREATE TRIGGER Course_Search_insert AFTER INSERT ON Course BEGIN
+                    INSERT INTO Course_Search (rowid, Course_Code, Course_Name) VALUES (new.rowid, new.Course_Code, new.Course_Name);
+                    END""")
+    conn.commit()
+    conn.close()
+    
+    db = DatabaseManager(db_path)
+    db.add_course("C8", "Graph Mining", 3)
+    
+    assert sorted(_codes(db, "graph", ("course",))) == ["C7", "C8"]
+    _assert_index_matches_tables(db_path)
+
+def test_sqlite_without_fts5_searches_with_like(catalog, db_path, monkeypatch):
+    monkeypatch.setattr(search, "fts5_available", lambda cursor: False)
+    
+    db = DatabaseManager(db_path)
+    
+    assert not db.full_text_search
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_Search_%'").fetchone() == (0,)
+    conn.close()
+    assert db.update_course("C1", "Advanced Algorithms", 4)
+    assert _codes(db, "advanced algo") == ["C1"]
+    assert typeahead(db, "teacher", "bik") == [{"value": "T2", "label": "T2 - Bikash Shah"}]
@@ -0,0 +1,36 @@
+import pytest
+
+from academic_calendar import DEFAULT_CALENDAR
+from utils import parse_semester_list
+
+PROGRAM = DEFAULT_CALENDAR.programs[0]
+
+@pytest.mark.parametrize("text, expected", [
+    ("", list(DEFAULT_CALENDAR.semesters_for(PROGRAM))),
+    ("1-3", [1, 2, 3]),
+    ("3-3", [3]),
+    ("1,3,5-6", [1, 3, 5, 6]),
+    ("2,1-2", [2, 1]),
+])
+def test_valid_lists(text, expected):
+    assert parse_semester_list(DEFAULT_CALENDAR, PROGRAM, text) == ([], expected)
+
+def test_reversed_range_is_an_error():
+    errors, semesters = parse_semester_list(DEFAULT_CALENDAR, PROGRAM, "8-1")
+    assert semesters == []
+    assert errors == ["Invalid semester range: 8-1 (start is after end)"]
+
+def test_reversed_range_does_not_hide_the_rest():
+    errors, semesters = parse_semester_list(DEFAULT_CALENDAR, PROGRAM, "4-2,1")
+    assert semesters == [1]
+    assert len(errors) == 1 and errors[0].startswith("Invalid semester range: 4-2")
+
+@pytest.mark.parametrize("text", ["x", "1-b", "-3"])
+def test_unreadable_ranges_are_errors(text):
+    errors, _ = parse_semester_list(DEFAULT_CALENDAR, PROGRAM, text)
+    assert errors == [f"Invalid semester range: {text}"]
+
+def test_unknown_program_and_semester():
+    assert parse_semester_list(DEFAULT_CALENDAR, "NOPE", "1") == (["Unknown program: NOPE"], [])
+    errors, _ = parse_semester_list(DEFAULT_CALENDAR, PROGRAM, "99")
+    assert errors == [f"{PROGRAM} has no semester 99"]
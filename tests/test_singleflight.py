@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+    
+    def build():
+        executions.append(1)
+        release.wait(5)
+        return {"routine": "BCA 3"}
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do(("routine", "BCA", 3), build)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    # Hold the build until the other seven callers have joined it
+    for _ in range(500):
+        running = flight._flights.get(("routine", "BCA", 3))
+        if running is not None and running.waiters == 7:
+            break
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert executions == [1]
+    assert results == [{"routine": "BCA 3"}] * 8
+    assert all(result is results[0] for result in results)
+    stats = flight.stats.snapshot()
+    assert (stats["calls"], stats["executions"], stats["coalesced_waiters"], stats["max_waiters"]) == (8, 1, 7, 7)
+    assert stats["coalesce_ratio"] == 0.875
+
+def test_results_are_not_reused_after_the_flight_lands():
+    flight = SingleFlight()
+    calls = iter(range(10))
+    
+    assert flight.do("key", lambda: next(calls)) == 0
+    assert flight.do("key", lambda: next(calls)) == 1
+    assert flight.do("other", lambda: next(calls)) == 2
+    assert flight.stats.snapshot()["coalesced_waiters"] == 0
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+    
+    def fail():
+        raise LookupError("no such routine")
+    
+    with pytest.raises(LookupError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "ok") == "ok"
+    assert flight.stats.snapshot()["errors"] == 1
+
+def test_async_callers_share_one_execution():
+    flight = AsyncSingleFlight()
+    executions = []
+    
+    async def build(program):
+        executions.append(program)
+        await asyncio.sleep(0.01)
+        return [program]
+    
+    async def burst():
+        return await asyncio.gather(*(flight.do(("routine", "BCA"), build, "BCA") for _ in range(5)),
+                                    flight.do(("routine", "BIT"), build, "BIT"))
+    results = asyncio.run(burst())
+    
+    assert sorted(executions) == ["BCA", "BIT"]
+    assert results == [["BCA"]] * 5 + [["BIT"]]
+    stats = flight.stats.snapshot()
+    assert (stats["calls"], stats["executions"], stats["coalesced_waiters"], stats["max_waiters"]) == (6, 2, 4, 4)
+
+def test_async_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = AsyncSingleFlight()
+    
+    async def build():
+        await asyncio.sleep(0.02)
+        return "payload"
+    
+    async def scenario():
+        impatient = asyncio.ensure_future(flight.do("key", build))
+        patient = asyncio.ensure_future(flight.do("key", build))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        return await patient
+    
+    assert asyncio.run(scenario()) == "payload"
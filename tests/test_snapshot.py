@@ -0,0 +1,83 @@
+import os
+import sqlite3
+
+import pytest
+
+import storage
+from database import DatabaseManager
+from storage import SQLiteSnapshot
+
+@pytest.fixture
+def primary(db):
+    """Path of a migrated database file with one course"""
+    db.add_course("C1", "Algorithms", 3)
+    return db.db_name
+
+def _write_course(path, code):
+    """Commit a row behind the snapshot's back, as another process would"""
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO Course (Course_Code, Course_Name, Credit_hrs) VALUES (?, 'Other', 3)", (code,))
+    conn.commit()
+    conn.close()
+
+def _course_codes(snapshot):
+    conn = snapshot.connect()
+    try:
+        return {code for code, in conn.execute("SELECT Course_Code FROM Course")}
+    finally:
+        conn.close()
+
+def test_other_writers_show_up_once_the_snapshot_is_too_old(primary):
+    snapshot = SQLiteSnapshot(primary, max_staleness=5.0)
+    assert _course_codes(snapshot) == {"C1"}
+    
+    _write_course(primary, "C2")
+    assert _course_codes(snapshot) == {"C1"}
+    
+    snapshot._refreshed_at -= 6.0
+    assert _course_codes(snapshot) == {"C1", "C2"}
+    assert snapshot.stats["refreshes"] == 2
+
+def test_local_writes_are_read_back_immediately(db_path):
+    db = DatabaseManager(db_path, read_snapshot_staleness=60.0)
+    db.snapshot.min_refresh_interval = 60.0
+    db.get_courses()
+    
+    for i in range(20):
+        db.add_course(f"C{i}", f"Course {i}", 3)
+        assert f"C{i}" in set(db.get_courses()["Course_Code"])
+    
+    # Write-then-read pairs inside the refresh interval go to the primary instead of recopying
+    assert db.snapshot.stats == {"refreshes": 1, "primary_reads": 20}
+
+def test_dirty_snapshot_is_refreshed_after_the_interval(primary):
+    snapshot = SQLiteSnapshot(primary, max_staleness=60.0, min_refresh_interval=0.25)
+    _course_codes(snapshot)
+    
+    _write_course(primary, "C2")
+    snapshot.mark_stale()
+    assert _course_codes(snapshot) == {"C1", "C2"}
+    assert snapshot.stats == {"refreshes": 1, "primary_reads": 1}
+    assert snapshot.is_dirty()
+    
+    snapshot._refreshed_at -= 1.0
+    assert _course_codes(snapshot) == {"C1", "C2"}
+    assert snapshot.stats == {"refreshes": 2, "primary_reads": 1}
+    assert not snapshot.is_dirty()
+
+def test_write_during_a_refresh_keeps_the_snapshot_dirty(primary, monkeypatch):
+    snapshot = SQLiteSnapshot(primary)
+    real_replace = os.replace
+    
+    def replace_after_a_write(src, dst):
+        # A write commits after the copy was taken but before it is swapped in
+        _write_course(primary, "C2")
+        snapshot.mark_stale()
+        real_replace(src, dst)
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(storage.os, "replace", replace_after_a_write)
+        snapshot.refresh()
+    
+    assert snapshot.is_dirty()
+    assert "C2" in _course_codes(snapshot)
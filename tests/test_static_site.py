@@ -0,0 +1,85 @@
+import json
+import os
+
+import pytest
+
+import static_site
+from static_site import MANIFEST_NAME, build_site
+
+@pytest.fixture
+def site(tmp_path):
+    return str(tmp_path / "site")
+
+def _manifest(site):
+    with open(os.path.join(site, MANIFEST_NAME), encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture
+def written(monkeypatch):
+    """Paths the next builds write, in order"""
+    paths = []
+    real_write = static_site._write
+    
+    def write(out_dir, path, content):
+        paths.append(path)
+        real_write(out_dir, path, content)
+    monkeypatch.setattr(static_site, "_write", write)
+    return paths
+
+def test_first_build_writes_every_page(catalog, site):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    
+    summary = build_site(catalog, site)
+    
+    # 3 programs x 8 semesters plus two teachers, three files each, and the selector pages
+    assert summary["full_rebuild"]
+    assert summary["pages"] == 26
+    assert summary["files_written"] == 26 * 3 + 3
+    with open(os.path.join(site, "data", "routine", "BCA", "1.json"), encoding="utf-8") as f:
+        assert "Algorithms" in f.read()
+    assert os.path.exists(os.path.join(site, "teacher", "T1.html"))
+    assert os.path.exists(os.path.join(site, "ics", "teacher", "T2.ics"))
+
+def test_unchanged_data_rebuilds_nothing(catalog, site):
+    build_site(catalog, site)
+    
+    summary = build_site(catalog, site)
+    
+    assert (summary["full_rebuild"], summary["pages"], summary["files_written"]) == (False, 0, 0)
+    # The catalog fixture wrote two batches
+    assert _manifest(site)["batches"] == {"1": 0, "2": 0}
+
+def test_only_pages_touched_since_the_last_build_are_regenerated(catalog, site, written):
+    build_site(catalog, site)
+    written.clear()
+    
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    summary = build_site(catalog, site)
+    
+    assert (summary["full_rebuild"], summary["pages"]) == (False, 2)
+    assert set(written) - {MANIFEST_NAME} == {"routine/BCA/1.html", "data/routine/BCA/1.json", "ics/routine/BCA/1.ics",
+                       "teacher/T1.html", "data/teacher/T1.json", "ics/teacher/T1.ics"}
+    
+    # Undone batches count as changes too
+    catalog.undo_changes()
+    assert build_site(catalog, site)["pages"] == 2
+    with open(os.path.join(site, "data", "routine", "BCA", "1.json"), encoding="utf-8") as f:
+        assert "Algorithms" not in f.read()
+
+def test_removed_teachers_lose_their_pages(catalog, site):
+    build_site(catalog, site)
+    
+    catalog.delete_teacher("T2")
+    summary = build_site(catalog, site)
+    
+    assert summary["files_removed"] == 3
+    assert not os.path.exists(os.path.join(site, "teacher", "T2.html"))
+    with open(os.path.join(site, "teacher_routines.html"), encoding="utf-8") as f:
+        assert "T2" not in f.read()
+
+def test_calendar_edits_and_full_flag_rebuild_everything(catalog, site):
+    build_site(catalog, site)
+    
+    catalog.set_calendar_days(["Sunday", "Monday"])
+    assert build_site(catalog, site)["full_rebuild"]
+    assert build_site(catalog, site, full=True)["pages"] == 26
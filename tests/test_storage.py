@@ -0,0 +1,154 @@
+import pytest
+
+from storage import ConnectionPool, TranslatingCursor, translate_insert_or, translate_placeholders
+
+class FakeConnection:
+    """Driver connection that records what the pool does with it"""
+    
+    def __init__(self, name, broken=False):
+        self.name = name
+        self.broken = broken
+        self.calls = []
+    
+    def ping(self, reconnect=False):
+        self.calls.append("ping")
+    
+    def rollback(self):
+        self.calls.append("rollback")
+        if self.broken:
+            raise ConnectionError("server has gone away")
+    
+    def close(self):
+        self.calls.append("close")
+
+class FakeCursor:
+    def __init__(self):
+        self.statements = []
+    
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+    
+    def executemany(self, sql, seq_of_params):
+        self.statements.append((sql, seq_of_params))
+
+def _pool(max_size=2, timeout=0.05):
+    opened = []
+    
+    def factory():
+        opened.append(FakeConnection(f"raw{len(opened)}"))
+        return opened[-1]
+    return ConnectionPool(factory, max_size=max_size, timeout=timeout), opened
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT * FROM Course WHERE Course_Code = ?", "SELECT * FROM Course WHERE Course_Code = %s"),
+    ("SELECT '?' WHERE a = ?", "SELECT '?' WHERE a = %s"),
+    ("SELECT 'it''s ?', \"x?\", `y?` FROM t WHERE a = ?", "SELECT 'it''s ?', \"x?\", `y?` FROM t WHERE a = %s"),
+    ("SELECT 'a\\'?' WHERE b = ?", "SELECT 'a\\'?' WHERE b = %s"),
+    ("SELECT * FROM t WHERE name LIKE '50%' AND n % 2 = ?", "SELECT * FROM t WHERE name LIKE '50%%' AND n %% 2 = %s"),
+])
+def test_placeholders_outside_quotes_are_translated(sql, expected):
+    assert translate_placeholders(sql) == expected
+
+@pytest.mark.parametrize("sql, expected", [
+    ("INSERT OR REPLACE INTO t (a) VALUES (?)", "REPLACE INTO t (a) VALUES (?)"),
+    ("\n  insert or ignore into t (a) VALUES (?)", "\n  INSERT IGNORE into t (a) VALUES (?)"),
+    ("INSERT INTO t (a) VALUES ('INSERT OR REPLACE')", "INSERT INTO t (a) VALUES ('INSERT OR REPLACE')"),
+])
+def test_sqlite_conflict_clauses_are_rewritten(sql, expected):
+    assert translate_insert_or(sql) == expected
+
+def test_cursor_only_formats_statements_with_parameters():
+    raw = FakeCursor()
+    cursor = TranslatingCursor(raw)
+    
+    cursor.execute("SELECT '100%'")
+    cursor.execute("INSERT OR IGNORE INTO t (a, b) VALUES (?, ?)", [1, "50%"])
+    cursor.executemany("DELETE FROM t WHERE a = ?", [[1], [2]])
+    
+    assert raw.statements == [
+        ("SELECT '100%'", None),
+        ("INSERT IGNORE INTO t (a, b) VALUES (%s, %s)", (1, "50%")),
+        ("DELETE FROM t WHERE a = %s", [(1,), (2,)]),
+    ]
+
+def test_released_connections_are_rolled_back_and_reused_newest_first():
+    pool, opened = _pool()
+    first, second = pool.acquire(), pool.acquire()
+    first.close()
+    second.close()
+    
+    again = pool.acquire()
+    
+    assert len(opened) == 2
+    assert again._raw is opened[1]
+    assert opened[1].calls == ["rollback", "ping"]
+    assert opened[0].calls == ["rollback"]
+
+def test_closing_twice_returns_the_connection_once():
+    pool, opened = _pool(max_size=1)
+    conn = pool.acquire()
+    conn.close()
+    conn.close()
+    
+    pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+def test_borrowers_beyond_the_limit_time_out_until_a_connection_returns():
+    pool, opened = _pool(max_size=2)
+    held = [pool.acquire(), pool.acquire()]
+    
+    with pytest.raises(TimeoutError, match="Timed out waiting"):
+        pool.acquire()
+    
+    held[0].close()
+    assert pool.acquire()._raw is opened[0]
+    assert len(opened) == 2
+
+def test_unusable_connections_are_dropped_and_free_their_slot():
+    pool, opened = _pool(max_size=1)
+    conn = pool.acquire()
+    opened[0].broken = True
+    conn.close()
+    
+    assert opened[0].calls == ["rollback", "close"]
+    assert pool.acquire()._raw is opened[1]
+
+def test_failed_connect_frees_its_slot():
+    attempts = []
+    
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("refused")
+        return FakeConnection("raw")
+    pool = ConnectionPool(factory, max_size=1, timeout=0.05)
+    
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+    assert pool.acquire()._raw.name == "raw"
+
+def test_close_closes_idle_connections():
+    pool, opened = _pool()
+    held = pool.acquire()
+    pool.acquire().close()
+    
+    pool.close()
+    
+    assert opened[1].calls[-1] == "close"
+    assert "close" not in opened[0].calls
+    held.close()
+
+def test_mysql_upserts_use_on_duplicate_key():
+    pytest.importorskip("pymysql")
+    from storage import MySQLBackend
+    
+    # The pool only connects on first use
+    backend = MySQLBackend()
+    
+    assert backend.upsert_sql("Course", ("Course_Code", "Course_Name", "Created_At"), ("Course_Code",),
+                              insert_only=("Created_At",)) == (
+        "INSERT INTO Course (Course_Code, Course_Name, Created_At) VALUES (?, ?, ?) "
+        "ON DUPLICATE KEY UPDATE Course_Name = VALUES(Course_Name)")
+    assert backend.upsert_sql("Teacher_Unavailable", ("Teacher_Code", "Day"), ("Teacher_Code", "Day")) == (
+        "INSERT IGNORE INTO Teacher_Unavailable (Teacher_Code, Day) VALUES (?, ?)")
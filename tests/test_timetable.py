@@ -0,0 +1,57 @@
+import numpy as np
+
+from models import CourseAssignment
+from timetable import CompactTimetable, Interner
+
+ROWS = [("T1", "C1", 1, "BCA", 1, "Sunday"), ("T2", "C2", 2, "BIT", 3, "Monday"),
+        ("T1", "C3", 6, "BCA", 2, "Friday")]
+
+def test_interner_assigns_dense_ids_in_first_seen_order():
+    interner = Interner(["BCA", "BIT"])
+    
+    assert interner.intern("BIT") == 1
+    assert interner.intern("MBA") == 2
+    assert interner[2] == "MBA" and "MBA" in interner and len(interner) == 3
+    assert interner.get("BBA") is None
+
+def test_rows_round_trip_and_days_follow_the_calendar():
+    timetable = CompactTimetable()
+    timetable.extend(ROWS)
+    
+    assert list(timetable.rows()) == ROWS
+    assert timetable.to_assignments()[1] == CourseAssignment("T2", "C2", 2, "BIT", 3, "Monday")
+    # Calendar order, not first-seen order: Friday keeps its weekday id
+    assert timetable.days.get("Friday") == 5
+    assert timetable.columns()["day"].tolist() == [0, 1, 5]
+
+def test_eight_bytes_per_assignment():
+    timetable = CompactTimetable()
+    timetable.extend(ROWS * 1000)
+    
+    report = timetable.memory_report()
+    
+    assert report["assignments"] == 3000
+    assert report["bytes_per_assignment"] == 8
+    assert report["mb_per_million_assignments"] < 8
+
+def test_tensor_places_every_class_in_its_slot():
+    timetable = CompactTimetable()
+    timetable.extend(ROWS)
+    
+    courses, teachers = timetable.to_tensor()
+    
+    assert courses.shape == timetable.shape()
+    assert courses[timetable.programs.get("BIT"), 3, 1, 2] == timetable.courses.get("C2") + 1
+    assert teachers[0, 2, 5, 6] == timetable.teachers.get("T1") + 1
+    assert np.count_nonzero(courses) == 3
+
+def test_load_and_save_through_the_database(catalog, stored_assignments):
+    catalog.bulk_assign_course_teachers(ROWS)
+    
+    timetable = CompactTimetable.load(catalog)
+    
+    assert sorted(timetable.rows()) == sorted(ROWS)
+    assert timetable.data_version == catalog.get_data_version()
+    timetable.period[0] = 4
+    assert timetable.save(catalog) == 3
+    assert ("T1", "C1", "BCA", 1, "Sunday", 4) in stored_assignments()
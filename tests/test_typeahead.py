@@ -0,0 +1,88 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+
+from search import typeahead
+
+@pytest.fixture
+def many_teachers(catalog):
+    """catalog plus 30 more teachers, T03 to T32"""
+    catalog.upsert_teachers([(f"T{i:02d}", f"Guest Teacher {i}", "Lecturer") for i in range(3, 33)])
+    return catalog
+
+def test_empty_query_lists_the_first_codes(many_teachers):
+    options = typeahead(many_teachers, "teacher", "", 4)
+    
+    assert options == [{"value": "T03", "label": "T03 - Guest Teacher 3"},
+                       {"value": "T04", "label": "T04 - Guest Teacher 4"},
+                       {"value": "T05", "label": "T05 - Guest Teacher 5"},
+                       {"value": "T06", "label": "T06 - Guest Teacher 6"}]
+
+def test_options_are_capped(many_teachers):
+    assert len(typeahead(many_teachers, "teacher", "")) == 10
+    assert len(typeahead(many_teachers, "teacher", "guest")) == 10
+    assert len(typeahead(many_teachers, "teacher", "guest", 0)) == 1
+
+def test_query_narrows_to_matching_names(many_teachers):
+    assert typeahead(many_teachers, "teacher", "anit") == [{"value": "T1", "label": "T1 - Anita Rai"}]
+    assert typeahead(many_teachers, "course", "net") == [{"value": "C3", "label": "C3 - Networks"}]
+
+def test_unknown_kind_is_rejected(catalog):
+    with pytest.raises(ValueError, match="Unknown search kind: room"):
+        typeahead(catalog, "room", "")
+
+@pytest.fixture
+def asgi(many_teachers, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = importlib.import_module("asgi_app").RoutineASGIApp(many_teachers)
+    yield app
+    app.bus.close()
+    app.adb.shutdown()
+
+def _asgi_get(app, path, query):
+    sent = []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        sent.append(message)
+    
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query, 'headers': []}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+def test_asgi_typeahead_endpoint(asgi):
+    assert _asgi_get(asgi, '/api/typeahead/course', b'q=data') == (
+        200, {'options': [{'value': 'C2', 'label': 'C2 - Databases'}]})
+    status, payload = _asgi_get(asgi, '/api/typeahead/teacher', b'limit=3')
+    assert (status, [option['value'] for option in payload['options']]) == (200, ['T03', 'T04', 'T05'])
+    assert _asgi_get(asgi, '/api/typeahead/teacher', b'limit=many') == (400, {'error': 'Invalid limit value.'})
+    assert _asgi_get(asgi, '/api/typeahead/room', b'') == (400, {'error': 'Unknown search kind: room'})
+
+@pytest.fixture
+def client(many_teachers, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    flask_app = importlib.import_module("flask_app")
+    monkeypatch.setattr(flask_app, "db", many_teachers)
+    return flask_app.app.test_client()
+
+def test_flask_typeahead_endpoint(client):
+    response = client.get('/typeahead/teacher?q=bik')
+    assert (response.status_code, response.get_json()) == (
+        200, {'options': [{'value': 'T2', 'label': 'T2 - Bikash Shah'}]})
+    assert len(client.get('/typeahead/course').get_json()['options']) == 3
+    assert len(client.get('/typeahead/teacher?q=guest&limit=2').get_json()['options']) == 2
+    response = client.get('/typeahead/room')
+    assert (response.status_code, response.get_json()) == (400, {'error': 'Unknown search kind: room'})
+
+def test_assignments_page_does_not_list_the_catalog(client):
+    response = client.get('/assignments')
+    
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert 'data-typeahead="teacher"' in page and 'data-typeahead="course"' in page
+    assert 'Guest Teacher' not in page
+    assert 'Bikash Shah' not in page
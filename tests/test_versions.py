@@ -0,0 +1,60 @@
+import sqlite3
+
+def _versions(db):
+    return db.get_timetable_versions().set_index("Version_Id")
+
+def _rows(frame):
+    return set(zip(frame["Teacher_Code"], frame["Course_Code"], frame["Program"],
+                   frame["Semester"].astype(int), frame["Day"], frame["Period"].astype(int)))
+
+def test_diff_against_the_working_timetable(catalog):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    catalog.assign_course_teacher("T2", "C2", 2, "BCA", 1, "Sunday")
+    version_id = catalog.create_timetable_version("2026-spring", "Draft 1")
+    
+    catalog.remove_course_assignment("T1", "C1", "BCA", 1, "Sunday", 1)
+    catalog.assign_course_teacher("T1", "C3", 3, "BIT", 2, "Monday")
+    
+    diff = catalog.diff_timetable_versions(version_id, None)
+    assert _rows(diff["added"]) == {("T1", "C3", "BIT", 2, "Monday", 3)}
+    assert _rows(diff["removed"]) == {("T1", "C1", "BCA", 1, "Sunday", 1)}
+    
+    reverse = catalog.diff_timetable_versions(None, version_id)
+    assert _rows(reverse["added"]) == _rows(diff["removed"])
+    assert _rows(reverse["removed"]) == _rows(diff["added"])
+
+def test_identical_versions_have_an_empty_diff(catalog):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    first = catalog.create_timetable_version("2026-spring", "Draft 1")
+    clone = catalog.create_timetable_version("2026-spring", "Clone", source_version_id=first)
+    
+    diff = catalog.diff_timetable_versions(first, clone)
+    assert diff["added"].empty and diff["removed"].empty
+    assert _versions(catalog).loc[clone, "Parent_Version_Id"] == first
+
+def test_diff_ignores_row_timestamps(catalog, db_path):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    version_id = catalog.create_timetable_version("2026-spring", "Draft 1")
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE Course_Teacher SET Updated_At = '2030-01-01T00:00:00'")
+    conn.commit()
+    conn.close()
+    
+    diff = catalog.diff_timetable_versions(version_id, None)
+    assert diff["added"].empty and diff["removed"].empty
+
+def test_only_drafts_can_be_saved_or_deleted(catalog):
+    catalog.assign_course_teacher("T1", "C1", 1, "BCA", 1, "Sunday")
+    first = catalog.create_timetable_version("2026-spring", "Draft 1")
+    second = catalog.create_timetable_version("2026-spring", "Draft 2")
+    
+    assert catalog.publish_timetable_version(first)
+    assert not catalog.save_timetable_version(first)
+    assert not catalog.delete_timetable_version(first)
+    
+    # Publishing another version of the term sends the first back to draft
+    assert catalog.publish_timetable_version(second)
+    statuses = _versions(catalog)["Status"]
+    assert (statuses[first], statuses[second]) == ("draft", "published")
+    assert catalog.delete_timetable_version(first)
+    assert not catalog.publish_timetable_version(first)
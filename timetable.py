@@ -0,0 +1,188 @@
+import sys
+from array import array
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import journal
+from academic_calendar import AcademicCalendar, DEFAULT_CALENDAR
+from models import CourseAssignment
+
+class Interner:
+    """Two-way mapping between codes and dense small integers"""
+    
+    def __init__(self, values: Iterable[Hashable] = ()):
+        self._index: Dict[Hashable, int] = {}
+        self.values: List[Hashable] = []
+        for value in values:
+            self.intern(value)
+    
+    def intern(self, value: Hashable) -> int:
+        """Get the id for value, assigning the next id if it is new"""
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self._index[value] = idx
+            self.values.append(value)
+        return idx
+    
+    def get(self, value: Hashable, default: Optional[int] = None) -> Optional[int]:
+        """Get the id for value without interning it"""
+        return self._index.get(value, default)
+    
+    def __getitem__(self, idx: int) -> Hashable:
+        return self.values[idx]
+    
+    def __contains__(self, value: Hashable) -> bool:
+        return value in self._index
+    
+    def __len__(self) -> int:
+        return len(self.values)
+
+class CompactTimetable:
+    """Columnar in-memory timetable with interned codes.
+    
+    One assignment costs 8 bytes: uint16 teacher and course ids plus uint8
+    program, semester, day and period. Days and programs are seeded from
+    the academic calendar so their ids follow the configured order.
+    """
+    
+    def __init__(self, calendar: AcademicCalendar = DEFAULT_CALENDAR):
+        self.calendar = calendar
+        # get_data_version() of the database this was loaded from, checked again on save
+        self.data_version: Optional[str] = None
+        self.teachers = Interner()
+        self.courses = Interner()
+        self.programs = Interner(calendar.programs)
+        self.days = Interner(calendar.days)
+        self.teacher = array('H')
+        self.course = array('H')
+        self.program = array('B')
+        self.semester = array('B')
+        self.day = array('B')
+        self.period = array('B')
+    
+    def __len__(self) -> int:
+        return len(self.teacher)
+    
+    def append(self, teacher_code: str, course_code: str, period: int,
+               program: str, semester: int, day: str):
+        """Add one assignment (argument order matches assign_course_teacher)"""
+        self.teacher.append(self.teachers.intern(teacher_code))
+        self.course.append(self.courses.intern(course_code))
+        self.program.append(self.programs.intern(program))
+        self.semester.append(int(semester))
+        self.day.append(self.days.intern(day))
+        self.period.append(int(period))
+    
+    def extend(self, rows: Iterable[Sequence]):
+        """Add many (teacher, course, period, program, semester, day) rows"""
+        # Bound methods hoisted out of the loop; this is the hot path of load()
+        teachers, courses = self.teachers.intern, self.courses.intern
+        programs, days = self.programs.intern, self.days.intern
+        teacher, course, program = self.teacher.append, self.course.append, self.program.append
+        semester, day, period = self.semester.append, self.day.append, self.period.append
+        for t, c, p, prog, sem, d in rows:
+            teacher(teachers(t))
+            course(courses(c))
+            program(programs(prog))
+            semester(sem)
+            day(days(d))
+            period(p)
+    
+    def row(self, i: int) -> Tuple[str, str, int, str, int, str]:
+        """Decode assignment i back to (teacher, course, period, program, semester, day)"""
+        return (self.teachers[self.teacher[i]], self.courses[self.course[i]], self.period[i],
+                self.programs[self.program[i]], self.semester[i], self.days[self.day[i]])
+    
+    def rows(self) -> Iterator[Tuple[str, str, int, str, int, str]]:
+        """Iterate decoded assignments"""
+        for i in range(len(self)):
+            yield self.row(i)
+    
+    def to_assignments(self) -> List[CourseAssignment]:
+        """Expand into CourseAssignment dataclasses"""
+        return [CourseAssignment(*row) for row in self.rows()]
+    
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Zero-copy NumPy views over the id columns"""
+        return {
+            'teacher': np.frombuffer(self.teacher, dtype=np.uint16),
+            'course': np.frombuffer(self.course, dtype=np.uint16),
+            'program': np.frombuffer(self.program, dtype=np.uint8),
+            'semester': np.frombuffer(self.semester, dtype=np.uint8),
+            'day': np.frombuffer(self.day, dtype=np.uint8),
+            'period': np.frombuffer(self.period, dtype=np.uint8)
+        }
+    
+    def shape(self) -> Tuple[int, int, int, int]:
+        """Dense [program, semester, day, period] grid dimensions"""
+        return (len(self.programs),
+                max(max(self.semester, default=0), max(self.calendar.semesters, default=0)) + 1,
+                len(self.days),
+                max(max(self.period, default=0), self.calendar.max_period) + 1)
+    
+    def to_tensor(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Dense course and teacher grids indexed [program, semester, day, period].
+        
+        Cells hold id + 1 (0 means free). If a class slot is double-booked the
+        last assignment wins, so audit the timetable before relying on the grid.
+        """
+        cols = self.columns()
+        course_grid = np.zeros(self.shape(), dtype=np.uint16)
+        teacher_grid = np.zeros(self.shape(), dtype=np.uint16)
+        index = (cols['program'], cols['semester'], cols['day'], cols['period'])
+        course_grid[index] = cols['course'] + 1
+        teacher_grid[index] = cols['teacher'] + 1
+        return course_grid, teacher_grid
+    
+    def nbytes(self) -> int:
+        """Bytes held by the assignment columns"""
+        return sum(col.itemsize * len(col) for col in
+                   (self.teacher, self.course, self.program, self.semester, self.day, self.period))
+    
+    def memory_report(self) -> Dict[str, float]:
+        """Memory use of the columns and interners, scaled to a million assignments"""
+        column_bytes = self.nbytes()
+        interner_bytes = sum(
+            sys.getsizeof(interner.values) + sys.getsizeof(interner._index)
+            + sum(sys.getsizeof(v) for v in interner.values)
+            for interner in (self.teachers, self.courses, self.programs, self.days)
+        )
+        per_assignment = column_bytes / len(self) if len(self) else 8.0
+        return {
+            'assignments': len(self),
+            'column_bytes': column_bytes,
+            'interner_bytes': interner_bytes,
+            'bytes_per_assignment': per_assignment,
+            'mb_per_million_assignments': per_assignment * 1_000_000 / (1024 * 1024)
+        }
+    
+    @classmethod
+    def load(cls, db) -> "CompactTimetable":
+        """Load every Course_Teacher row from the primary database with a single streamed query"""
+        timetable = cls(db.get_calendar())
+        conn = db.get_connection()
+        try:
+            cursor = conn.cursor()
+            # Read before the rows: a write landing in between moves the version, so a later save is refused
+            timetable.data_version = journal.data_version(cursor)
+            cursor.execute("""
+                SELECT Teacher_Code, Course_Code, Period, Program, Semester, Day
+                FROM Course_Teacher
+            """)
+            while True:
+                batch = cursor.fetchmany(10000)
+                if not batch:
+                    break
+                timetable.extend(batch)
+        finally:
+            conn.close()
+        return timetable
+    
+    def save(self, db) -> int:
+        """Write the assignments that differ from Course_Teacher in one transaction.
+        
+        Raises database.StaleDataError if the data changed after load().
+        """
+        return db.replace_course_assignments(self.rows(), expected_version=self.data_version)
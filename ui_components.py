@@ -1,8 +1,52 @@
 import streamlit as st
 import pandas as pd
+from typing import Optional
 from database import DatabaseManager
-from models import Constants
-from utils import validate_course_data, validate_teacher_data, format_routine_for_display, get_teacher_weekly_routine, format_teacher_routine_for_display
+from utils import validate_course_data, validate_teacher_data, format_routine_for_display, get_teacher_weekly_routine, format_teacher_routine_for_display, get_room_weekly_routine, format_room_routine_for_display
+from rooms import run_room_allocation
+from search import MAX_SEARCH_LIMIT, search_entities, ranked_codes, typeahead
+
+def create_html_table(df: pd.DataFrame) -> str:
+    """Render a weekly routine frame as an inline-styled HTML table"""
+    html = "<table style='width: 100%; border-collapse: collapse; font-size: 14px;'>"
+    
+    # Header
+    html += "<tr style='background-color: #f0f0f0;'>"
+    for col in df.columns:
+        html += f"<th style='border: 1px solid #ddd; padding: 8px; text-align: center; font-weight: bold;'>{col}</th>"
+    html += "</tr>"
+    
+    # Rows
+    for _, row in df.iterrows():
+        html += "<tr>"
+        for col in df.columns:
+            cell_value = str(row[col]) if row[col] else ""
+            # Replace newlines with HTML line breaks
+            cell_value = cell_value.replace('\n', '<br>')
+            if col == 'Day':
+                html += f"<td style='border: 1px solid #ddd; padding: 8px; text-align: center; font-weight: bold; background-color: #f8f9fa;'>{cell_value}</td>"
+            else:
+                html += f"<td style='border: 1px solid #ddd; padding: 8px; text-align: center; vertical-align: top;'>{cell_value}</td>"
+        html += "</tr>"
+    
+    html += "</table>"
+    return html
+
+def typeahead_select(db: DatabaseManager, label: str, kind: str, key: str, any_option: Optional[str] = None):
+    """Search box plus a selectbox of the best matching courses or teachers; returns the chosen code.
+    
+    Only the matches are loaded, so the widget stays small however large the
+    catalog is. With any_option the first entry stands for no choice and
+    returns None.
+    """
+    query = st.text_input(f"Search {kind}s", key=f"{key}_query", placeholder="Type a code or name")
+    options = {option['value']: option['label'] for option in typeahead(db, kind, query)}
+    if any_option is not None:
+        options = {None: any_option, **options}
+    if not options:
+        st.caption(f"No {kind} matches '{query}'.")
+        return None
+    return st.selectbox(label, options=list(options), format_func=options.get, key=key)
 
 def render_course_management(db: DatabaseManager):
     """Render course management section"""
@@ -36,6 +80,11 @@ def render_course_management(db: DatabaseManager):
     with tab2:
         st.subheader("Existing Courses")
         courses = db.get_courses()
+        query = st.text_input("🔍 Search courses", key="course_search", placeholder="Course code or name")
+        if query.strip():
+            codes = ranked_codes(search_entities(db, query, kinds=('course',), limit=MAX_SEARCH_LIMIT), 'course')
+            courses = courses.set_index('Course_Code').reindex(codes).reset_index()
+            st.caption(f"{len(codes)} matching course(s), best match first")
         
         if not courses.empty:
             # Display courses with edit/delete options
@@ -71,7 +120,7 @@ def render_teacher_management(db: DatabaseManager):
     """Render teacher management section"""
     st.header("👨‍🏫 Teacher Management")
     
-    tab1, tab2 = st.tabs(["Add/Edit Teachers", "View Teachers"])
+    tab1, tab2, tab3 = st.tabs(["Add/Edit Teachers", "View Teachers", "Availability"])
     
     with tab1:
         st.subheader("Add New Teacher")
@@ -99,6 +148,11 @@ def render_teacher_management(db: DatabaseManager):
     with tab2:
         st.subheader("Existing Teachers")
         teachers = db.get_teachers()
+        query = st.text_input("🔍 Search teachers", key="teacher_search", placeholder="Teacher code, name or designation")
+        if query.strip():
+            codes = ranked_codes(search_entities(db, query, kinds=('teacher',), limit=MAX_SEARCH_LIMIT), 'teacher')
+            teachers = teachers.set_index('Teacher_Code').reindex(codes).reset_index()
+            st.caption(f"{len(codes)} matching teacher(s), best match first")
         
         if not teachers.empty:
             for idx, teacher in teachers.iterrows():
@@ -128,15 +182,54 @@ def render_teacher_management(db: DatabaseManager):
                                 st.error("Delete failed!")
         else:
             st.info("No teachers found. Add some teachers to get started.")
+    
+    with tab3:
+        st.subheader("Teacher Availability & Workload")
+        teachers = db.get_teachers()
+        
+        if teachers.empty:
+            st.info("No teachers found. Add some teachers to get started.")
+            return
+        
+        teacher_names = dict(zip(teachers['Teacher_Code'], teachers['Teacher_Name']))
+        selected_teacher = st.selectbox("Select Teacher", options=list(teacher_names),
+                                        format_func=lambda x: f"{x} - {teacher_names[x]}",
+                                        key="availability_teacher_select")
+        
+        calendar = db.get_calendar()
+        all_slots = calendar.slots()
+        blocked = db.get_teacher_unavailability(selected_teacher)
+        current_slots = [(day, int(period)) for day, period in zip(blocked['Day'], blocked['Period'])]
+        blocked_slots = st.multiselect("Unavailable Slots", options=all_slots,
+                                       default=[slot for slot in current_slots if slot in all_slots],
+                                       format_func=lambda slot: f"{slot[0]} - Period {slot[1]}",
+                                       key=f"availability_slots_{selected_teacher}")
+        
+        max_per_day, max_per_week = db.get_availability_index().get_limits(selected_teacher)
+        col1, col2 = st.columns(2)
+        with col1:
+            new_max_per_day = st.number_input("Max Periods per Day (0 = unlimited)", min_value=0,
+                                              max_value=len(calendar.periods), value=max_per_day or 0,
+                                              key=f"max_per_day_{selected_teacher}")
+        with col2:
+            new_max_per_week = st.number_input("Max Periods per Week (0 = unlimited)", min_value=0,
+                                               max_value=len(all_slots), value=max_per_week or 0,
+                                               key=f"max_per_week_{selected_teacher}")
+        
+        if st.button("Save Availability", key="save_availability_btn"):
+            db.set_teacher_unavailable_slots(selected_teacher, blocked_slots)
+            db.set_teacher_workload(selected_teacher, int(new_max_per_day) or None, int(new_max_per_week) or None)
+            st.success("Availability saved!")
+            st.rerun()
 
 def render_assignment_management(db: DatabaseManager):
     """Render course assignment management"""
     st.header("📋 Course Assignments")
     
-    courses = db.get_courses()
-    teachers = db.get_teachers()
+    stats = db.get_dashboard_stats()
+    calendar = db.get_calendar()
     
-    if courses.empty or teachers.empty:
+    if stats['courses'] == 0 or stats['teachers'] == 0:
         st.warning("Please add courses and teachers before making assignments.")
         return
     
@@ -148,22 +241,27 @@ def render_assignment_management(db: DatabaseManager):
         col1, col2 = st.columns(2)
         
         with col1:
-            selected_teacher = st.selectbox("Select Teacher", 
-                                          options=teachers['Teacher_Code'].tolist(),
-                                          format_func=lambda x: f"{x} - {teachers[teachers['Teacher_Code']==x]['Teacher_Name'].iloc[0]}")
+            selected_teacher = typeahead_select(db, "Select Teacher", "teacher", key="assign_teacher")
             
-            selected_course = st.selectbox("Select Course",
-                                         options=courses['Course_Code'].tolist(), 
-                                         format_func=lambda x: f"{x} - {courses[courses['Course_Code']==x]['Course_Name'].iloc[0]}")
+            selected_course = typeahead_select(db, "Select Course", "course", key="assign_course")
             
-            selected_program = st.selectbox("Select Program", Constants.PROGRAMS)
+            selected_program = st.selectbox("Select Program", calendar.programs)
         
         with col2:
-            selected_semester = st.selectbox("Select Semester", Constants.SEMESTERS)
-            selected_day = st.selectbox("Select Day", Constants.DAYS)
+            selected_semester = st.selectbox("Select Semester", calendar.semesters_for(selected_program))
+            selected_day = st.selectbox("Select Day", calendar.days)
             selected_period = st.selectbox("Select Period", 
-                                         options=list(Constants.PERIODS.keys()),
-                                         format_func=lambda x: f"Period {x}: {Constants.PERIODS[x]}")
+                                         options=calendar.period_numbers,
+                                         format_func=calendar.period_display)
+        
+        if selected_teacher and selected_semester is not None:
+            free_slots = db.find_free_slots(selected_teacher, selected_program, selected_semester,
+                                            course_code=selected_course, limit=8)
+            if free_slots:
+                st.caption("💡 Free for this teacher and class: " +
+                           ", ".join(f"{slot['day']} P{slot['period']}" for slot in free_slots))
+            else:
+                st.caption("💡 No slot is free for both this teacher and class.")
         
         if st.button("Make Assignment", key="make_assignment_btn"):
             # Check for teacher conflict
@@ -183,12 +281,12 @@ def render_assignment_management(db: DatabaseManager):
         
         if len(assignments) > 0:
             # Group by program and semester
-            for program in Constants.PROGRAMS:
+            for program in calendar.programs:
                 program_assignments = assignments[assignments['Program'] == program]
                 if len(program_assignments) > 0:
                     st.write(f"**{program} Program:**")
                     
-                    for semester in Constants.SEMESTERS:
+                    for semester in calendar.semesters_for(program):
                         semester_assignments = program_assignments[program_assignments['Semester'] == semester]
                         if len(semester_assignments) > 0:
                             with st.expander(f"Semester {semester}"):
@@ -232,20 +330,30 @@ def render_assignment_management(db: DatabaseManager):
             # Filter options
             col1, col2, col3 = st.columns(3)
             with col1:
-                filter_program = st.selectbox("Filter by Program", ["All"] + Constants.PROGRAMS, key="delete_program_filter")
+                filter_program = st.selectbox("Filter by Program", ["All"] + list(calendar.programs), key="delete_program_filter")
+                filter_teacher = typeahead_select(db, "Filter by Teacher", "teacher", key="delete_teacher_filter", any_option="All")
             with col2:
-                filter_semester = st.selectbox("Filter by Semester", ["All"] + [str(s) for s in Constants.SEMESTERS], key="delete_semester_filter")
+                filter_semester = st.selectbox("Filter by Semester", ["All"] + [str(s) for s in calendar.semesters], key="delete_semester_filter")
+                filter_course = typeahead_select(db, "Filter by Course", "course", key="delete_course_filter", any_option="All")
             with col3:
-                filter_day = st.selectbox("Filter by Day", ["All"] + Constants.DAYS, key="delete_day_filter")
+                filter_day = st.selectbox("Filter by Day", ["All"] + list(calendar.days), key="delete_day_filter")
+            
+            # Same spec drives the preview and the delete statement
+            filter_spec = {
+                'program': None if filter_program == "All" else filter_program,
+                'semester': None if filter_semester == "All" else int(filter_semester),
+                'day': None if filter_day == "All" else filter_day,
+                'teacher_code': filter_teacher,
+                'course_code': filter_course
+            }
+            filter_columns = {'program': 'Program', 'semester': 'Semester', 'day': 'Day',
+                              'teacher_code': 'Teacher_Code', 'course_code': 'Course_Code'}
             
             # Apply filters
             filtered_assignments = assignments.copy()
-            if filter_program != "All":
-                filtered_assignments = filtered_assignments[filtered_assignments['Program'] == filter_program]
-            if filter_semester != "All":
-                filtered_assignments = filtered_assignments[filtered_assignments['Semester'] == int(filter_semester)]
-            if filter_day != "All":
-                filtered_assignments = filtered_assignments[filtered_assignments['Day'] == filter_day]
+            for name, value in filter_spec.items():
+                if value is not None:
+                    filtered_assignments = filtered_assignments[filtered_assignments[filter_columns[name]] == value]
             
             if len(filtered_assignments) > 0:
                 st.markdown("---")
@@ -262,53 +370,49 @@ def render_assignment_management(db: DatabaseManager):
                             key=f"delete_check_{idx}_{assignment['Teacher_Code']}_{assignment['Course_Code']}_{assignment['Program']}_{assignment['Semester']}_{assignment['Day']}_{assignment['Period']}"
                         )
                         if delete_selected:
-                            assignments_to_delete.append(assignment)
+                            assignments_to_delete.append((str(assignment['Teacher_Code']),
+                                                          str(assignment['Course_Code']),
+                                                          str(assignment['Program']),
+                                                          int(assignment['Semester']),
+                                                          str(assignment['Day']),
+                                                          int(assignment['Period'])))
                     
                     with col2:
                         # Display assignment details
                         st.markdown(f"""
                         <div style='background-color: #fff2f2; padding: 10px; border-radius: 5px; margin: 5px 0; border-left: 3px solid #ff6b6b;'>
                             <strong>{assignment['Program']} - Semester {assignment['Semester']}</strong><br>
-                            <strong>📅 {assignment['Day']} - Period {assignment['Period']}</strong> ({Constants.PERIODS.get(int(assignment['Period']), 'Unknown')})<br>
+                            <strong>📅 {assignment['Day']} - Period {assignment['Period']}</strong> ({calendar.period_time(int(assignment['Period']))})<br>
                             <span style='color: #1f77b4; font-weight: bold;'>{assignment['Course_Name']} ({assignment['Course_Code']})</span><br>
                             <span style='color: #666; font-style: italic;'>({assignment['Teacher_Name']} - {assignment['Teacher_Code']})</span>
                         </div>
                         """, unsafe_allow_html=True)
                 
-                # Delete selected assignments
-                if assignments_to_delete:
-                    st.markdown("---")
-                    col1, col2 = st.columns([1, 1])
-                    
-                    with col1:
-                        if st.button("🗑️ Delete Selected Assignments", type="primary", key="bulk_delete_btn"):
-                            deleted_count = 0
-                            failed_count = 0
-                            
-                            for assignment in assignments_to_delete:
-                                if db.remove_course_assignment(
-                                    str(assignment['Teacher_Code']), 
-                                    str(assignment['Course_Code']),
-                                    str(assignment['Program']),
-                                    int(assignment['Semester']),
-                                    str(assignment['Day']),
-                                    int(assignment['Period'])
-                                ):
-                                    deleted_count += 1
-                                else:
-                                    failed_count += 1
-                            
-                            if deleted_count > 0:
-                                st.success(f"Successfully deleted {deleted_count} assignment(s)!")
-                            if failed_count > 0:
-                                st.error(f"Failed to delete {failed_count} assignment(s)!")
-                            
+                st.markdown("---")
+                col1, col2 = st.columns([1, 1])
+                
+                with col1:
+                    # Delete selected assignments
+                    if assignments_to_delete:
+                        if st.button(f"🗑️ Delete {len(assignments_to_delete)} Selected", type="primary", key="bulk_delete_btn"):
+                            deleted_count = db.delete_assignments(keys=assignments_to_delete)
+                            st.success(f"Successfully deleted {deleted_count} assignment(s)!")
                             if deleted_count > 0:
                                 st.rerun()
-                    
-                    with col2:
-                        st.info(f"Selected {len(assignments_to_delete)} assignment(s) for deletion")
+                    else:
+                        st.info("Tick assignments to delete them individually.")
                 
+                with col2:
+                    # Delete everything the filters match in one statement
+                    if any(value is not None for value in filter_spec.values()):
+                        if st.button(f"🗑️ Delete All {len(filtered_assignments)} Matching", key="filter_delete_btn"):
+                            deleted_count = db.delete_assignments(filters=filter_spec)
+                            st.success(f"Successfully deleted {deleted_count} assignment(s)!")
+                            if deleted_count > 0:
+                                st.rerun()
+                    else:
+                        st.info("Choose at least one filter to delete by filter.")
+            
             else:
                 st.info("No assignments match the selected filters.")
         else:
@@ -317,15 +421,16 @@ def render_assignment_management(db: DatabaseManager):
 def render_routine_display(db: DatabaseManager):
     """Render routine display section"""
     st.header("📅 Class Routines")
+    calendar = db.get_calendar()
     
     # Selection controls
     col1, col2 = st.columns(2)
     
     with col1:
-        selected_program = st.selectbox("Select Program", Constants.PROGRAMS, key="routine_program")
+        selected_program = st.selectbox("Select Program", calendar.programs, key="routine_program")
     
     with col2:
-        selected_semester = st.selectbox("Select Semester", Constants.SEMESTERS, key="routine_semester")
+        selected_semester = st.selectbox("Select Semester", calendar.semesters_for(selected_program), key="routine_semester")
     
     # Get routine data
     routine_data = db.get_routine_for_program_semester(selected_program, selected_semester)
@@ -337,46 +442,21 @@ def render_routine_display(db: DatabaseManager):
     st.subheader(f"Routine for {selected_program} - Semester {selected_semester}")
     
     # Format data for display
-    formatted_routine = format_routine_for_display(routine_data)
+    formatted_routine = format_routine_for_display(routine_data, calendar)
     
     # Display as HTML table to support line breaks
-    def create_html_table(df):
-        html = "<table style='width: 100%; border-collapse: collapse; font-size: 14px;'>"
-        
-        # Header
-        html += "<tr style='background-color: #f0f0f0;'>"
-        for col in df.columns:
-            html += f"<th style='border: 1px solid #ddd; padding: 8px; text-align: center; font-weight: bold;'>{col}</th>"
-        html += "</tr>"
-        
-        # Rows
-        for _, row in df.iterrows():
-            html += "<tr>"
-            for col in df.columns:
-                cell_value = str(row[col]) if row[col] else ""
-                # Replace newlines with HTML line breaks
-                cell_value = cell_value.replace('\n', '<br>')
-                if col == 'Day':
-                    html += f"<td style='border: 1px solid #ddd; padding: 8px; text-align: center; font-weight: bold; background-color: #f8f9fa;'>{cell_value}</td>"
-                else:
-                    html += f"<td style='border: 1px solid #ddd; padding: 8px; text-align: center; vertical-align: top;'>{cell_value}</td>"
-            html += "</tr>"
-        
-        html += "</table>"
-        return html
-    
     st.markdown(create_html_table(formatted_routine), unsafe_allow_html=True)
     
     # Display detailed schedule
     st.markdown("---")
     st.subheader("Detailed Schedule")
     
-    for day in Constants.DAYS:
+    for day in calendar.days:
         day_schedule = routine_data[routine_data['Day'] == day]
         if not day_schedule.empty:
             st.write(f"**{day}:**")
             for _, class_info in day_schedule.iterrows():
-                period_time = Constants.PERIODS.get(int(class_info['Period']), "Unknown")
+                period_time = calendar.period_time(int(class_info['Period']))
                 st.markdown(f"""
                 <div style='margin-left: 20px; margin-bottom: 8px;'>
                     <strong>• Period {class_info['Period']} ({period_time}):</strong><br>
@@ -388,6 +468,7 @@ def render_routine_display(db: DatabaseManager):
 def render_teacher_routine_display(db: DatabaseManager):
     """Render teacher routine display section"""
     st.header("👨‍🏫 Teacher Schedules")
+    calendar = db.get_calendar()
     
     teachers = db.get_teachers()
     
@@ -415,46 +496,21 @@ def render_teacher_routine_display(db: DatabaseManager):
             return
         
         # Format for display
-        formatted_teacher_routine = format_teacher_routine_for_display(teacher_routine)
+        formatted_teacher_routine = format_teacher_routine_for_display(teacher_routine, calendar)
         
         # Display as HTML table to support line breaks
-        def create_html_table(df):
-            html = "<table style='width: 100%; border-collapse: collapse; font-size: 14px;'>"
-            
-            # Header
-            html += "<tr style='background-color: #f0f0f0;'>"
-            for col in df.columns:
-                html += f"<th style='border: 1px solid #ddd; padding: 8px; text-align: center; font-weight: bold;'>{col}</th>"
-            html += "</tr>"
-            
-            # Rows
-            for _, row in df.iterrows():
-                html += "<tr>"
-                for col in df.columns:
-                    cell_value = str(row[col]) if row[col] else ""
-                    # Replace newlines with HTML line breaks
-                    cell_value = cell_value.replace('\n', '<br>')
-                    if col == 'Day':
-                        html += f"<td style='border: 1px solid #ddd; padding: 8px; text-align: center; font-weight: bold; background-color: #f8f9fa;'>{cell_value}</td>"
-                    else:
-                        html += f"<td style='border: 1px solid #ddd; padding: 8px; text-align: center; vertical-align: top;'>{cell_value}</td>"
-                html += "</tr>"
-            
-            html += "</table>"
-            return html
-        
         st.markdown(create_html_table(formatted_teacher_routine), unsafe_allow_html=True)
         
         # Display detailed schedule
         st.markdown("---")
         st.subheader("Detailed Schedule")
         
-        for day in Constants.DAYS:
+        for day in calendar.days:
             day_schedule = teacher_routine[teacher_routine['Day'] == day]
             if not day_schedule.empty:
                 st.write(f"**{day}:**")
                 for _, class_info in day_schedule.iterrows():
-                    period_time = Constants.PERIODS.get(int(class_info['Period']), "Unknown")
+                    period_time = calendar.period_time(int(class_info['Period']))
                     st.markdown(f"""
                     <div style='margin-left: 20px; margin-bottom: 8px;'>
                         <strong>• Period {class_info['Period']} ({period_time}):</strong><br>
@@ -462,3 +518,244 @@ def render_teacher_routine_display(db: DatabaseManager):
                         <span style='color: #666; font-style: italic; margin-left: 15px;'>({class_info['Program']} Sem {class_info['Semester']})</span>
                     </div>
                     """, unsafe_allow_html=True)
+
+def render_room_management(db: DatabaseManager):
+    """Render room management and allocation section"""
+    st.header("🏢 Room Management")
+    calendar = db.get_calendar()
+    
+    tab1, tab2, tab3 = st.tabs(["Rooms", "Class Sizes & Allocation", "Room Schedules"])
+    
+    with tab1:
+        st.subheader("Add New Room")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            room_code = st.text_input("Room Code", key="room_code_input")
+            room_name = st.text_input("Room Name", key="room_name_input")
+        with col2:
+            capacity = st.number_input("Capacity", min_value=1, value=40, key="room_capacity_input")
+            room_type = st.selectbox("Room Type", ["Lecture", "Lab", "Hall"], key="room_type_input")
+        
+        if st.button("Add Room", key="add_room_btn"):
+            if not room_code.strip() or not room_name.strip():
+                st.error("Room code and name are required")
+            elif db.add_room(room_code.strip(), room_name.strip(), int(capacity), room_type):
+                st.success(f"Room {room_code} added successfully!")
+                st.rerun()
+            else:
+                st.error("Room code already exists!")
+        
+        rooms = db.get_rooms()
+        if not rooms.empty:
+            st.markdown("---")
+            for idx, room in rooms.iterrows():
+                col1, col2 = st.columns([5, 1])
+                with col1:
+                    st.write(f"🏢 **{room['Room_Code']}** - {room['Room_Name']} ({room['Room_Type']}, {room['Capacity']} seats)")
+                with col2:
+                    if st.button("Delete", key=f"delete_room_{room['Room_Code']}", type="secondary"):
+                        if db.delete_room(str(room['Room_Code'])):
+                            st.success("Room deleted!")
+                            st.rerun()
+                        else:
+                            st.error("Delete failed!")
+        else:
+            st.info("No rooms found. Add some rooms to get started.")
+    
+    with tab2:
+        st.subheader("Class Sizes")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            enrollment_program = st.selectbox("Program", calendar.programs, key="enrollment_program")
+        with col2:
+            enrollment_semester = st.selectbox("Semester", calendar.semesters_for(enrollment_program), key="enrollment_semester")
+        with col3:
+            students = st.number_input("Students", min_value=0, value=40, key="enrollment_students")
+        
+        if st.button("Save Class Size", key="save_enrollment_btn"):
+            db.set_class_enrollment(enrollment_program, enrollment_semester, int(students))
+            st.success("Class size saved!")
+        
+        enrollments = db.get_class_enrollments()
+        if not enrollments.empty:
+            st.dataframe(enrollments, use_container_width=True)
+        
+        st.markdown("---")
+        st.subheader("Allocate Rooms")
+        st.write("Assign a room to every scheduled class slot, smallest room that fits first.")
+        
+        if st.button("Run Room Allocation", type="primary", key="allocate_rooms_btn"):
+            result = run_room_allocation(db)
+            st.success(f"Allocated {result['allocated']} of {result['class_slots']} class slots in {result['elapsed_ms']} ms")
+            if result['unallocated']:
+                st.warning(f"{len(result['unallocated'])} class slot(s) could not be given a room")
+                st.dataframe(pd.DataFrame(result['unallocated']), use_container_width=True)
+    
+    with tab3:
+        rooms = db.get_rooms()
+        if rooms.empty:
+            st.info("No rooms found. Add some rooms first.")
+            return
+        
+        room_names = dict(zip(rooms['Room_Code'], rooms['Room_Name']))
+        selected_room = st.selectbox("Select Room", options=list(room_names),
+                                     format_func=lambda x: f"{x} - {room_names[x]}",
+                                     key="room_routine_select")
+        
+        room_routine = get_room_weekly_routine(db, selected_room)
+        if room_routine.empty:
+            st.info(f"No schedule found for room {selected_room}. Run the room allocation first.")
+            return
+        
+        st.markdown(create_html_table(format_room_routine_for_display(room_routine, calendar)), unsafe_allow_html=True)
+
+def render_calendar_settings(db: DatabaseManager):
+    """Render academic calendar settings section"""
+    st.header("🗓️ Calendar Settings")
+    st.write("Programs, teaching days and periods used by every page. Changes apply without a restart.")
+    st.caption("Removing a program, semester, day or period also deletes the classes, room bookings and "
+               "blocked slots in it; Undo brings them back.")
+    calendar = db.get_calendar()
+    
+    tab1, tab2, tab3 = st.tabs(["Programs", "Days", "Periods"])
+    
+    with tab1:
+        programs = pd.DataFrame(
+            [(program, calendar.program_semesters.get(program, len(calendar.semesters))) for program in calendar.programs],
+            columns=["Program", "Semesters"]
+        )
+        edited_programs = st.data_editor(programs, num_rows="dynamic", use_container_width=True, key="calendar_programs")
+        if st.button("Save Programs", key="save_calendar_programs_btn"):
+            rows = [(str(row['Program']).strip(), int(row['Semesters'])) for _, row in edited_programs.dropna().iterrows()
+                    if str(row['Program']).strip()]
+            db.set_calendar_programs(rows)
+            st.success(f"Saved {len(rows)} program(s)!")
+            st.rerun()
+    
+    with tab2:
+        days = pd.DataFrame({"Day": list(calendar.days)})
+        edited_days = st.data_editor(days, num_rows="dynamic", use_container_width=True, key="calendar_days")
+        if st.button("Save Days", key="save_calendar_days_btn"):
+            rows = [str(day).strip() for day in edited_days['Day'].dropna() if str(day).strip()]
+            db.set_calendar_days(rows)
+            st.success(f"Saved {len(rows)} day(s)!")
+            st.rerun()
+    
+    with tab3:
+        periods = pd.DataFrame(
+            [(period, label, calendar.shifts.get(period, "")) for period, label in calendar.periods.items()],
+            columns=["Period", "Time", "Shift"]
+        )
+        edited_periods = st.data_editor(periods, num_rows="dynamic", use_container_width=True, key="calendar_periods")
+        if st.button("Save Periods", key="save_calendar_periods_btn"):
+            rows = [(int(row['Period']), str(row['Time']), str(row['Shift'] or "") or None)
+                    for _, row in edited_periods.dropna(subset=["Period", "Time"]).iterrows()]
+            db.set_calendar_periods(rows)
+            st.success(f"Saved {len(rows)} period(s)!")
+            st.rerun()
+
+def render_version_management(db: DatabaseManager):
+    """Render timetable version management section"""
+    st.header("🗂️ Timetable Versions")
+    st.write("Save the working timetable as a version, start a new term from an earlier one, and compare versions.")
+    
+    versions = db.get_timetable_versions()
+    version_labels = {int(v['Version_Id']): f"#{v['Version_Id']} {v['Term_Id']} - {v['Label']} ({v['Status']})"
+                      for _, v in versions.iterrows()}
+    
+    tab1, tab2, tab3 = st.tabs(["Versions", "New Version", "Compare"])
+    
+    with tab1:
+        if versions.empty:
+            st.info("No versions saved yet.")
+        else:
+            st.dataframe(versions, use_container_width=True)
+            
+            selected_version = st.selectbox("Select Version", options=list(version_labels),
+                                            format_func=version_labels.get, key="version_select")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                if st.button("Publish", key="publish_version_btn"):
+                    db.publish_timetable_version(selected_version)
+                    st.success("Version published!")
+                    st.rerun()
+            with col2:
+                if st.button("Load as Working Timetable", key="checkout_version_btn"):
+                    loaded = db.checkout_timetable_version(selected_version)
+                    st.success(f"Loaded {loaded} assignment(s) into the working timetable!")
+            with col3:
+                if st.button("Save Working Timetable Here", key="save_version_btn"):
+                    if db.save_timetable_version(selected_version):
+                        st.success("Version updated!")
+                        st.rerun()
+                    else:
+                        st.error("Only draft versions can be overwritten!")
+            with col4:
+                if st.button("Delete", key="delete_version_btn", type="secondary"):
+                    if db.delete_timetable_version(selected_version):
+                        st.success("Version deleted!")
+                        st.rerun()
+                    else:
+                        st.error("Only draft versions can be deleted!")
+    
+    with tab2:
+        col1, col2 = st.columns(2)
+        with col1:
+            term_id = st.text_input("Term", placeholder="e.g., 2025-Fall", key="version_term_input")
+            label = st.text_input("Label", placeholder="e.g., First draft", key="version_label_input")
+        with col2:
+            source = st.selectbox("Start From", options=[None] + list(version_labels),
+                                  format_func=lambda x: "Working timetable" if x is None else version_labels[x],
+                                  key="version_source_select")
+        
+        if st.button("Create Version", type="primary", key="create_version_btn"):
+            if not term_id.strip() or not label.strip():
+                st.error("Term and label are required")
+            else:
+                version_id = db.create_timetable_version(term_id.strip(), label.strip(), source)
+                st.success(f"Version #{version_id} created!")
+                st.rerun()
+    
+    with tab3:
+        options = [None] + list(version_labels)
+        col1, col2 = st.columns(2)
+        with col1:
+            from_version = st.selectbox("From", options=options, key="diff_from_select",
+                                        format_func=lambda x: "Working timetable" if x is None else version_labels[x])
+        with col2:
+            to_version = st.selectbox("To", options=options, key="diff_to_select",
+                                      format_func=lambda x: "Working timetable" if x is None else version_labels[x])
+        
+        diff = db.diff_timetable_versions(from_version, to_version)
+        st.metric("Added", len(diff['added']))
+        if not diff['added'].empty:
+            st.dataframe(diff['added'], use_container_width=True)
+        st.metric("Removed", len(diff['removed']))
+        if not diff['removed'].empty:
+            st.dataframe(diff['removed'], use_container_width=True)
+
+def render_undo_controls(db: DatabaseManager):
+    """Render undo/redo buttons and recent changes in the sidebar"""
+    st.sidebar.markdown("---")
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        if st.button("↩️ Undo", key="undo_btn", use_container_width=True):
+            if db.undo_changes():
+                st.rerun()
+            else:
+                st.sidebar.info("Nothing to undo")
+    with col2:
+        if st.button("↪️ Redo", key="redo_btn", use_container_width=True):
+            if db.redo_changes():
+                st.rerun()
+            else:
+                st.sidebar.info("Nothing to redo")
+    
+    history = db.get_change_history(10)
+    if not history.empty:
+        with st.sidebar.expander("Recent Changes"):
+            for _, change in history.iterrows():
+                description = f"~~{change['Description']}~~" if change['Undone'] else change['Description']
+                st.write(f"{description} ({change['Rows_Changed']} row(s))")
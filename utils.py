@@ -1,11 +1,11 @@
 import pandas as pd
 from typing import Dict, List, Any
-from models import Constants
+from academic_calendar import AcademicCalendar
 
-def create_empty_routine_dataframe() -> pd.DataFrame:
+def create_empty_routine_dataframe(calendar: AcademicCalendar) -> pd.DataFrame:
     """Create an empty routine dataframe structure"""
-    periods = list(Constants.PERIODS.keys())
-    days = Constants.DAYS
+    periods = calendar.period_numbers
+    days = calendar.days
     
     # Create a multi-index dataframe
     data = []
@@ -17,19 +17,19 @@ def create_empty_routine_dataframe() -> pd.DataFrame:
     
     return pd.DataFrame(data)
 
-def format_routine_for_display(routine_df: pd.DataFrame) -> pd.DataFrame:
+def format_routine_for_display(routine_df: pd.DataFrame, calendar: AcademicCalendar) -> pd.DataFrame:
     """Format routine dataframe for better display"""
     if routine_df.empty:
-        return create_empty_routine_dataframe()
+        return create_empty_routine_dataframe(calendar)
     
     # Pivot the data to show days as rows and periods as columns
     display_data = []
     
-    for day in Constants.DAYS:
+    for day in calendar.days:
         row = {"Day": day}
         day_data = routine_df[routine_df["Day"] == day]
         
-        for period in range(1, 7):
+        for period in calendar.period_numbers:
             period_data = day_data[day_data["Period"] == period]
             if len(period_data) > 0:
                 course_info = period_data.iloc[0]
@@ -42,6 +42,30 @@ def format_routine_for_display(routine_df: pd.DataFrame) -> pd.DataFrame:
     
     return pd.DataFrame(display_data)
 
+def format_room_routine_for_display(routine_df: pd.DataFrame, calendar: AcademicCalendar) -> pd.DataFrame:
+    """Format room routine dataframe for display in weekly format"""
+    if routine_df.empty:
+        return create_empty_routine_dataframe(calendar)
+    
+    display_data = []
+    
+    for day in calendar.days:
+        row = {"Day": day}
+        day_data = routine_df[routine_df["Day"] == day]
+        
+        for period in calendar.period_numbers:
+            period_data = day_data[day_data["Period"] == period]
+            if not period_data.empty:
+                class_info = period_data.iloc[0]
+                cell_content = f"{class_info['Course_Name']}\n{class_info['Program']} Sem-{class_info['Semester']}"
+                row[f"Period {period}"] = cell_content
+            else:
+                row[f"Period {period}"] = ""
+        
+        display_data.append(row)
+    
+    return pd.DataFrame(display_data)
+
 def validate_course_data(course_code: str, course_name: str, credit_hrs: str) -> tuple:
     """Validate course input data"""
     errors = []
@@ -77,18 +101,68 @@ def validate_teacher_data(teacher_code: str, teacher_name: str, teacher_designat
     
     return errors
 
-def get_time_slot_info() -> str:
+def validate_assignment_slot(calendar: AcademicCalendar, program: str, semester: int,
+                             day: str, period: int) -> list:
+    """Validate an assignment's program, semester, day and period against the calendar"""
+    errors = []
+    
+    if program not in calendar.program_semesters:
+        errors.append(f"Unknown program: {program}")
+    elif semester not in calendar.semesters_for(program):
+        errors.append(f"{program} has no semester {semester}")
+    
+    if day not in calendar.day_index:
+        errors.append(f"{day} is not a teaching day")
+    
+    if period not in calendar.periods:
+        errors.append(f"Period {period} is not defined")
+    
+    return errors
+
+def parse_semester_list(calendar: AcademicCalendar, program: str, semesters: str) -> tuple:
+    """Parse a '1-8' or '1,3,5-6' semester list for a program (empty means all of its semesters)"""
+    errors = []
+    
+    if program not in calendar.program_semesters:
+        return [f"Unknown program: {program}"], []
+    
+    if not semesters.strip():
+        return errors, list(calendar.semesters_for(program))
+    
+    parsed = []
+    for part in semesters.split(','):
+        first, _, last = part.strip().partition('-')
+        try:
+            start = int(first)
+            end = int(last) if last else start
+        except ValueError:
+            errors.append(f"Invalid semester range: {part.strip()}")
+            continue
+        if start > end:
+            errors.append(f"Invalid semester range: {part.strip()} (start is after end)")
+            continue
+        for semester in range(start, end + 1):
+            if semester not in calendar.semesters_for(program):
+                errors.append(f"{program} has no semester {semester}")
+                break
+            if semester not in parsed:
+                parsed.append(semester)
+    
+    return errors, parsed
+
+def get_time_slot_info(calendar: AcademicCalendar) -> str:
     """Get formatted time slot information"""
     info = "**Class Schedule:**\n"
-    for period, time in Constants.PERIODS.items():
-        info += f"- Period {period}: {time}\n"
-    info += "- Break: 9:00 AM - 9:10 AM (between Period 3 and 4)\n"
-    info += "- Classes: Sunday to Friday (Saturday off)\n"
+    for period, time in calendar.periods.items():
+        shift = calendar.shifts.get(period)
+        info += f"- Period {period}: {time} ({shift})\n" if shift else f"- Period {period}: {time}\n"
+    if calendar.days:
+        info += f"- Classes: {calendar.days[0]} to {calendar.days[-1]}\n"
     return info
 
 def get_teacher_weekly_routine(db, teacher_code: str) -> pd.DataFrame:
     """Get weekly routine for a specific teacher across all programs"""
-    conn = db.get_connection()
+    conn = db.get_read_connection()
     try:
         query = """
         SELECT 
@@ -100,35 +174,53 @@ def get_teacher_weekly_routine(db, teacher_code: str) -> pd.DataFrame:
             c.Course_Code
         FROM Course_Teacher ct
         JOIN Course c ON ct.Course_Code = c.Course_Code
+        LEFT JOIN Calendar_Day cd ON cd.Day = ct.Day
         WHERE ct.Teacher_Code = ?
-        ORDER BY 
-            CASE ct.Day 
-                WHEN 'Sunday' THEN 1
-                WHEN 'Monday' THEN 2
-                WHEN 'Tuesday' THEN 3
-                WHEN 'Wednesday' THEN 4
-                WHEN 'Thursday' THEN 5
-                WHEN 'Friday' THEN 6
-            END,
-            ct.Period
+        ORDER BY cd.Position, ct.Period
         """
         return pd.read_sql_query(query, conn, params=[teacher_code])
     finally:
         conn.close()
 
-def format_teacher_routine_for_display(routine_df: pd.DataFrame) -> pd.DataFrame:
+def get_room_weekly_routine(db, room_code: str) -> pd.DataFrame:
+    """Get weekly routine for a specific room across all programs"""
+    conn = db.get_read_connection()
+    try:
+        query = """
+        SELECT 
+            ra.Day,
+            ra.Period,
+            ra.Program,
+            ra.Semester,
+            c.Course_Name,
+            c.Course_Code,
+            t.Teacher_Name
+        FROM Room_Assignment ra
+        JOIN Course_Teacher ct ON ct.Program = ra.Program AND ct.Semester = ra.Semester
+            AND ct.Day = ra.Day AND ct.Period = ra.Period
+        JOIN Course c ON ct.Course_Code = c.Course_Code
+        JOIN Teacher t ON ct.Teacher_Code = t.Teacher_Code
+        LEFT JOIN Calendar_Day cd ON cd.Day = ra.Day
+        WHERE ra.Room_Code = ?
+        ORDER BY cd.Position, ra.Period
+        """
+        return pd.read_sql_query(query, conn, params=[room_code])
+    finally:
+        conn.close()
+
+def format_teacher_routine_for_display(routine_df: pd.DataFrame, calendar: AcademicCalendar) -> pd.DataFrame:
     """Format teacher routine dataframe for display in weekly format"""
     if routine_df.empty:
-        return create_empty_routine_dataframe()
+        return create_empty_routine_dataframe(calendar)
     
     # Create display data structure
     display_data = []
     
-    for day in Constants.DAYS:
+    for day in calendar.days:
         row = {"Day": day}
         day_data = routine_df[routine_df["Day"] == day]
         
-        for period in range(1, 7):
+        for period in calendar.period_numbers:
             period_data = day_data[day_data["Period"] == period]
             if not period_data.empty:
                 class_info = period_data.iloc[0]
@@ -140,3 +232,140 @@ def format_teacher_routine_for_display(routine_df: pd.DataFrame) -> pd.DataFrame
         display_data.append(row)
     
     return pd.DataFrame(display_data)
+
+def create_html_table(df: pd.DataFrame) -> str:
+    """Create HTML table from dataframe"""
+    html = "<table class='table table-bordered table-striped'>"
+    
+    # Header
+    html += "<thead class='table-dark'><tr>"
+    for col in df.columns:
+        html += f"<th class='text-center'>{col}</th>"
+    html += "</tr></thead>"
+    
+    # Body
+    html += "<tbody>"
+    for _, row in df.iterrows():
+        html += "<tr>"
+        for col in df.columns:
+            cell_value = str(row[col]) if row[col] else ""
+            cell_value = cell_value.replace('\n', '<br>')
+            if col == 'Day':
+                html += f"<td class='text-center fw-bold table-secondary'>{cell_value}</td>"
+            else:
+                html += f"<td class='text-center'>{cell_value}</td>"
+        html += "</tr>"
+    html += "</tbody></table>"
+    
+    return html
+
+def build_routine_payload(db, program: str, semester: int) -> Dict[str, Any]:
+    """Build the JSON payload served for a program/semester routine"""
+    routine_data = db.get_routine_for_program_semester(program, semester)
+    
+    if routine_data.empty:
+        return {'error': f'No routine found for {program} Semester {semester}'}
+    
+    calendar = db.get_calendar()
+    formatted_routine = format_routine_for_display(routine_data, calendar)
+    html_table = create_html_table(formatted_routine)
+    
+    # Get detailed schedule
+    detailed_schedule = []
+    for day in calendar.days:
+        day_schedule = routine_data[routine_data['Day'] == day]
+        if not day_schedule.empty:
+            day_classes = []
+            for _, class_info in day_schedule.iterrows():
+                period_time = calendar.period_time(int(class_info['Period']))
+                day_classes.append({
+                    'period': int(class_info['Period']),
+                    'time': period_time,
+                    'course_name': class_info['Course_Name'],
+                    'teacher_name': class_info['Teacher_Name']
+                })
+            detailed_schedule.append({
+                'day': day,
+                'classes': day_classes
+            })
+    
+    return {
+        'html_table': html_table,
+        'detailed_schedule': detailed_schedule
+    }
+
+def build_teacher_routine_payload(db, teacher_code: str) -> Dict[str, Any]:
+    """Build the JSON payload served for a teacher's weekly routine"""
+    teachers = db.get_teachers()
+    teacher_info = teachers[teachers['Teacher_Code'] == teacher_code]
+    teacher_name = teacher_info['Teacher_Name'].iloc[0] if not teacher_info.empty else 'Unknown'
+    
+    teacher_routine = get_teacher_weekly_routine(db, teacher_code)
+    
+    if teacher_routine.empty:
+        return {'error': f'No schedule found for {teacher_name}'}
+    
+    calendar = db.get_calendar()
+    formatted_routine = format_teacher_routine_for_display(teacher_routine, calendar)
+    html_table = create_html_table(formatted_routine)
+    
+    # Get detailed schedule
+    detailed_schedule = []
+    for day in calendar.days:
+        day_schedule = teacher_routine[teacher_routine['Day'] == day]
+        if not day_schedule.empty:
+            day_classes = []
+            for _, class_info in day_schedule.iterrows():
+                period_time = calendar.period_time(int(class_info['Period']))
+                day_classes.append({
+                    'period': int(class_info['Period']),
+                    'time': period_time,
+                    'course_name': class_info['Course_Name'],
+                    'program': class_info['Program'],
+                    'semester': int(class_info['Semester'])
+                })
+            detailed_schedule.append({
+                'day': day,
+                'classes': day_classes
+            })
+    
+    return {
+        'teacher_name': teacher_name,
+        'html_table': html_table,
+        'detailed_schedule': detailed_schedule
+    }
+
+def build_room_routine_payload(db, room_code: str) -> Dict[str, Any]:
+    """Build the JSON payload served for a room's weekly routine"""
+    room_routine = get_room_weekly_routine(db, room_code)
+    
+    if room_routine.empty:
+        return {'error': f'No schedule found for room {room_code}'}
+    
+    calendar = db.get_calendar()
+    formatted_routine = format_room_routine_for_display(room_routine, calendar)
+    
+    detailed_schedule = []
+    for day in calendar.days:
+        day_schedule = room_routine[room_routine['Day'] == day]
+        if not day_schedule.empty:
+            day_classes = []
+            for _, class_info in day_schedule.iterrows():
+                day_classes.append({
+                    'period': int(class_info['Period']),
+                    'time': calendar.period_time(int(class_info['Period'])),
+                    'course_name': class_info['Course_Name'],
+                    'teacher_name': class_info['Teacher_Name'],
+                    'program': class_info['Program'],
+                    'semester': int(class_info['Semester'])
+                })
+            detailed_schedule.append({
+                'day': day,
+                'classes': day_classes
+            })
+    
+    return {
+        'room_code': room_code,
+        'html_table': create_html_table(formatted_routine),
+        'detailed_schedule': detailed_schedule
+    }